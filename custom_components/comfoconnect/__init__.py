@@ -2,10 +2,16 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
-from datetime import timedelta
+import time
+from collections.abc import Callable, Iterable
+from typing import Any, TypeVar
 
-from aiocomfoconnect import ComfoConnect, discover_bridges
+from aiocomfoconnect import ComfoConnect
+from aiocomfoconnect.bridge import Bridge, Node
+from aiocomfoconnect.const import ProductId
 from aiocomfoconnect.exceptions import (
     AioComfoConnectNotConnected,
     AioComfoConnectNotReachable,
@@ -18,23 +24,50 @@ from aiocomfoconnect.properties import (
     PROPERTY_MODEL,
     PROPERTY_NAME,
 )
-from aiocomfoconnect.sensors import Sensor
+from aiocomfoconnect.sensors import SENSOR_COMFOFOND_GHE_PRESENT, SENSORS, Sensor
 from aiocomfoconnect.util import version_decode
-from homeassistant.components import network
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
-from homeassistant.const import CONF_HOST, EVENT_HOMEASSISTANT_STOP, Platform
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.const import CONF_HOST, Platform
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.exceptions import (
     ConfigEntryAuthFailed,
     ConfigEntryError,
     ConfigEntryNotReady,
 )
 from homeassistant.helpers import device_registry as dr
-from homeassistant.helpers.dispatcher import async_dispatcher_send, dispatcher_send
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.entity import EntityDescription
 from homeassistant.helpers.typing import ConfigType
 
-from .const import CONF_LOCAL_UUID, CONF_UUID, DOMAIN
+from .cache import SensorValueCache
+from .commands import PRIORITY_BACKGROUND, CommandDebouncer, CommandScheduler
+from .const import (
+    ATTR_ACTIVE,
+    ATTR_ERROR_ID,
+    ATTR_MESSAGE,
+    ATTR_NODE_ID,
+    CONF_DEVICE_INFO,
+    CONF_INSTALLED_OPTIONS,
+    CONF_KEEPALIVE_IDLE,
+    CONF_LOCAL_UUID,
+    CONF_UUID,
+    DEFAULT_KEEPALIVE_IDLE,
+    DEVICE_INFO_BRIDGE_SERIAL,
+    DEVICE_INFO_BRIDGE_VERSION,
+    DEVICE_INFO_UNIT_FIRMWARE,
+    DEVICE_INFO_UNIT_MODEL,
+    DEVICE_INFO_UNIT_NAME,
+    DOMAIN,
+    EVENT_ALARM,
+    OPTION_COMFOCOOL,
+    OPTION_COMFOFOND,
+    OPTIONS,
+    ConnectionState,
+)
+from .frames import FrameWriter
+from .manager import async_get_manager
+from .metrics import BridgeMetrics, timed_commands
+from .state import VentilationStateStore
 
 PLATFORMS: list[Platform] = [
     Platform.FAN,
@@ -46,10 +79,23 @@ PLATFORMS: list[Platform] = [
 
 _LOGGER = logging.getLogger(__name__)
 
-SIGNAL_COMFOCONNECT_UPDATE_RECEIVED = "comfoconnect_update_{}_{}"
+_DescriptionT = TypeVar("_DescriptionT", bound=EntityDescription)
+
 SIGNAL_COMFOCONNECT_AVAILABILITY = "comfoconnect_availability_{}"
+SIGNAL_COMFOCONNECT_ALARMS = "comfoconnect_alarms_{}"
+
+# How long a request waits for the connection, when it's sent while we are connecting.
+CONNECTING_WAIT_TIMEOUT = 10
+
+# How long we wait for the requests in flight when the entry is unloaded.
+DRAIN_TIMEOUT = 5
 
-KEEP_ALIVE_INTERVAL = timedelta(seconds=30)
+# How long we wait for the bridge to tell whether a ComfoFond is installed, on top of the hold of a new sensor, and
+# for it to announce its nodes.
+OPTION_PROBE_TIMEOUT = 5
+
+# How long the bridge hasn't announced a node when we asked for them, before we take it that it announced them all.
+NODE_SETTLE = 1
 
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
@@ -68,11 +114,15 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Zehnder ComfoConnect from a config entry."""
 
-    hass.data.setdefault(DOMAIN, {})
+    manager = async_get_manager(hass)
+
+    # Load the last known sensor values, so the entities have a state before the bridge sends the first update.
+    sensor_cache = SensorValueCache(hass, entry.entry_id)
+    await sensor_cache.async_load()
 
     try:
-        bridge = ComfoConnectBridge(hass, entry.data[CONF_HOST], entry.data[CONF_UUID])
-        await bridge.connect(entry.data[CONF_LOCAL_UUID])
+        bridge = ComfoConnectBridge(hass, entry.data[CONF_HOST], entry.data[CONF_UUID], sensor_cache)
+        await manager.async_connect(bridge, entry.data[CONF_LOCAL_UUID])
 
     except ComfoConnectNotAllowed:
         raise ConfigEntryAuthFailed("Access denied")
@@ -87,20 +137,19 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             entry.data[CONF_HOST],
         )
 
-        broadcast_addresses = await network.async_get_ipv4_broadcast_addresses(hass)
-        bridges = await discover_bridges(broadcast_addresses=broadcast_addresses)
-        discovered_bridge = next((b for b in bridges if b.uuid == entry.data[CONF_UUID]), None)
-        if not discovered_bridge:
+        # Other entries that lost their bridge at the same time share the broadcast.
+        host = await manager.discovery.async_locate(entry.data[CONF_UUID], exclude=entry.data[CONF_HOST])
+        if host is None:
             _LOGGER.warning('Unable to discover bridge "%s". Retrying later.', entry.data[CONF_UUID])
             raise ConfigEntryNotReady from err
 
         # Try again, with the updated host this time
-        bridge = ComfoConnectBridge(hass, discovered_bridge.host, entry.data[CONF_UUID])
+        bridge = ComfoConnectBridge(hass, host, entry.data[CONF_UUID], sensor_cache)
         try:
-            await bridge.connect(entry.data[CONF_LOCAL_UUID])
+            await manager.async_connect(bridge, entry.data[CONF_LOCAL_UUID])
 
             # Update the host in the config entry
-            hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_HOST: discovered_bridge.host})
+            async_update_host(hass, entry, host)
 
         except ComfoConnectNotAllowed:
             raise ConfigEntryAuthFailed("Access denied")
@@ -108,83 +157,197 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         except ComfoConnectError as err:
             raise ConfigEntryNotReady from err
 
-    hass.data[DOMAIN][entry.entry_id] = bridge
-
-    # Get device information
-    bridge_info = await bridge.cmd_version_request()
-    unit_model = await bridge.get_property(PROPERTY_MODEL)
-    unit_firmware = await bridge.get_property(PROPERTY_FIRMWARE_VERSION)
-    unit_name = await bridge.get_property(PROPERTY_NAME)
-
-    device_registry = dr.async_get(hass)
-
-    # Add Bridge to device registry
-    device_registry.async_get_or_create(
-        config_entry_id=entry.entry_id,
-        identifiers={(DOMAIN, bridge_info.serialNumber)},
-        manufacturer="Zehnder",
-        name=bridge_info.serialNumber,
-        model="ComfoConnect LAN C",
-        sw_version=version_decode(bridge_info.gatewayVersion),
+    bridge.keepalive_idle = entry.options.get(CONF_KEEPALIVE_IDLE, DEFAULT_KEEPALIVE_IDLE)
+    entry.async_on_unload(entry.add_update_listener(async_options_updated))
+    # The manager looks for the bridge again when DHCP moves it while we are running, and asks the user to register
+    # us again when the bridge doesn't allow us anymore.
+    await manager.async_add_bridge(
+        entry.entry_id,
+        bridge,
+        entry.data[CONF_LOCAL_UUID],
+        functools.partial(async_update_host, hass, entry),
+        functools.partial(entry.async_start_reauth, hass),
     )
 
-    # Add Ventilation Unit to device registry
-    device_registry.async_get_or_create(
-        config_entry_id=entry.entry_id,
-        identifiers={(DOMAIN, bridge.uuid)},
-        manufacturer="Zehnder",
-        name=unit_name,
-        model=unit_model,
-        sw_version=version_decode(unit_firmware),
-        via_device=(DOMAIN, bridge_info.serialNumber),
-    )
+    try:
+        # Register the devices with what we cached on the previous start, so we don't keep the platforms waiting for
+        # the bridge, and refresh it in the background. We only have to wait for it when we don't know it yet.
+        if device_info := entry.data.get(CONF_DEVICE_INFO):
+            async_register_devices(hass, entry, bridge, device_info)
+
+            async def refresh_device_info() -> None:
+                """Refresh the cached device information."""
+                try:
+                    await async_refresh_device_info(hass, entry, bridge)
+                except (AioComfoConnectNotConnected, AioComfoConnectTimeout, ComfoConnectError) as err:
+                    _LOGGER.debug("Could not refresh the device information, keeping the cached information: %s", err)
+
+            entry.async_create_background_task(hass, refresh_device_info(), f"comfoconnect device info {bridge.uuid}")
+        else:
+            await async_refresh_device_info(hass, entry, bridge)
+
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    except BaseException as err:
+        # Don't leave the bridge connected and watched, the entry is set up from scratch when it's retried.
+        await manager.async_remove_bridge(entry.entry_id)
+        if isinstance(err, (AioComfoConnectNotConnected, AioComfoConnectTimeout, ComfoConnectError)):
+            raise ConfigEntryNotReady from err
+        raise
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    # The entities have requested their sensors while the platforms were set up, register them all at once.
+    await bridge.async_register_requested_sensors()
 
-    @callback
-    async def send_keepalive(now) -> None:
-        """Send keepalive to the bridge."""
-        _LOGGER.debug("Sending keepalive...")
-        try:
-            # Use cmd_time_request as a keepalive since cmd_keepalive doesn't send back a reply we can wait for
-            await bridge.cmd_time_request()
-            bridge.set_available(True)
+    # Until we know which options are installed, the entities of all options are created. Detect them once, the
+    # button can detect them again after an option was added or removed.
+    if CONF_INSTALLED_OPTIONS not in entry.data:
 
-        except (AioComfoConnectNotConnected, AioComfoConnectTimeout, AioComfoConnectNotReachable):
-            bridge.set_available(False)
-            # Reconnect when connection has been dropped
+        async def probe_installed_options() -> None:
+            """Detect the installed options."""
             try:
-                await bridge.connect(entry.data[CONF_LOCAL_UUID])
-                bridge.set_available(True)
-            except (AioComfoConnectTimeout, AioComfoConnectNotReachable):
-                _LOGGER.debug("Could not connect to the bridge. Retrying later...")
+                await async_refresh_installed_options(hass, entry, bridge)
+            except (AioComfoConnectNotConnected, AioComfoConnectTimeout, ComfoConnectError) as err:
+                _LOGGER.debug("Could not detect the installed options, trying again on the next start: %s", err)
 
-    entry.async_on_unload(async_track_time_interval(hass, send_keepalive, KEEP_ALIVE_INTERVAL))
+        entry.async_create_background_task(hass, probe_installed_options(), f"comfoconnect options {bridge.uuid}")
 
-    # Disconnect when shutting down
-    async def disconnect_bridge(event):
-        """Close connection to the bridge."""
-        await bridge.disconnect()
+    return True
 
-    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, disconnect_bridge))
 
-    return True
+@callback
+def async_update_host(hass: HomeAssistant, entry: ConfigEntry, host: str) -> None:
+    """Store the new address of the bridge, without reloading the entry."""
+    if entry.data[CONF_HOST] != host:
+        hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_HOST: host})
+
+
+async def async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options to the bridge."""
+    bridge = hass.data[DOMAIN].bridges[entry.entry_id]
+    bridge.keepalive_idle = entry.options.get(CONF_KEEPALIVE_IDLE, DEFAULT_KEEPALIVE_IDLE)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        bridge = hass.data[DOMAIN][entry.entry_id]
-        await bridge.disconnect()
-        hass.data[DOMAIN].pop(entry.entry_id)
+        bridge = await hass.data[DOMAIN].async_remove_bridge(entry.entry_id, DRAIN_TIMEOUT)
+        bridge.commands.async_cancel()
+        bridge.frame_writer.async_cancel()
+        await bridge.sensor_cache.async_save()
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cached sensor values of a config entry that is removed."""
+    await SensorValueCache(hass, entry.entry_id).async_remove()
+
+
+async def async_fetch_device_info(bridge: ComfoConnectBridge) -> dict[str, str]:
+    """Fetch the information about the bridge and the ventilation unit, concurrently."""
+    bridge_info, unit_model, unit_firmware, unit_name = await asyncio.gather(
+        bridge.cmd_version_request(),
+        bridge.get_property(PROPERTY_MODEL),
+        bridge.get_property(PROPERTY_FIRMWARE_VERSION),
+        bridge.get_property(PROPERTY_NAME),
+    )
+
+    return {
+        DEVICE_INFO_BRIDGE_SERIAL: bridge_info.serialNumber,
+        DEVICE_INFO_BRIDGE_VERSION: version_decode(bridge_info.gatewayVersion),
+        DEVICE_INFO_UNIT_MODEL: unit_model,
+        DEVICE_INFO_UNIT_FIRMWARE: version_decode(unit_firmware),
+        DEVICE_INFO_UNIT_NAME: unit_name,
+    }
+
+
+async def async_refresh_device_info(hass: HomeAssistant, entry: ConfigEntry, bridge: ComfoConnectBridge) -> None:
+    """Fetch the device information, and update the devices and the cache in the config entry when it changed."""
+    device_info = await async_fetch_device_info(bridge)
+    if device_info == entry.data.get(CONF_DEVICE_INFO):
+        return
+
+    async_register_devices(hass, entry, bridge, device_info)
+    hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_DEVICE_INFO: device_info})
+
+
+async def async_probe_installed_options(bridge: ComfoConnectBridge) -> list[str]:
+    """Return the options that are installed on the ventilation unit."""
+    # A ComfoCool is a node of its own on the bus, a ComfoFond is connected to the ventilation unit. The bridge
+    # announces the nodes one by one after we connected, so ask for all of them before we decide it isn't there.
+    nodes, ghe_present = await asyncio.gather(
+        bridge.async_request_nodes(NODE_SETTLE, OPTION_PROBE_TIMEOUT),
+        bridge.async_read_sensor(SENSORS[SENSOR_COMFOFOND_GHE_PRESENT], bridge.sensor_delay + OPTION_PROBE_TIMEOUT),
+    )
+
+    options = []
+    if any(node.product_id == ProductId.COMFOCOOL for node in nodes.values()):
+        options.append(OPTION_COMFOCOOL)
+    if ghe_present:
+        options.append(OPTION_COMFOFOND)
+    return options
+
+
+async def async_refresh_installed_options(hass: HomeAssistant, entry: ConfigEntry, bridge: ComfoConnectBridge) -> None:
+    """Detect the installed options, and reload the entry when that changes which entities we create."""
+    options = await async_probe_installed_options(bridge)
+    known = entry.data.get(CONF_INSTALLED_OPTIONS)
+    if options == known:
+        return
+
+    _LOGGER.info("Bridge %s has these options installed: %s", bridge.uuid, ", ".join(options) or "none")
+    hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_INSTALLED_OPTIONS: options})
+    # The entities of all options were created while we didn't know.
+    if known is not None or set(options) != set(OPTIONS):
+        hass.config_entries.async_schedule_reload(entry.entry_id)
+
+
+@callback
+def async_installed_descriptions(entry: ConfigEntry, descriptions: Iterable[_DescriptionT]) -> list[_DescriptionT]:
+    """
+    Return the entity descriptions of a platform that don't belong to an option, or to an installed one.
+
+    All of them are returned until we have detected the options. The entities of options that aren't installed are
+    left in the entity registry, so the user can remove them, and they come back as they were when the option does.
+    """
+    installed = entry.data.get(CONF_INSTALLED_OPTIONS)
+    if installed is None:
+        return list(descriptions)
+    return [description for description in descriptions if description.option is None or description.option in installed]
+
+
+@callback
+def async_register_devices(hass: HomeAssistant, entry: ConfigEntry, bridge: ComfoConnectBridge, device_info: dict[str, str]) -> None:
+    """Add the bridge and the ventilation unit to the device registry."""
+    device_registry = dr.async_get(hass)
+
+    # Add Bridge to device registry
+    device_registry.async_get_or_create(
+        config_entry_id=entry.entry_id,
+        identifiers={(DOMAIN, device_info[DEVICE_INFO_BRIDGE_SERIAL])},
+        manufacturer="Zehnder",
+        name=device_info[DEVICE_INFO_BRIDGE_SERIAL],
+        model="ComfoConnect LAN C",
+        sw_version=device_info[DEVICE_INFO_BRIDGE_VERSION],
+    )
+
+    # Add Ventilation Unit to device registry
+    device_registry.async_get_or_create(
+        config_entry_id=entry.entry_id,
+        identifiers={(DOMAIN, bridge.uuid)},
+        manufacturer="Zehnder",
+        name=device_info[DEVICE_INFO_UNIT_NAME],
+        model=device_info[DEVICE_INFO_UNIT_MODEL],
+        sw_version=device_info[DEVICE_INFO_UNIT_FIRMWARE],
+        via_device=(DOMAIN, device_info[DEVICE_INFO_BRIDGE_SERIAL]),
+    )
+
+
+@timed_commands
 class ComfoConnectBridge(ComfoConnect):
     """Representation of a ComfoConnect bridge."""
 
-    def __init__(self, hass: HomeAssistant, host: str, uuid: str):
+    def __init__(self, hass: HomeAssistant, host: str, uuid: str, sensor_cache: SensorValueCache):
         """Initialize the ComfoConnect bridge."""
         super().__init__(
             host,
@@ -194,7 +357,225 @@ class ComfoConnectBridge(ComfoConnect):
             self.alarm_callback,
         )
         self.hass = hass
-        self.is_available = True
+        self.sensor_cache = sensor_cache
+
+        # The entities are available when we are connected, see _set_state.
+        self.state = ConnectionState.DISCONNECTED
+        self.is_available = False
+        self._connected = asyncio.Event()
+        self._connect_task: asyncio.Task[None] | None = None
+        # Set when the bridge closed the connection, so the manager reconnects right away, see _reconnect_loop.
+        self.connection_lost = asyncio.Event()
+
+        # When we last received anything from the bridge, and how long the last keepalive took, in loop time.
+        self.last_seen: float | None = None
+        self.rtt: float | None = None
+        self.keepalive_idle: float = DEFAULT_KEEPALIVE_IDLE
+        self.metrics = BridgeMetrics()
+        # Requests are sent in order of priority, and the writes to a setting are debounced before they are queued.
+        self.scheduler = CommandScheduler(hass, self.async_wait_connected)
+        self.commands = CommandDebouncer(hass, self.scheduler)
+        # The entities write their state once per iteration of the loop, however many updates they got in it.
+        self.frame_writer = FrameWriter(hass.loop)
+        # The decoded sensors and settings that the entities show, see VentilationStateStore.
+        self.ventilation = VentilationStateStore(self)
+
+        # Entities that listen for updates of a sensor, by sensor id. These are kept as tuples, so a
+        # listener can unsubscribe while we are dispatching without copying the listeners for every update.
+        self._update_listeners: dict[int, tuple[Callable[[Any], None], ...]] = {}
+
+        # Sensors that are requested while the platforms are set up, so we can register them in one batch.
+        # This becomes None after that batch, and sensors that are requested later are registered right away.
+        self._requested_sensors: dict[int, Sensor] | None = {}
+        # How many entities requested every sensor, by sensor id, and the registrations that are being updated.
+        self._sensor_refs: dict[int, int] = {}
+        self._sensor_tasks: dict[int, asyncio.Task[None]] = {}
+        # The registrations that are in flight after a reconnect, by sensor id, see _async_resume_subscriptions.
+        self._resume_requests: dict[int, asyncio.Future[Any]] = {}
+        self._disconnected_at: float | None = None
+
+        # The active errors of every node that has any, by node id and error id. The bridge repeats the alarms of a
+        # node, so we also keep the error bits it last sent for every node, and drop a repeat before it's decoded.
+        self.alarms: dict[int, dict[int, str]] = {}
+        self._alarm_bits: dict[int, bytes] = {}
+        # Set whenever the bridge announces a node, see async_request_nodes.
+        self._node_announced = asyncio.Event()
+
+    async def _read(self):
+        """Read a message from the bridge, and remember when we did."""
+        try:
+            message = await super()._read()
+        except ComfoConnectError:
+            # The bridge answered with an error, but it did answer.
+            self.last_seen = self.hass.loop.time()
+            raise
+
+        self.last_seen = self.hass.loop.time()
+        return message
+
+    async def async_connect(self, local_uuid: str) -> None:
+        """Connect to the bridge, or wait for the connect that is already in progress."""
+        if self.state is ConnectionState.CONNECTED:
+            return
+
+        if self._connect_task is None:
+            # Move to connecting right away, so requests that are sent before the task starts already wait for it.
+            self._set_state(ConnectionState.CONNECTING)
+            self.connection_lost.clear()
+            self._connect_task = self.hass.async_create_task(self._async_connect(local_uuid), f"comfoconnect connect {self.uuid}")
+
+        # Shield the connect, so a caller that is cancelled doesn't cancel it for the others.
+        await asyncio.shield(self._connect_task)
+
+    async def _async_connect(self, local_uuid: str) -> None:
+        """Connect to the bridge."""
+        try:
+            await self.connect(local_uuid)
+        except BaseException:
+            self._set_state(ConnectionState.DISCONNECTED)
+            raise
+        finally:
+            self._connect_task = None
+
+        self._set_state(ConnectionState.CONNECTED)
+
+    async def async_disconnect(self, drain_timeout: float = 0) -> None:
+        """Disconnect from the bridge, after the requests in flight are answered or drain_timeout has passed."""
+        self._set_state(ConnectionState.DRAINING)
+        try:
+            if drain_timeout:
+                try:
+                    async with asyncio.timeout(drain_timeout):
+                        await self.scheduler.async_wait_idle()
+                except TimeoutError:
+                    _LOGGER.debug("Disconnecting from %s with %d requests in flight", self.uuid, self.scheduler.in_flight)
+            await self.disconnect()
+        finally:
+            self._set_state(ConnectionState.DISCONNECTED)
+
+    async def async_wait_connected(self) -> None:
+        """Wait until we are connected, when we are connecting."""
+        if self.state is ConnectionState.CONNECTED:
+            return
+        if self.state is not ConnectionState.CONNECTING:
+            raise AioComfoConnectNotConnected(f"Not connected to bridge ({self.state})")
+
+        try:
+            async with asyncio.timeout(CONNECTING_WAIT_TIMEOUT):
+                await self._connected.wait()
+        except TimeoutError as err:
+            raise AioComfoConnectNotConnected("Still connecting to bridge") from err
+
+    @callback
+    def _set_state(self, state: ConnectionState) -> None:
+        """Move to a new connection state, and make the entities available when we are connected."""
+        if self.state is state:
+            return
+
+        _LOGGER.debug("Bridge %s is %s", self.uuid, state)
+        self.state = state
+        if state is ConnectionState.CONNECTED:
+            self._connected.set()
+        else:
+            self._connected.clear()
+        self.set_available(state is ConnectionState.CONNECTED)
+
+    async def _reconnect_loop(self, uuid: str):
+        """
+        Connect and start a session once, and read messages until the connection is lost.
+
+        This replaces the loop of aiocomfoconnect, that connects again every few seconds on its own. The manager
+        reconnects instead, with its backoff and jitter and a cap on how many bridges connect at once.
+        """
+        try:
+            try:
+                # Open the socket, ComfoConnect.connect is what started us.
+                await Bridge.connect(self, uuid)
+                await self.cmd_start_session(True)
+
+                # Wait for the ventilation unit before we allow any RMI commands, since it isn't always node 1.
+                await self.cmd_node_request()
+                await self.wait_for_ventilation_node()
+
+                # The bridge sends invalid values right after a sensor is registered, so hold them for a while.
+                for sensor_id in self._sensors:
+                    self._hold_sensor(sensor_id)
+                # The bridge forgets the registrations with the session, so register the sensors again.
+                for sensor in self._sensors.values():
+                    await self.cmd_rpdo_request(sensor.id, sensor.type)
+            except Exception as err:
+                # ComfoConnect.connect waits for the session, and raises this to the caller unless it gave up already.
+                if not self._session_ready.done():
+                    self._session_ready.set_exception(err)
+                return
+
+            self._session_ready.set_result(True)
+            try:
+                await self._read_task
+            except Exception as err:
+                _LOGGER.debug("Lost the connection to %s: %s", self.uuid, err)
+        finally:
+            if self.is_connected():
+                await Bridge.disconnect(self)
+
+    async def _read_messages(self):
+        """Read messages until the connection is lost, and let the manager reconnect."""
+        try:
+            await super()._read_messages()
+        finally:
+            # The manager reconnects when we didn't close the connection ourselves.
+            if self.state is ConnectionState.CONNECTED:
+                self._disconnected_at = self.hass.loop.time()
+                self._set_state(ConnectionState.CONNECTING)
+                self.connection_lost.set()
+
+    async def wait_for_ventilation_node(self, timeout: float | None = None) -> int:
+        """Wait until the bridge has announced the ventilation unit, which means that we can send commands."""
+        node_id = await super().wait_for_ventilation_node(timeout)
+        if self.state is ConnectionState.CONNECTING:
+            if self._sensors:
+                # We reconnected, and _reconnect_loop registers all sensors again right after this.
+                self._async_resume_subscriptions()
+            else:
+                self._set_state(ConnectionState.CONNECTED)
+        return node_id
+
+    @callback
+    def _async_resume_subscriptions(self) -> None:
+        """Register all sensors again in one pipelined batch, and become connected when the bridge confirmed them all."""
+        _LOGGER.debug("Registering %d sensors again", len(self._sensors))
+        self._resume_requests = {}
+        for sensor in self._sensors.values():
+            self._resume_requests[sensor.id] = asyncio.ensure_future(super().cmd_rpdo_request(sensor.id, sensor.type))
+
+        batch = asyncio.gather(*self._resume_requests.values(), return_exceptions=True)
+        batch.add_done_callback(self._async_resumed)
+
+    @callback
+    def _async_resumed(self, batch: asyncio.Future[list[Any]]) -> None:
+        """Become connected when all sensors are registered again, or leave it to the manager to try again."""
+        if batch.cancelled() or any(isinstance(result, BaseException) for result in batch.result()):
+            return
+        if self.state is not ConnectionState.CONNECTING:
+            return
+
+        if self._disconnected_at is not None:
+            self.metrics.resume.record(self.hass.loop.time() - self._disconnected_at)
+            self._disconnected_at = None
+        self._set_state(ConnectionState.CONNECTED)
+
+    def cmd_rpdo_request(self, pdid: int, pdo_type: int = 1, zone: int = 1, timeout=None):
+        """Register a sensor, or hand out its registration when it's already in flight after a reconnect."""
+        # _reconnect_loop registers the sensors again one by one, waiting for every confirmation. We have sent them
+        # all at once, so it only waits for the ones we have sent, and the reconnect takes one round trip.
+        if timeout is None and (request := self._resume_requests.pop(pdid, None)) is not None:
+            return request
+        return super().cmd_rpdo_request(pdid, pdo_type, zone, timeout)
+
+    def cmd_start_session(self, take_over: bool = False):
+        """Start a session, and count it."""
+        self.metrics.sessions += 1
+        return super().cmd_start_session(take_over)
 
     @callback
     def set_available(self, available: bool) -> None:
@@ -205,19 +586,183 @@ class ComfoConnectBridge(ComfoConnect):
         _LOGGER.info("Bridge %s availability changed: %s", self.uuid, available)
         async_dispatcher_send(self.hass, SIGNAL_COMFOCONNECT_AVAILABILITY.format(self.uuid), available)
 
+    @callback
+    def async_subscribe_sensor(self, sensor_id: int, update_callback: Callable[[Any], None]) -> CALLBACK_TYPE:
+        """Call update_callback with every update of a sensor, and return a function to unsubscribe."""
+        self._update_listeners[sensor_id] = (*self._update_listeners.get(sensor_id, ()), update_callback)
+
+        @callback
+        def unsubscribe() -> None:
+            listeners = list(self._update_listeners.get(sensor_id, ()))
+            listeners.remove(update_callback)
+            if listeners:
+                self._update_listeners[sensor_id] = tuple(listeners)
+            else:
+                self._update_listeners.pop(sensor_id, None)
+
+        return unsubscribe
+
+    @callback
+    def async_request_sensor(self, sensor: Sensor) -> CALLBACK_TYPE:
+        """Request updates of a sensor from the bridge, and return a function to release the request."""
+        self._sensor_refs[sensor.id] = self._sensor_refs.get(sensor.id, 0) + 1
+        if self._requested_sensors is not None:
+            self._requested_sensors[sensor.id] = sensor
+        elif sensor.id not in self._sensors:
+            self._async_sync_sensor(sensor)
+
+        @callback
+        def release() -> None:
+            self._sensor_refs[sensor.id] -= 1
+            if self._sensor_refs[sensor.id]:
+                return
+
+            # Nothing listens for the sensor anymore, so the bridge can stop sending it.
+            del self._sensor_refs[sensor.id]
+            if self._requested_sensors is not None:
+                self._requested_sensors.pop(sensor.id, None)
+            else:
+                self._async_sync_sensor(sensor)
+
+        return release
+
+    @callback
+    def _async_sync_sensor(self, sensor: Sensor) -> None:
+        """Register or deregister a sensor, unless that is already in progress."""
+        if sensor.id not in self._sensor_tasks:
+            self._sensor_tasks[sensor.id] = self.hass.async_create_task(self._async_sync_sensor_task(sensor), f"comfoconnect sensor {sensor.id}")
+
+    async def _async_sync_sensor_task(self, sensor: Sensor) -> None:
+        """Register or deregister a sensor until the bridge matches the requests, which can change while we wait."""
+        try:
+            while (wanted := sensor.id in self._sensor_refs) != (sensor.id in self._sensors):
+                if wanted:
+                    await self.register_sensor(sensor)
+                else:
+                    await self._async_deregister_sensor(sensor)
+        except (AioComfoConnectNotConnected, AioComfoConnectTimeout, ComfoConnectError) as err:
+            # The sensor is registered again when we reconnect, so we don't need to retry here.
+            _LOGGER.warning("Could not update the registration of sensor %s (%d): %s", sensor.name, sensor.id, err)
+        finally:
+            del self._sensor_tasks[sensor.id]
+
+    async def _async_deregister_sensor(self, sensor: Sensor) -> None:
+        """Stop the updates of a sensor."""
+        _LOGGER.debug("Deregistering sensor %s (%d)", sensor.name, sensor.id)
+        try:
+            await self.deregister_sensor(sensor)
+        except AioComfoConnectNotConnected:
+            # The bridge forgets the registrations with the session, forget it so it isn't registered again.
+            self._sensors.pop(sensor.id, None)
+            self._sensors_values.pop(sensor.id, None)
+
+    async def async_register_requested_sensors(self) -> None:
+        """Register the sensors that were requested during setup, pipelined in one batch."""
+        sensors = [sensor for sensor in (self._requested_sensors or {}).values() if sensor.id not in self._sensors]
+        self._requested_sensors = None
+
+        _LOGGER.debug("Registering %d sensors", len(sensors))
+        results = await asyncio.gather(*(self.register_sensor(sensor) for sensor in sensors), return_exceptions=True)
+        for sensor, result in zip(sensors, results):
+            # The sensor is registered again when we reconnect, so we don't need to retry here.
+            if isinstance(result, Exception):
+                _LOGGER.warning("Could not register sensor %s (%d): %s", sensor.name, sensor.id, result)
+
+    async def async_read_sensor(self, sensor: Sensor, timeout: float) -> Any:
+        """Return the current value of a sensor, registering it until the bridge sends it when nothing else did."""
+        if sensor.id in self._sensors and (value := self.sensor_cache.get(sensor.id)) is not None:
+            return value
+
+        value_received: asyncio.Future[Any] = self.hass.loop.create_future()
+
+        @callback
+        def update_callback(value: Any) -> None:
+            if not value_received.done():
+                value_received.set_result(value)
+
+        unsubscribe = self.async_subscribe_sensor(sensor.id, update_callback)
+        release = self.async_request_sensor(sensor)
+        try:
+            async with asyncio.timeout(timeout):
+                return await value_received
+        except TimeoutError as err:
+            raise AioComfoConnectTimeout(f"The bridge didn't send sensor {sensor.name} ({sensor.id})") from err
+        finally:
+            unsubscribe()
+            release()
+
     @callback
     def sensor_callback(self, sensor: Sensor, value):
         """Notify listeners that we have received an update."""
-        dispatcher_send(
-            self.hass,
-            SIGNAL_COMFOCONNECT_UPDATE_RECEIVED.format(self.uuid, sensor.id),
-            value,
-        )
+        start = time.perf_counter()
+        pdo_updates = self.metrics.pdo_updates
+        pdo_updates[sensor.id] = pdo_updates.get(sensor.id, 0) + 1
+        self.sensor_cache.async_set(sensor.id, value)
+
+        # aiocomfoconnect reads from the bridge on our loop, so we can call the listeners directly.
+        for update_callback in self._update_listeners.get(sensor.id, ()):
+            try:
+                update_callback(value)
+            except Exception:
+                _LOGGER.exception("Error handling update for sensor %s (%d)", sensor.name, sensor.id)
+
+        self.metrics.dispatch.record(time.perf_counter() - start)
+
+    def _process_node_notification(self, msg) -> None:
+        """Keep track of the nodes on the bus, and wake up the callers that wait for the announcements."""
+        super()._process_node_notification(msg)
+        self._node_announced.set()
+
+    async def async_request_nodes(self, settle: float, timeout: float) -> dict[int, Node]:
+        """Ask the bridge to announce its nodes, and return them when it hasn't announced one for settle seconds."""
+        try:
+            async with asyncio.timeout(timeout):
+                self._node_announced.clear()
+                await self.scheduler.async_run(PRIORITY_BACKGROUND, self.cmd_node_request)
+                while True:
+                    try:
+                        async with asyncio.timeout(settle):
+                            await self._node_announced.wait()
+                    except TimeoutError:
+                        return self.nodes
+                    self._node_announced.clear()
+        except TimeoutError as err:
+            raise AioComfoConnectTimeout("The bridge kept announcing nodes") from err
+
+    def _alarm_callback(self, node_id: int, alarm) -> None:
+        """Decode an alarm, unless it has the same errors as the last alarm of the node."""
+        if self._alarm_bits.get(node_id) == alarm.errors:
+            return
+        self._alarm_bits[node_id] = alarm.errors
+        super()._alarm_callback(node_id, alarm)
 
     @callback
-    def alarm_callback(self, node_id, errors):
-        """Print alarm updates."""
-        message = f"Alarm received for Node {node_id}:\n"
-        for error_id, error in errors.items():
-            message += f"* {error_id}: {error}\n"
-        _LOGGER.warning(message)
+    def alarm_callback(self, node_id: int, errors: dict[int, str]) -> None:
+        """Fire an event for every error of a node that was raised or cleared, and notify the entities."""
+        active = self.alarms.get(node_id, {})
+        raised = errors.keys() - active.keys()
+        cleared = active.keys() - errors.keys()
+        if not raised and not cleared:
+            return
+
+        if errors:
+            self.alarms[node_id] = errors
+        else:
+            del self.alarms[node_id]
+
+        for error_id in sorted(raised):
+            _LOGGER.warning("Alarm raised on node %d: %s (%d)", node_id, errors[error_id], error_id)
+            self._async_fire_alarm(node_id, error_id, errors[error_id], True)
+        for error_id in sorted(cleared):
+            _LOGGER.info("Alarm cleared on node %d: %s (%d)", node_id, active[error_id], error_id)
+            self._async_fire_alarm(node_id, error_id, active[error_id], False)
+
+        async_dispatcher_send(self.hass, SIGNAL_COMFOCONNECT_ALARMS.format(self.uuid), node_id)
+
+    @callback
+    def _async_fire_alarm(self, node_id: int, error_id: int, message: str, active: bool) -> None:
+        """Fire an event for an error that was raised or cleared."""
+        self.hass.bus.async_fire(
+            EVENT_ALARM,
+            {CONF_UUID: self.uuid, ATTR_NODE_ID: node_id, ATTR_ERROR_ID: error_id, ATTR_MESSAGE: message, ATTR_ACTIVE: active},
+        )
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import logging
 from dataclasses import dataclass
 
@@ -16,6 +17,7 @@ from aiocomfoconnect.sensors import (
     Sensor as AioComfoConnectSensor,
 )
 from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
     BinarySensorEntity,
     BinarySensorEntityDescription,
 )
@@ -27,10 +29,13 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import (
     DOMAIN,
+    SIGNAL_COMFOCONNECT_ALARMS,
     SIGNAL_COMFOCONNECT_AVAILABILITY,
-    SIGNAL_COMFOCONNECT_UPDATE_RECEIVED,
     ComfoConnectBridge,
+    async_installed_descriptions,
 )
+from .const import ATTR_ERRORS, ATTR_STALE, OPTION_COMFOCOOL
+from .filters import Deadband
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -46,6 +51,9 @@ class ComfoconnectRequiredKeysMixin:
 class ComfoconnectBinarySensorEntityDescription(BinarySensorEntityDescription, ComfoconnectRequiredKeysMixin):
     """Describes ComfoConnect binary sensor entity."""
 
+    # The option of the ventilation unit that the sensor belongs to.
+    option: str | None = None
+
 
 SENSOR_TYPES = (
     ComfoconnectBinarySensorEntityDescription(
@@ -73,11 +81,15 @@ SENSOR_TYPES = (
         key=SENSOR_COMFOCOOL_STATE,
         name="ComfoCool state",
         ccb_sensor=SENSORS.get(SENSOR_COMFOCOOL_STATE),
+        option=OPTION_COMFOCOOL,
         entity_registry_enabled_default=False,
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
 )
 
+# The decoders of the sensor values, by sensor id. All sensors are on for any value but zero.
+SENSOR_DECODERS = {description.key: bool for description in SENSOR_TYPES}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -85,9 +97,24 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the ComfoConnect binary sensors."""
-    ccb = hass.data[DOMAIN][config_entry.entry_id]
+    ccb = hass.data[DOMAIN].bridges[config_entry.entry_id]
+
+    # Only create the sensors of the options that are installed.
+    descriptions = async_installed_descriptions(config_entry, SENSOR_TYPES)
+
+    sensors = [ComfoConnectBinarySensor(ccb=ccb, config_entry=config_entry, description=description) for description in descriptions]
+
+    # A problem sensor for every node we know of, and for the nodes that raise an alarm later.
+    node_ids = {*ccb.nodes, *ccb.alarms}
+    sensors += [ComfoConnectNodeProblemSensor(ccb, node_id) for node_id in sorted(node_ids)]
+
+    @callback
+    def async_add_node(node_id: int) -> None:
+        if node_id not in node_ids:
+            node_ids.add(node_id)
+            async_add_entities([ComfoConnectNodeProblemSensor(ccb, node_id)])
 
-    sensors = [ComfoConnectBinarySensor(ccb=ccb, config_entry=config_entry, description=description) for description in SENSOR_TYPES]
+    config_entry.async_on_unload(async_dispatcher_connect(hass, SIGNAL_COMFOCONNECT_ALARMS.format(ccb.uuid), async_add_node))
 
     async_add_entities(sensors, True)
 
@@ -108,6 +135,7 @@ class ComfoConnectBinarySensor(BinarySensorEntity):
         """Initialize the ComfoConnect sensor."""
         self._ccb = ccb
         self.entity_description = description
+        self._decode = SENSOR_DECODERS[description.key]
         self._attr_name = f"{description.name}"
         self._attr_unique_id = f"{self._ccb.uuid}-{description.key}"
         self._attr_available = ccb.is_available
@@ -115,20 +143,22 @@ class ComfoConnectBinarySensor(BinarySensorEntity):
             identifiers={(DOMAIN, self._ccb.uuid)},
         )
 
+        # Show the value we had before a restart, until the bridge sends a fresh one.
+        if (value := ccb.sensor_cache.get(description.key)) is not None:
+            self._attr_is_on = self._decode(value)
+            self._attr_extra_state_attributes = {ATTR_STALE: True}
+
     async def async_added_to_hass(self) -> None:
         """Register for sensor updates."""
+        self.async_on_remove(functools.partial(self._ccb.frame_writer.async_discard, self))
         _LOGGER.debug(
             "Registering for sensor %s (%d)",
             self.entity_description.name,
             self.entity_description.key,
         )
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass,
-                SIGNAL_COMFOCONNECT_UPDATE_RECEIVED.format(self._ccb.uuid, self.entity_description.key),
-                self._handle_update,
-            )
-        )
+        # Only write the state when it changes.
+        change_filter = Deadband(self.hass.loop, self._handle_update)
+        self.async_on_remove(self._ccb.async_subscribe_sensor(self.entity_description.key, change_filter.async_call))
         self.async_on_remove(
             async_dispatcher_connect(
                 self.hass,
@@ -136,13 +166,13 @@ class ComfoConnectBinarySensor(BinarySensorEntity):
                 self._handle_availability_update,
             )
         )
-        await self._ccb.register_sensor(self.entity_description.ccb_sensor)
+        self.async_on_remove(self._ccb.async_request_sensor(self.entity_description.ccb_sensor))
 
     @callback
     def _handle_availability_update(self, available: bool) -> None:
         """Handle bridge availability changes."""
         self._attr_available = available
-        self.async_write_ha_state()
+        self._ccb.frame_writer.async_schedule(self)
 
     @callback
     def _handle_update(self, value):
@@ -154,5 +184,65 @@ class ComfoConnectBinarySensor(BinarySensorEntity):
             value,
         )
 
-        self._attr_is_on = True if value else False
-        self.async_write_ha_state()
+        self._attr_is_on = self._decode(value)
+        self._attr_extra_state_attributes = None
+        self._ccb.frame_writer.async_schedule(self)
+
+
+class ComfoConnectNodeProblemSensor(BinarySensorEntity):
+    """Representation of the alarms of a node, which is on while the node has an active error."""
+
+    _attr_should_poll = False
+    _attr_has_entity_name = True
+    _attr_device_class = BinarySensorDeviceClass.PROBLEM
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, ccb: ComfoConnectBridge, node_id: int) -> None:
+        """Initialize the ComfoConnect problem sensor."""
+        self._ccb = ccb
+        self._node_id = node_id
+        self._attr_name = f"Node {node_id} problem"
+        self._attr_unique_id = f"{self._ccb.uuid}-alarm-{node_id}"
+        self._attr_available = ccb.is_available
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, self._ccb.uuid)},
+        )
+        self._update_errors()
+
+    async def async_added_to_hass(self) -> None:
+        """Register for alarm updates."""
+        self.async_on_remove(functools.partial(self._ccb.frame_writer.async_discard, self))
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_COMFOCONNECT_ALARMS.format(self._ccb.uuid),
+                self._handle_alarms_update,
+            )
+        )
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_COMFOCONNECT_AVAILABILITY.format(self._ccb.uuid),
+                self._handle_availability_update,
+            )
+        )
+
+    @callback
+    def _handle_availability_update(self, available: bool) -> None:
+        """Handle bridge availability changes."""
+        self._attr_available = available
+        self._ccb.frame_writer.async_schedule(self)
+
+    @callback
+    def _handle_alarms_update(self, node_id: int) -> None:
+        """Handle a change of the active errors of a node."""
+        if node_id != self._node_id:
+            return
+        self._update_errors()
+        self._ccb.frame_writer.async_schedule(self)
+
+    def _update_errors(self) -> None:
+        """Set the state from the active errors of the node."""
+        errors = self._ccb.alarms.get(self._node_id, {})
+        self._attr_is_on = bool(errors)
+        self._attr_extra_state_attributes = {ATTR_ERRORS: list(errors.values())}
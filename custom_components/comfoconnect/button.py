@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import logging
 from collections.abc import Awaitable, Coroutine
 from dataclasses import dataclass
@@ -14,7 +15,8 @@ from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from . import DOMAIN, SIGNAL_COMFOCONNECT_AVAILABILITY, ComfoConnectBridge
+from . import DOMAIN, SIGNAL_COMFOCONNECT_AVAILABILITY, ComfoConnectBridge, async_refresh_installed_options
+from .commands import PRIORITY_INTERACTIVE
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -40,6 +42,14 @@ BUTTON_TYPES = (
     ),
 )
 
+# Detects the installed options again, after a ComfoCool or ComfoFond was added or removed.
+PROBE_OPTIONS_BUTTON = ButtonEntityDescription(
+    key="probe_options",
+    name="Detect options",
+    icon="mdi:magnify-scan",
+    entity_category=EntityCategory.DIAGNOSTIC,
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -47,9 +57,10 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the ComfoConnect binary sensors."""
-    ccb = hass.data[DOMAIN][config_entry.entry_id]
+    ccb = hass.data[DOMAIN].bridges[config_entry.entry_id]
 
     sensors = [ComfoConnectButton(ccb=ccb, config_entry=config_entry, description=description) for description in BUTTON_TYPES]
+    sensors.append(ComfoConnectProbeOptionsButton(ccb=ccb, config_entry=config_entry, description=PROBE_OPTIONS_BUTTON))
 
     async_add_entities(sensors, True)
 
@@ -68,6 +79,7 @@ class ComfoConnectButton(ButtonEntity):
     ) -> None:
         """Initialize the ComfoConnect sensor."""
         self._ccb = ccb
+        self._config_entry = config_entry
         self.entity_description = description
         self._attr_name = f"{description.name}"
         self._attr_unique_id = f"{self._ccb.uuid}-{description.key}"
@@ -78,6 +90,7 @@ class ComfoConnectButton(ButtonEntity):
 
     async def async_added_to_hass(self) -> None:
         """Register for availability updates."""
+        self.async_on_remove(functools.partial(self._ccb.frame_writer.async_discard, self))
         self.async_on_remove(
             async_dispatcher_connect(
                 self.hass,
@@ -90,8 +103,16 @@ class ComfoConnectButton(ButtonEntity):
     def _handle_availability_update(self, available: bool) -> None:
         """Handle bridge availability changes."""
         self._attr_available = available
-        self.async_write_ha_state()
+        self._ccb.frame_writer.async_schedule(self)
+
+    async def async_press(self) -> None:
+        """Press the button."""
+        await self._ccb.scheduler.async_run(PRIORITY_INTERACTIVE, lambda: self.entity_description.press_fn(self._ccb, self._attr_unique_id))
+
+
+class ComfoConnectProbeOptionsButton(ComfoConnectButton):
+    """A button that detects the installed options again, and reloads the entry when they changed."""
 
     async def async_press(self) -> None:
         """Press the button."""
-        await self.entity_description.press_fn(self._ccb, self._attr_unique_id)
+        await async_refresh_installed_options(self.hass, self._config_entry, self._ccb)
@@ -0,0 +1,60 @@
+"""Cache of the last known sensor values for the ComfoConnect integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+
+# Sensors update every few seconds, so we write the cache at most once per this many seconds.
+SAVE_DELAY = 60
+
+
+class SensorValueCache:
+    """The last value that the bridge sent for every sensor, kept in storage so entities have a state right after a restart."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._values: dict[int, Any] = {}
+        self._save_pending = False
+
+    async def async_load(self) -> None:
+        """Load the values from storage."""
+        if data := await self._store.async_load():
+            # JSON only has string keys
+            self._values = {int(sensor_id): value for sensor_id, value in data["values"].items()}
+
+    def get(self, sensor_id: int) -> Any:
+        """Return the last known value of a sensor, or None when we don't know it."""
+        return self._values.get(sensor_id)
+
+    @callback
+    def async_set(self, sensor_id: int, value: Any) -> None:
+        """Remember the value of a sensor, and schedule a write to storage."""
+        self._values[sensor_id] = value
+
+        # Store.async_delay_save postpones the write every time it's called, so only call it once per write.
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Write a pending change to storage now."""
+        if self._save_pending:
+            await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Remove the cache from storage."""
+        await self._store.async_remove()
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to write to storage."""
+        self._save_pending = False
+        return {"values": {str(sensor_id): value for sensor_id, value in self._values.items()}}
@@ -0,0 +1,197 @@
+"""Scheduling and debouncing of the commands that we send to a ComfoConnect bridge."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiocomfoconnect.exceptions import AioComfoConnectTimeout
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+# How long we wait for the next write to a setting that is being changed quickly, before we send the last one.
+COMMAND_DEBOUNCE_DELAY = 0.25
+
+# The settings that more than one entity can change.
+COMMAND_SPEED = "speed"
+COMMAND_MODE = "mode"
+
+# The priority classes of the scheduler, the lowest number goes first. Keepalives go before the background reads, so
+# a busy bridge isn't mistaken for a bridge that is gone.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_KEEPALIVE = 1
+PRIORITY_BACKGROUND = 2
+
+# How many requests we send to a bridge before we wait for an answer.
+MAX_IN_FLIGHT = 4
+
+
+class CommandExpired(AioComfoConnectTimeout):
+    """A request waited in the queue until its deadline had passed, and was never sent."""
+
+
+class CommandScheduler:
+    """
+    Send the requests to a bridge in order of priority, with a bounded number in flight.
+
+    A request is sent right away when there is room in the window and nothing is waiting. Otherwise it waits in the
+    queue until a request in flight is answered, and the waiting request with the highest priority is sent, the
+    oldest first within the same priority. A request whose deadline has passed by then is dropped with CommandExpired,
+    since its answer would arrive too late to be useful.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        wait_ready: Callable[[], Awaitable[None]] | None = None,
+        max_in_flight: int = MAX_IN_FLIGHT,
+    ) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self.in_flight = 0
+        self._wait_ready = wait_ready
+        self._max_in_flight = max_in_flight
+        self._queue: list[tuple[int, int, float | None, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    async def async_run(self, priority: int, command: Callable[[], Awaitable[Any]], deadline: float | None = None) -> Any:
+        """Send a request when it's its turn, and return its answer. The deadline is in loop time."""
+        # Hold the request back until the bridge can take it, when we are still connecting.
+        if self._wait_ready is not None:
+            await self._wait_ready()
+
+        if self.in_flight < self._max_in_flight and not self._queue:
+            self.in_flight += 1
+            self._idle.clear()
+        else:
+            turn = self.hass.loop.create_future()
+            heapq.heappush(self._queue, (priority, next(self._sequence), deadline, turn))
+            try:
+                await turn
+            except asyncio.CancelledError:
+                # Give the slot to the next request, when we got it just before we were cancelled.
+                if turn.done() and not turn.cancelled():
+                    self._async_release()
+                raise
+
+        try:
+            return await command()
+        finally:
+            self._async_release()
+
+    async def async_wait_idle(self) -> None:
+        """Wait until no requests are in flight."""
+        await self._idle.wait()
+
+    @callback
+    def _async_release(self) -> None:
+        """Free a slot in the window, and hand it to the next request that is still worth sending."""
+        self.in_flight -= 1
+        now = self.hass.loop.time()
+        while self._queue and self.in_flight < self._max_in_flight:
+            _, _, deadline, turn = heapq.heappop(self._queue)
+            if turn.done():
+                continue
+            if deadline is not None and now > deadline:
+                _LOGGER.debug("Dropping a request that waited %.1f seconds past its deadline", now - deadline)
+                turn.set_exception(CommandExpired("The request waited too long to be sent"))
+                continue
+            self.in_flight += 1
+            turn.set_result(None)
+
+        if not self.in_flight:
+            self._idle.set()
+
+
+class _PendingCommand:
+    """The state of the writes to one setting."""
+
+    __slots__ = ("command", "future", "task", "timer")
+
+    def __init__(self) -> None:
+        """Initialize the state."""
+        self.command: Callable[[], Awaitable[Any]] | None = None
+        self.future: asyncio.Future[Any] | None = None
+        self.task: asyncio.Task[None] | None = None
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class CommandDebouncer:
+    """
+    Collapse rapid writes to the same setting into one command with the latest value.
+
+    A write to a setting that is idle is sent right away, so a single click isn't delayed. A write that arrives while
+    a command for the same setting is in flight or waiting cancels that command, and is sent when no other write
+    arrived for the debounce delay. Every caller waits for the command that was eventually sent, and gets its result,
+    or its error. When a scheduler is given, the commands are sent with interactive priority.
+    """
+
+    def __init__(self, hass: HomeAssistant, scheduler: CommandScheduler | None = None, delay: float = COMMAND_DEBOUNCE_DELAY) -> None:
+        """Initialize the debouncer."""
+        self.hass = hass
+        self._scheduler = scheduler
+        self._delay = delay
+        self._pending: dict[str, _PendingCommand] = {}
+
+    async def async_call(self, key: str, command: Callable[[], Awaitable[Any]]) -> Any:
+        """Write a setting, and return the result of the command that was sent for the last write."""
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _PendingCommand()
+            pending.future = self.hass.loop.create_future()
+            pending.command = command
+            self._async_send(key)
+        else:
+            pending.command = command
+            if pending.task is not None:
+                _LOGGER.debug("Cancelling the superseded command for %s", key)
+                pending.task.cancel()
+                pending.task = None
+            if pending.timer is not None:
+                pending.timer.cancel()
+            pending.timer = self.hass.loop.call_later(self._delay, self._async_send, key)
+
+        # Shield the shared result, so a caller that is cancelled doesn't cancel it for the others.
+        return await asyncio.shield(pending.future)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel all commands, and the callers that wait for them."""
+        for pending in self._pending.values():
+            if pending.timer is not None:
+                pending.timer.cancel()
+            if pending.task is not None:
+                pending.task.cancel()
+            pending.future.cancel()
+        self._pending.clear()
+
+    @callback
+    def _async_send(self, key: str) -> None:
+        """Send the latest write of a setting."""
+        pending = self._pending[key]
+        pending.timer = None
+        pending.task = self.hass.async_create_task(self._async_run(key, pending, pending.command), f"comfoconnect command {key}")
+
+    async def _async_run(self, key: str, pending: _PendingCommand, command: Callable[[], Awaitable[Any]]) -> None:
+        """Run a command, and pass its result to the callers, unless it's superseded."""
+        try:
+            if self._scheduler is not None:
+                result = await self._scheduler.async_run(PRIORITY_INTERACTIVE, command)
+            else:
+                result = await command()
+        except asyncio.CancelledError:
+            # A newer write superseded the command, the callers wait for that one.
+            return
+        except Exception as err:
+            pending.future.set_exception(err)
+        else:
+            pending.future.set_result(result)
+
+        del self._pending[key]
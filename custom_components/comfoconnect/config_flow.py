@@ -5,18 +5,18 @@ from __future__ import annotations
 import logging
 from typing import Any
 
-import aiocomfoconnect
 import voluptuous as vol
 from aiocomfoconnect import Bridge
 from aiocomfoconnect.exceptions import ComfoConnectNotAllowed
 from homeassistant import config_entries
-from homeassistant.components import network
-from homeassistant.const import CONF_HOST, CONF_PIN
+from homeassistant.const import CONF_HOST, CONF_PIN, CONF_SCAN_INTERVAL
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.util.uuid import random_uuid_hex
 
-from .const import CONF_LOCAL_UUID, CONF_UUID, DOMAIN
+from .const import CONF_KEEPALIVE_IDLE, CONF_LOCAL_UUID, CONF_UUID, DEFAULT_KEEPALIVE_IDLE, DEFAULT_SCAN_INTERVAL, DOMAIN
+from .manager import async_get_manager
 
 DEFAULT_PIN = "0000"
 COMFOCONNECT_MANUAL_BRIDGE_ID = "manual"
@@ -34,6 +34,12 @@ class ComfoConnectConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self.local_uuid: str | None = None
         self.discovered_bridges: dict[str, Bridge] | None = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> ComfoConnectOptionsFlow:
+        """Get the options flow for this handler."""
+        return ComfoConnectOptionsFlow()
+
     async def async_step_import(self, import_config: ConfigType | None) -> FlowResult:
         """Import a config entry from configuration.yaml."""
         self.local_uuid = import_config.get("token")
@@ -43,8 +49,10 @@ class ComfoConnectConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Handle a flow reauth."""
         # Discover the bridge so we know which type it is, since a ComfoConnect Pro needs to be
         # registered differently than a LAN C. Fall back to the stored data when it doesn't answer.
-        bridges = await aiocomfoconnect.discover_bridges(user_input[CONF_HOST])
-        discovered_bridge = next((bridge for bridge in bridges if bridge.uuid == user_input[CONF_UUID]), None)
+        discovery = async_get_manager(self.hass).discovery
+        if (discovered_bridge := discovery.async_get(user_input[CONF_UUID])) is None:
+            bridges = await discovery.async_probe(user_input[CONF_HOST])
+            discovered_bridge = next((bridge for bridge in bridges if bridge.uuid == user_input[CONF_UUID]), None)
         self.bridge = discovered_bridge or Bridge(user_input[CONF_HOST], user_input[CONF_UUID])
         self.local_uuid = user_input[CONF_LOCAL_UUID]
 
@@ -68,10 +76,17 @@ class ComfoConnectConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
                 return await self._register()
 
-        # Find bridges on the networks that Home Assistant is configured to use, and filter out the ones we already have configured
-        broadcast_addresses = await network.async_get_ipv4_broadcast_addresses(self.hass)
-        bridges = await aiocomfoconnect.discover_bridges(broadcast_addresses=broadcast_addresses)
-        self.discovered_bridges = {bridge.uuid: bridge for bridge in bridges if bridge.uuid not in self._async_current_ids(False)}
+        # Find bridges on the networks that Home Assistant is configured to use, and filter out the ones we already have configured.
+        # Show the new bridges that answered recently right away, and look for more in the background for the next time. When
+        # the bridges that answered recently are all configured, wait for the broadcast, since the user is adding a new one.
+        discovery = async_get_manager(self.hass).discovery
+        configured = self._async_current_ids(False)
+        self.discovered_bridges = {bridge.uuid: bridge for bridge in discovery.async_bridges() if bridge.uuid not in configured}
+        if self.discovered_bridges:
+            self.hass.async_create_task(discovery.async_discover(), "comfoconnect discovery refresh")
+        else:
+            bridges = await discovery.async_discover(settle=True)
+            self.discovered_bridges = {bridge.uuid: bridge for bridge in bridges if bridge.uuid not in configured}
 
         # Show the bridge selection form
         return self.async_show_form(
@@ -93,7 +108,7 @@ class ComfoConnectConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors = {}
         if user_input is not None and user_input[CONF_HOST] is not None:
             # We need to discover the bridge to get its UUID
-            bridges = await aiocomfoconnect.discover_bridges(user_input[CONF_HOST])
+            bridges = await async_get_manager(self.hass).discovery.async_probe(user_input[CONF_HOST])
             if len(bridges) == 0:
                 # Could not discover the bridge
                 errors = {"base": "invalid_host"}
@@ -170,3 +185,28 @@ class ComfoConnectConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 }
             ),
         )
+
+
+class ComfoConnectOptionsFlow(config_entries.OptionsFlow):
+    """Handle the ComfoConnect options."""
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_SCAN_INTERVAL,
+                        default=self.config_entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+                    vol.Required(
+                        CONF_KEEPALIVE_IDLE,
+                        default=self.config_entry.options.get(CONF_KEEPALIVE_IDLE, DEFAULT_KEEPALIVE_IDLE),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5, max=600)),
+                }
+            ),
+        )
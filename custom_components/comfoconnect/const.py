@@ -1,6 +1,61 @@
 """Constants for the ComfoConnect integration."""
 
+from enum import StrEnum
+
 DOMAIN = "comfoconnect"
 
 CONF_LOCAL_UUID = "local_uuid"
 CONF_UUID = "uuid"
+
+# How often we read the settings that the bridge doesn't push, in seconds. This can be changed in the options.
+DEFAULT_SCAN_INTERVAL = 30
+
+# We only send a keepalive when we didn't receive anything from the bridge for this many seconds. This can be
+# changed in the options.
+CONF_KEEPALIVE_IDLE = "keepalive_idle"
+DEFAULT_KEEPALIVE_IDLE = 30
+
+# Set on entities that show the value we cached before a restart, until the bridge sends a fresh one.
+ATTR_STALE = "stale"
+
+# Set on downsampled sensors, whose state is the mean of the values in the last window.
+ATTR_MIN = "min"
+ATTR_MAX = "max"
+ATTR_LAST = "last"
+ATTR_SAMPLES = "samples"
+
+# Fired when an error of a node is raised or cleared, with the uuid of the bridge and these attributes.
+EVENT_ALARM = "comfoconnect_alarm"
+ATTR_NODE_ID = "node_id"
+ATTR_ERROR_ID = "error_id"
+ATTR_MESSAGE = "message"
+ATTR_ACTIVE = "active"
+
+# Set on the alarm entities, with the messages of the active errors.
+ATTR_ERRORS = "errors"
+
+# The information about the bridge and the ventilation unit, cached in the config entry so we can register
+# the devices on the next start without waiting for the bridge.
+CONF_DEVICE_INFO = "device_info"
+DEVICE_INFO_BRIDGE_SERIAL = "bridge_serial"
+DEVICE_INFO_BRIDGE_VERSION = "bridge_version"
+DEVICE_INFO_UNIT_MODEL = "unit_model"
+DEVICE_INFO_UNIT_FIRMWARE = "unit_firmware"
+DEVICE_INFO_UNIT_NAME = "unit_name"
+
+# The options of the ventilation unit that have their own entities. We detect which ones are installed and cache that
+# in the config entry, so we only create the entities of installed options.
+CONF_INSTALLED_OPTIONS = "installed_options"
+OPTION_COMFOCOOL = "comfocool"
+OPTION_COMFOFOND = "comfofond"
+OPTIONS = (OPTION_COMFOCOOL, OPTION_COMFOFOND)
+
+
+class ConnectionState(StrEnum):
+    """The state of the connection with a bridge."""
+
+    DISCONNECTED = "disconnected"
+    CONNECTING = "connecting"
+    CONNECTED = "connected"
+    # We are closing the connection, after the requests in flight are answered.
+    DRAINING = "draining"
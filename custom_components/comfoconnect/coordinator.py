@@ -0,0 +1,82 @@
+"""Coordinator for the settings of the ComfoConnect integration that the bridge doesn't push."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from typing import Any
+
+from aiocomfoconnect.exceptions import (
+    AioComfoConnectNotConnected,
+    AioComfoConnectTimeout,
+    ComfoConnectError,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_SCAN_INTERVAL
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from . import ComfoConnectBridge
+from .commands import PRIORITY_BACKGROUND
+from .const import DEFAULT_SCAN_INTERVAL, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ComfoConnectSettingsCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+    """
+    Read all the settings that the bridge doesn't push on one interval, and pass them to the entities.
+
+    The settings are entries of the schedule of the ventilation unit, and every entry takes a request of its own. The
+    bridge can read several properties of a unit in one request, but there is no such request for schedule entries,
+    so the requests are pipelined instead, and the traffic grows with the settings we show, not with the entities.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        ccb: ComfoConnectBridge,
+        config_entry: ConfigEntry,
+        readers: dict[str, Callable[[ComfoConnectBridge], Awaitable[Any]]],
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN} settings {ccb.uuid}",
+            update_interval=scan_interval(config_entry),
+        )
+        self._ccb = ccb
+        self._readers = readers
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        """Read the settings in the background, dropping the reads that are still queued when the next update is due."""
+        # One request per setting, sent at the same time, so a read takes one round trip.
+        deadline = self.hass.loop.time() + self.update_interval.total_seconds()
+        scheduler = self._ccb.scheduler
+        try:
+            values = await asyncio.gather(
+                *(scheduler.async_run(PRIORITY_BACKGROUND, functools.partial(reader, self._ccb), deadline) for reader in self._readers.values())
+            )
+        except (AioComfoConnectNotConnected, AioComfoConnectTimeout, ComfoConnectError) as err:
+            raise UpdateFailed(f"Could not read the settings from the bridge: {err}") from err
+
+        return dict(zip(self._readers, values))
+
+    @callback
+    def async_availability_changed(self, available: bool) -> None:
+        """Read the settings again when the bridge is back, since they may have changed while we were away."""
+        if available:
+            self.hass.async_create_task(self.async_request_refresh(), f"{self.name} refresh")
+
+    async def async_options_updated(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+        """Apply a changed scan interval."""
+        self.update_interval = scan_interval(config_entry)
+
+
+def scan_interval(config_entry: ConfigEntry) -> timedelta:
+    """Return how often the settings are read."""
+    return timedelta(seconds=config_entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL))
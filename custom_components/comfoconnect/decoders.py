@@ -0,0 +1,20 @@
+"""Decoding of raw sensor values into entity states, with lookup tables that the platforms compile once at import."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from typing import Any, TypeVar
+
+_T = TypeVar("_T")
+
+
+def compile_lookup(table: Mapping[Any, _T], default: _T | None = None) -> Callable[[Any], _T | None]:
+    """
+    Return a decoder that looks a raw value up in the table, and returns the default for values that aren't in it.
+
+    The decoder is the bound get of a private copy of the table, so decoding a value doesn't allocate anything.
+    """
+    get = dict(table).get
+    if default is None:
+        return get
+    return lambda value: get(value, default)
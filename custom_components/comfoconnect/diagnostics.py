@@ -0,0 +1,42 @@
+"""Diagnostics support for the ComfoConnect integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_LOCAL_UUID, CONF_UUID, DEVICE_INFO_BRIDGE_SERIAL, DOMAIN
+
+# The local uuid is what the bridge knows us by, so it's as good as a password. The uuid and the serial number of
+# the bridge identify the device, in the data and in the cached device information.
+TO_REDACT = {CONF_HOST, CONF_LOCAL_UUID, CONF_UUID, DEVICE_INFO_BRIDGE_SERIAL}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return the diagnostics of a config entry."""
+    bridge = hass.data[DOMAIN].bridges[entry.entry_id]
+    now = hass.loop.time()
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "bridge": {
+            "state": bridge.state,
+            "available": bridge.is_available,
+            "connected": bridge.is_connected(),
+            "ventilation_node_id": bridge.ventilation_node_id,
+            "last_seen_s": round(now - bridge.last_seen, 3) if bridge.last_seen is not None else None,
+            "rtt_ms": round(bridge.rtt * 1000, 3) if bridge.rtt is not None else None,
+            "keepalive_idle_s": bridge.keepalive_idle,
+            "state_writes": bridge.frame_writer.writes,
+            "state_write_frames": bridge.frame_writer.frames,
+        },
+        "alarms": bridge.alarms,
+        "metrics": bridge.metrics.as_dict(),
+    }
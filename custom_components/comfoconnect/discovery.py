@@ -0,0 +1,264 @@
+"""Discovery of ComfoConnect bridges, shared by the config flow and all config entries."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from aiocomfoconnect import Bridge, discover_bridges
+from aiocomfoconnect.protobuf import zehnder_pb2
+from google.protobuf.message import DecodeError
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+# How long we trust that a bridge is at the address it answered from, in seconds.
+DISCOVERY_TTL = 300
+
+# How long a broadcast waits for answers, and how long it waits for more once a bridge has answered, when the caller
+# wants the bridges as soon as possible. Bridges on the same network answer within milliseconds of each other.
+DISCOVERY_TIMEOUT = 1
+DISCOVERY_SETTLE = 0.2
+
+# The discovery request, which every bridge answers.
+DISCOVERY_REQUEST = b"\x0a\x00"
+
+# Where a broadcast goes when the network integration isn't set up, which is the network of the default route.
+LIMITED_BROADCAST = "255.255.255.255"
+
+# How many addresses we remember per bridge, and how long a unicast request waits for the answer.
+MAX_RECENT_HOSTS = 4
+UNICAST_PROBE_TIMEOUT = 1
+
+
+class _StreamingDiscoveryProtocol(asyncio.DatagramProtocol):
+    """A discovery request that passes every bridge on as soon as it answers, and all of them after the timeout."""
+
+    def __init__(self, on_bridge: Callable[[Bridge], None], timeout: float, broadcast_addresses: Iterable[Any]) -> None:
+        """Initialize the protocol."""
+        loop = asyncio.get_running_loop()
+        self._on_bridge = on_bridge
+        # Home Assistant hands out the addresses as ipaddress objects.
+        self._targets = [str(address) for address in broadcast_addresses]
+        self._bridges: dict[str, Bridge] = {}
+        self.finished: asyncio.Future[list[Bridge]] = loop.create_future()
+        self._timeout = loop.call_later(timeout, self._finish)
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        """Send the discovery request to every network."""
+        for target in self._targets:
+            transport.sendto(DISCOVERY_REQUEST, (target, Bridge.PORT))
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        """Pass on a bridge that answered for the first time."""
+        # We receive our own broadcast as well.
+        if self.finished.done() or data == DISCOVERY_REQUEST:
+            return
+
+        operation = zehnder_pb2.DiscoveryOperation()
+        try:
+            operation.ParseFromString(data)
+        except DecodeError:
+            _LOGGER.debug("Ignoring an invalid discovery answer from %s", addr[0])
+            return
+
+        # A bridge answers the request on every network it's on.
+        response = operation.searchGatewayResponse
+        if (uuid := response.uuid.hex()) in self._bridges:
+            return
+        bridge = self._bridges[uuid] = Bridge(host=response.ipaddress, uuid=uuid, bridge_type=response.type)
+        self._on_bridge(bridge)
+
+    def error_received(self, exc: Exception) -> None:
+        """Keep listening when the request couldn't be sent to one of the networks."""
+        _LOGGER.debug("Error while discovering bridges: %s", exc)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        """Return the bridges that answered when the socket is closed."""
+        self._finish()
+
+    def _finish(self) -> None:
+        """Return the bridges that answered."""
+        self._timeout.cancel()
+        if not self.finished.done():
+            self.finished.set_result(list(self._bridges.values()))
+
+
+async def async_stream_bridges(
+    broadcast_addresses: Iterable[Any],
+    on_bridge: Callable[[Bridge], None],
+    timeout: float = DISCOVERY_TIMEOUT,
+) -> list[Bridge]:
+    """Broadcast a discovery request, call on_bridge for every bridge as it answers, and return all of them after the timeout."""
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: _StreamingDiscoveryProtocol(on_bridge, timeout, broadcast_addresses),
+        local_addr=("0.0.0.0", 0),
+        allow_broadcast=True,
+    )
+    try:
+        return await protocol.finished
+    finally:
+        transport.close()
+
+
+class _Sweep:
+    """A broadcast that is in progress, and the bridges that have answered it so far."""
+
+    __slots__ = ("task", "bridges", "settled", "settle_timer")
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the sweep."""
+        self.task: asyncio.Task[list[Bridge]] | None = None
+        self.bridges: list[Bridge] = []
+        self.settled: asyncio.Future[None] = hass.loop.create_future()
+        self.settle_timer: asyncio.TimerHandle | None = None
+
+    @callback
+    def async_settle(self) -> None:
+        """Let the callers that don't want to wait for the whole timeout have the bridges that answered."""
+        if self.settle_timer is not None:
+            self.settle_timer.cancel()
+            self.settle_timer = None
+        if not self.settled.done():
+            self.settled.set_result(None)
+
+
+class BridgeDiscovery:
+    """
+    Find the bridges on the network, and remember where they were.
+
+    Every bridge that answers is cached by uuid for a while, so the config flow and the entries that look for their
+    bridge don't have to wait for a broadcast again, together with the last few addresses it had, which are asked
+    first when a bridge has moved. Broadcasts are shared, so callers that discover at the same time cause one sweep.
+    """
+
+    def __init__(self, hass: HomeAssistant, ttl: float = DISCOVERY_TTL) -> None:
+        """Initialize the discovery."""
+        self.hass = hass
+        self._ttl = ttl
+        # The bridges that answered, with the loop time they last did, by uuid.
+        self._bridges: dict[str, tuple[Bridge, float]] = {}
+        # The addresses we have seen every bridge at, the most recent first, by uuid.
+        self._hosts: dict[str, list[str]] = {}
+        self._sweep: _Sweep | None = None
+        # Whether we warned that a sweep only reaches the network of the default route.
+        self._warned_limited_broadcast = False
+
+    @callback
+    def async_get(self, uuid: str) -> Bridge | None:
+        """Return a bridge that answered recently, or None."""
+        if (cached := self._bridges.get(uuid)) is None or self.hass.loop.time() - cached[1] > self._ttl:
+            return None
+        return cached[0]
+
+    @callback
+    def async_bridges(self) -> list[Bridge]:
+        """Return the bridges that answered recently."""
+        deadline = self.hass.loop.time() - self._ttl
+        return [bridge for bridge, seen_at in self._bridges.values() if seen_at >= deadline]
+
+    @callback
+    def async_remember_host(self, uuid: str, host: str) -> None:
+        """Remember that a bridge was at an address."""
+        hosts = self._hosts.setdefault(uuid, [])
+        if host in hosts:
+            hosts.remove(host)
+        hosts.insert(0, host)
+        del hosts[MAX_RECENT_HOSTS:]
+
+    @callback
+    def _async_found(self, bridge: Bridge) -> None:
+        """Cache a bridge that answered."""
+        self._bridges[bridge.uuid] = (bridge, self.hass.loop.time())
+        self.async_remember_host(bridge.uuid, bridge.host)
+
+    async def async_discover(self, settle: bool = False) -> list[Bridge]:
+        """
+        Broadcast a discovery request on all networks, sharing the sweep with callers that ask at the same time.
+
+        With settle, return the bridges that have answered as soon as no other bridge answered for a moment, instead
+        of waiting for the whole timeout. The sweep goes on in the background, and caches the bridges that answer late.
+        """
+        if (sweep := self._sweep) is None:
+            sweep = self._sweep = _Sweep(self.hass)
+            sweep.task = self.hass.async_create_task(self._async_sweep(sweep), "comfoconnect discovery")
+
+        # Shield the sweep, so a caller that is cancelled doesn't cancel it for the others.
+        if settle:
+            await asyncio.shield(sweep.settled)
+            return list(sweep.bridges)
+        return await asyncio.shield(sweep.task)
+
+    async def _async_sweep(self, sweep: _Sweep) -> list[Bridge]:
+        """Broadcast a discovery request, and cache the bridges as they answer."""
+
+        @callback
+        def on_bridge(bridge: Bridge) -> None:
+            sweep.bridges.append(bridge)
+            self._async_found(bridge)
+            if sweep.settle_timer is not None:
+                sweep.settle_timer.cancel()
+            sweep.settle_timer = self.hass.loop.call_later(DISCOVERY_SETTLE, sweep.async_settle)
+
+        try:
+            return await async_stream_bridges(await self._async_broadcast_addresses(), on_bridge)
+        finally:
+            sweep.async_settle()
+            self._sweep = None
+
+    async def _async_broadcast_addresses(self) -> list[Any]:
+        """Return the broadcast address of every network, or the limited broadcast when the network integration isn't set up."""
+        # The network integration is set up before us when it's there, but it isn't a dependency, so it isn't imported
+        # until a broadcast needs it.
+        if "network" not in self.hass.config.components:
+            self._async_warn_limited_broadcast("the network integration isn't set up")
+            return [LIMITED_BROADCAST]
+        from homeassistant.components import network
+
+        try:
+            return list(await network.async_get_ipv4_broadcast_addresses(self.hass))
+        except Exception:
+            _LOGGER.debug("Could not get the broadcast addresses of the networks", exc_info=True)
+            self._async_warn_limited_broadcast("the broadcast addresses of the networks aren't known")
+            return [LIMITED_BROADCAST]
+
+    @callback
+    def _async_warn_limited_broadcast(self, reason: str) -> None:
+        """Warn once that a sweep only reaches the network of the default route, so bridges on others aren't found."""
+        if not self._warned_limited_broadcast:
+            self._warned_limited_broadcast = True
+            _LOGGER.warning("Discovery only broadcasts to %s, since %s", LIMITED_BROADCAST, reason)
+
+    async def async_probe(self, host: str) -> list[Bridge]:
+        """Send a discovery request to one address, which only the bridge at that address answers."""
+        try:
+            bridges = await discover_bridges(host=host, timeout=UNICAST_PROBE_TIMEOUT)
+        except OSError as err:
+            _LOGGER.debug("Could not send a discovery request to %s: %s", host, err)
+            return []
+        for bridge in bridges:
+            self._async_found(bridge)
+        return bridges
+
+    async def async_locate(self, uuid: str, exclude: str | None = None) -> str | None:
+        """Return the address of a bridge other than exclude, or None when it isn't found."""
+        if (bridge := self.async_get(uuid)) is not None and bridge.host != exclude:
+            return bridge.host
+
+        # The addresses it recently had answer a unicast in milliseconds, a broadcast waits for the whole timeout.
+        if hosts := [host for host in self._hosts.get(uuid, ()) if host != exclude]:
+            _LOGGER.debug("Looking for bridge %s at %s", uuid, ", ".join(hosts))
+            for bridges in await asyncio.gather(*(self.async_probe(host) for host in hosts)):
+                if (host := _find_host(bridges, uuid)) is not None:
+                    return host
+
+        _LOGGER.debug("Looking for bridge %s with a broadcast", uuid)
+        return _find_host(await self.async_discover(), uuid)
+
+
+def _find_host(bridges: list[Bridge], uuid: str) -> str | None:
+    """Return the address of the bridge with a uuid, or None when it isn't in the list."""
+    return next((bridge.host for bridge in bridges if bridge.uuid == uuid), None)
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import logging
 from typing import Any
 
@@ -19,29 +20,23 @@ from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.util.percentage import (
-    ordered_list_item_to_percentage,
-    percentage_to_ordered_list_item,
-)
+from homeassistant.util.percentage import percentage_to_ordered_list_item
 
 from . import (
     DOMAIN,
     SIGNAL_COMFOCONNECT_AVAILABILITY,
-    SIGNAL_COMFOCONNECT_UPDATE_RECEIVED,
     ComfoConnectBridge,
 )
+from .commands import COMMAND_MODE, COMMAND_SPEED
+from .const import ATTR_STALE
+from .state import FAN_SPEEDS
 
 _LOGGER = logging.getLogger(__name__)
 
-FAN_SPEEDS = [VentilationSpeed.LOW, VentilationSpeed.MEDIUM, VentilationSpeed.HIGH]
 PRESET_MODES = [VentilationMode.AUTO, VentilationMode.MANUAL]
 
-FAN_SPEED_MAPPING = {
-    0: VentilationSpeed.AWAY,
-    1: VentilationSpeed.LOW,
-    2: VentilationSpeed.MEDIUM,
-    3: VentilationSpeed.HIGH,
-}
+# The fields of the ventilation state that the fan shows.
+FAN_FIELDS = ("fan_speed", "mode")
 
 
 async def async_setup_entry(
@@ -50,7 +45,7 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the ComfoConnect fan."""
-    ccb = hass.data[DOMAIN][config_entry.entry_id]
+    ccb = hass.data[DOMAIN].bridges[config_entry.entry_id]
 
     async_add_entities([ComfoConnectFan(ccb=ccb, config_entry=config_entry)], True)
 
@@ -78,27 +73,23 @@ class ComfoConnectFan(FanEntity):
         )
 
     async def async_added_to_hass(self) -> None:
-        """Register for sensor updates."""
+        """Register for changes of the fan speed and operating mode."""
+        self.async_on_remove(functools.partial(self._ccb.frame_writer.async_discard, self))
+        ventilation = self._ccb.ventilation
+
         _LOGGER.debug("Registering for fan speed")
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass,
-                SIGNAL_COMFOCONNECT_UPDATE_RECEIVED.format(self._ccb.uuid, SENSOR_FAN_SPEED_MODE),
-                self._handle_speed_update,
-            )
-        )
-        await self._ccb.register_sensor(SENSORS.get(SENSOR_FAN_SPEED_MODE))
+        self.async_on_remove(ventilation.async_observe_sensor("fan_speed", self._handle_speed_update))
+        self.async_on_remove(self._ccb.async_request_sensor(SENSORS.get(SENSOR_FAN_SPEED_MODE)))
 
         _LOGGER.debug("Registering for operating mode")
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass,
-                SIGNAL_COMFOCONNECT_UPDATE_RECEIVED.format(self._ccb.uuid, SENSOR_OPERATING_MODE),
-                self._handle_mode_update,
-            )
-        )
-        await self._ccb.register_sensor(SENSORS.get(SENSOR_OPERATING_MODE))
-        self._attr_preset_mode = await self._ccb.get_mode()
+        self.async_on_remove(ventilation.async_observe_sensor("mode", self._handle_mode_update))
+        self.async_on_remove(self._ccb.async_request_sensor(SENSORS.get(SENSOR_OPERATING_MODE)))
+
+        # Start with what we knew before a restart, the bridge sends both sensors when they are registered.
+        if ventilation.state.fan_speed is not None:
+            self._attr_percentage = ventilation.state.fan_speed
+        self._attr_preset_mode = ventilation.state.mode
+        self._update_stale()
 
         self.async_on_remove(
             async_dispatcher_connect(
@@ -112,29 +103,28 @@ class ComfoConnectFan(FanEntity):
     def _handle_availability_update(self, available: bool) -> None:
         """Handle bridge availability changes."""
         self._attr_available = available
-        self.async_write_ha_state()
+        self._ccb.frame_writer.async_schedule(self)
 
     @callback
-    def _handle_speed_update(self, value: int) -> None:
-        """Handle update callbacks."""
-        _LOGGER.debug("Handle update for fan speed (%d): %s", SENSOR_FAN_SPEED_MODE, value)
-        if value == 0:
-            self._attr_percentage = 0
-        else:
-            self._attr_percentage = ordered_list_item_to_percentage(FAN_SPEEDS, FAN_SPEED_MAPPING[value])
+    def _handle_speed_update(self, percentage: int) -> None:
+        """Handle a change of the fan speed."""
+        _LOGGER.debug("Handle update for fan speed: %s%%", percentage)
+        self._attr_percentage = percentage
+        self._update_stale()
+        self._ccb.frame_writer.async_schedule(self)
 
-        self.async_write_ha_state()
+    @callback
+    def _handle_mode_update(self, mode: str) -> None:
+        """Handle a change of the operating mode."""
+        _LOGGER.debug("Handle update for operating mode: %s", mode)
+        self._attr_preset_mode = mode
+        self._update_stale()
+        self._ccb.frame_writer.async_schedule(self)
 
     @callback
-    def _handle_mode_update(self, value: int) -> None:
-        """Handle update callbacks."""
-        _LOGGER.debug(
-            "Handle update for operating mode (%d): %s",
-            SENSOR_OPERATING_MODE,
-            value,
-        )
-        self._attr_preset_mode = VentilationMode.AUTO if value == -1 else VentilationMode.MANUAL
-        self.async_write_ha_state()
+    def _update_stale(self) -> None:
+        """Mark the state as stale while the speed or the mode is still the one from before a restart."""
+        self._attr_extra_state_attributes = None if self._ccb.ventilation.stale.isdisjoint(FAN_FIELDS) else {ATTR_STALE: True}
 
     @property
     def is_on(self) -> bool | None:
@@ -171,7 +161,7 @@ class ComfoConnectFan(FanEntity):
             speed = percentage_to_ordered_list_item(FAN_SPEEDS, percentage)
 
         try:
-            await self._ccb.set_speed(speed)
+            await self._ccb.commands.async_call(COMMAND_SPEED, lambda: self._ccb.set_speed(speed))
         except AioComfoConnectNotConnected as err:
             raise HomeAssistantError(f"Not connected to ComfoConnect bridge: {err}") from err
         except ComfoConnectRmiError as err:
@@ -183,9 +173,18 @@ class ComfoConnectFan(FanEntity):
             raise ValueError(f"Invalid preset mode: {preset_mode}")
 
         _LOGGER.debug("Changing preset mode to %s", preset_mode)
-        try:
+
+        async def write() -> str:
             await self._ccb.set_mode(preset_mode)
+            return preset_mode
+
+        try:
+            # When the mode is changed again before this one is sent, we end up with the mode that was sent last.
+            mode = await self._ccb.commands.async_call(COMMAND_MODE, write)
         except AioComfoConnectNotConnected as err:
             raise HomeAssistantError(f"Not connected to ComfoConnect bridge: {err}") from err
         except ComfoConnectRmiError as err:
             raise HomeAssistantError(f"Failed to set preset mode: {err}") from err
+
+        # The select of the ventilation mode shows the same field.
+        self._ccb.ventilation.async_set("mode", mode)
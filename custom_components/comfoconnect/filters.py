@@ -0,0 +1,188 @@
+"""Filters for the sensor updates of the ComfoConnect integration."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import callback
+
+# How much a change may be smaller than the deadband, and still get through.
+DEADBAND_TOLERANCE = 1e-9
+
+
+class CoalescingThrottle:
+    """
+    Pass on at most one value per window, while making sure the last value always gets through.
+
+    The first value is passed on right away. Values that arrive within the window replace each other, and the
+    newest one is passed on by a single timer when the window has passed.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, window: float, action: Callable[[Any], None]) -> None:
+        """Initialize the throttle."""
+        self._loop = loop
+        self._window = window
+        self._action = action
+        self._last_run: float | None = None
+        self._timer: asyncio.TimerHandle | None = None
+        self._value: Any = None
+
+    @callback
+    def async_call(self, value: Any) -> None:
+        """Pass on the value now, or when the window has passed if we already passed on a value in this window."""
+        self._value = value
+
+        # The timer will pass on the value we just stored.
+        if self._timer is not None:
+            return
+
+        now = self._loop.time()
+        if self._last_run is None or now - self._last_run >= self._window:
+            self._run()
+        else:
+            self._timer = self._loop.call_at(self._last_run + self._window, self._run)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop the pending value."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    @callback
+    def _run(self) -> None:
+        """Pass on the newest value."""
+        self._timer = None
+        self._last_run = self._loop.time()
+        self._action(self._value)
+
+
+class Deadband:
+    """
+    Only pass on values that differ enough from the last value that was passed on.
+
+    A value gets through when it differs from the last one that got through by at least the absolute deadband, or by
+    at least the relative deadband times that value, whichever is larger. With both at zero, only values that are
+    the same as the last one are dropped. Values are always compared with the last value that got through, so a slow
+    drift still gets through eventually. When a heartbeat is set, a value also gets through when nothing got through
+    for that long, so the state never lags behind for longer than that. Values that can't be subtracted, like lists,
+    only get through when they are different.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        action: Callable[[Any], None],
+        absolute: float = 0.0,
+        relative: float = 0.0,
+        heartbeat: float | None = None,
+    ) -> None:
+        """Initialize the deadband."""
+        self._loop = loop
+        self._action = action
+        self._absolute = absolute
+        self._relative = relative
+        self._heartbeat = heartbeat
+        self._last_value: Any = None
+        self._last_run: float | None = None
+
+    @callback
+    def async_call(self, value: Any) -> None:
+        """Pass on the value when it's outside the deadband, or when the heartbeat is due."""
+        if self._last_run is not None and not self._exceeds(value):
+            if self._heartbeat is None or self._loop.time() - self._last_run < self._heartbeat:
+                return
+
+        self._last_value = value
+        self._last_run = self._loop.time()
+        self._action(value)
+
+    def _exceeds(self, value: Any) -> bool:
+        """Return whether the value differs enough from the last value that was passed on."""
+        last = self._last_value
+        if value == last:
+            return False
+        try:
+            change = abs(value - last)
+        except TypeError:
+            return True
+        # The values come with a fixed resolution, so allow for the rounding error of a change of exactly the deadband.
+        return change + DEADBAND_TOLERANCE >= max(self._absolute, self._relative * abs(last))
+
+
+class Aggregate:
+    """The minimum, maximum, mean and last of the values in a window."""
+
+    __slots__ = ("min", "max", "mean", "last", "count")
+
+    def __init__(self, min_value: float, max_value: float, mean: float, last: float, count: int) -> None:
+        """Initialize the aggregate."""
+        self.min = min_value
+        self.max = max_value
+        self.mean = mean
+        self.last = last
+        self.count = count
+
+
+class Downsampler:
+    """
+    Pass on one aggregate of the values per window, instead of every value.
+
+    The first value is passed on right away, as an aggregate of one value, like the throttle does. After that the
+    values are folded into a running minimum, maximum, sum and last value, which take the same memory however many
+    values arrive, and a single timer passes on their aggregate when the window has passed. A window without
+    values doesn't pass on anything.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, window: float, action: Callable[[Aggregate], None]) -> None:
+        """Initialize the downsampler."""
+        self._loop = loop
+        self._window = window
+        self._action = action
+        self._last_run: float | None = None
+        self._timer: asyncio.TimerHandle | None = None
+        self._min = self._max = self._sum = self._last = 0.0
+        self._count = 0
+
+    @callback
+    def async_call(self, value: float) -> None:
+        """Add a value to the window, and pass it on right away when nothing was passed on in the last window."""
+        if self._count:
+            if value < self._min:
+                self._min = value
+            elif value > self._max:
+                self._max = value
+            self._sum += value
+            self._count += 1
+        else:
+            self._min = self._max = self._sum = value
+            self._count = 1
+        self._last = value
+
+        # The timer will pass on the aggregate that this value is part of.
+        if self._timer is not None:
+            return
+
+        now = self._loop.time()
+        if self._last_run is None or now - self._last_run >= self._window:
+            self._run()
+        else:
+            self._timer = self._loop.call_at(self._last_run + self._window, self._run)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop the pending aggregate."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    @callback
+    def _run(self) -> None:
+        """Pass on the aggregate of the window, and start a new one."""
+        self._timer = None
+        self._last_run = self._loop.time()
+        aggregate = Aggregate(self._min, self._max, self._sum / self._count, self._last, self._count)
+        self._count = 0
+        self._action(aggregate)
@@ -0,0 +1,67 @@
+"""Batching of the state writes of the entities of a ComfoConnect bridge."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from homeassistant.core import callback
+from homeassistant.helpers.entity import Entity
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FrameWriter:
+    """
+    Write the state of every entity that changed at most once per iteration of the loop.
+
+    The bridge reads a burst of updates in one iteration of the loop, and an availability change reaches all
+    entities at once. Entities mark themselves dirty instead of writing their state, and a single callback in the
+    next iteration writes every dirty entity once, with the state it has by then. An entity discards its pending
+    write when it's removed, since it has no state to write anymore.
+    """
+
+    __slots__ = ("_loop", "_dirty", "_handle", "writes", "frames")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Initialize the writer."""
+        self._loop = loop
+        # The entities to write in the next frame, in the order they changed. A dict, so an entity is only in it once.
+        self._dirty: dict[Entity, None] = {}
+        self._handle: asyncio.Handle | None = None
+        # How many states we wrote, in how many frames.
+        self.writes = 0
+        self.frames = 0
+
+    @callback
+    def async_schedule(self, entity: Entity) -> None:
+        """Write the state of an entity in the next frame."""
+        self._dirty[entity] = None
+        if self._handle is None:
+            self._handle = self._loop.call_soon(self._async_flush)
+
+    @callback
+    def async_discard(self, entity: Entity) -> None:
+        """Drop the pending write of an entity, when it was removed or has written its state itself."""
+        self._dirty.pop(entity, None)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop the writes of the next frame."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._dirty.clear()
+
+    @callback
+    def _async_flush(self) -> None:
+        """Write the state of every dirty entity."""
+        self._handle = None
+        dirty, self._dirty = self._dirty, {}
+        self.frames += 1
+        for entity in dirty:
+            try:
+                entity.async_write_ha_state()
+            except Exception:
+                _LOGGER.exception("Error writing the state of %s", entity.entity_id)
+            self.writes += 1
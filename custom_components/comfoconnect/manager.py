@@ -0,0 +1,275 @@
+"""Manager of the connections to all the ComfoConnect bridges."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import random
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+from aiocomfoconnect.exceptions import (
+    AioComfoConnectNotConnected,
+    AioComfoConnectNotReachable,
+    AioComfoConnectTimeout,
+    ComfoConnectError,
+    ComfoConnectNotAllowed,
+)
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+
+from .commands import PRIORITY_KEEPALIVE
+from .const import DOMAIN
+from .discovery import BridgeDiscovery
+
+if TYPE_CHECKING:
+    from . import ComfoConnectBridge
+
+_LOGGER = logging.getLogger(__name__)
+
+# After a probe failed, we probe again after this many seconds, and give up on the connection after this many failed probes.
+FAILED_PROBE_INTERVAL = 5.0
+MAX_FAILED_PROBES = 2
+
+# The delay before the first reconnect attempt is at most this many seconds, and doubles for every failed attempt.
+RECONNECT_BACKOFF_BASE = 1.0
+RECONNECT_BACKOFF_MAX = 300.0
+
+# How many bridges we connect to at the same time.
+MAX_CONCURRENT_CONNECTS = 2
+
+# After this many failed reconnect attempts in a row, we look for the bridge on another address, since DHCP may have
+# moved it.
+REDISCOVER_AFTER_FAILURES = 3
+
+
+@callback
+def async_get_manager(hass: HomeAssistant) -> ComfoConnectManager:
+    """Return the manager, and create it when this is the first bridge."""
+    if DOMAIN not in hass.data:
+        hass.data[DOMAIN] = ComfoConnectManager(hass)
+    return hass.data[DOMAIN]
+
+
+class ComfoConnectManager:
+    """
+    Own the bridges of all config entries, and keep them connected.
+
+    Every bridge is watched by a task that only probes it when nothing was received for a while, since the sensor
+    updates that the bridge pushes already prove that the connection works. When a bridge doesn't answer or closes the
+    connection, it's reconnected with an exponential backoff and full jitter, so bridges that drop at the same moment don't all
+    reconnect at the same moment, and a semaphore caps how many bridges we connect to at once.
+
+    When a bridge can't be reached for a few attempts, it's looked for on other addresses, so a bridge that DHCP gave
+    another address is found again without a restart. The discovery is shared by all entries and the config flow.
+    When the bridge refuses us, because another client took over the session or we are no longer registered, we keep
+    trying with the same backoff, and ask the user to register us again when we aren't allowed.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        *,
+        backoff_base: float = RECONNECT_BACKOFF_BASE,
+        backoff_max: float = RECONNECT_BACKOFF_MAX,
+        max_concurrent_connects: int = MAX_CONCURRENT_CONNECTS,
+    ) -> None:
+        """Initialize the manager."""
+        self.hass = hass
+        self.bridges: dict[str, ComfoConnectBridge] = {}
+        self._local_uuids: dict[str, str] = {}
+        self._host_changed: dict[str, Callable[[str], None]] = {}
+        self._auth_failed: dict[str, Callable[[], None]] = {}
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._connect_semaphore = asyncio.Semaphore(max_concurrent_connects)
+        self._watch_tasks: dict[str, asyncio.Task[None]] = {}
+        self.discovery = BridgeDiscovery(hass)
+        self._unsub_stop: CALLBACK_TYPE | None = None
+
+    async def async_add_bridge(
+        self,
+        entry_id: str,
+        bridge: ComfoConnectBridge,
+        local_uuid: str,
+        host_changed: Callable[[str], None] | None = None,
+        auth_failed: Callable[[], None] | None = None,
+    ) -> None:
+        """
+        Start managing the connection to a bridge.
+
+        host_changed is called when the bridge is found on another address, and auth_failed when the bridge doesn't
+        allow us to connect anymore.
+        """
+        # A watcher that is left from an earlier setup of the entry would reconnect this bridge as well.
+        if (task := self._watch_tasks.pop(entry_id, None)) is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+        self.bridges[entry_id] = bridge
+        self._local_uuids[entry_id] = local_uuid
+        if host_changed is not None:
+            self._host_changed[entry_id] = host_changed
+        if auth_failed is not None:
+            self._auth_failed[entry_id] = auth_failed
+        self.discovery.async_remember_host(bridge.uuid, bridge.host)
+
+        self._watch_tasks[entry_id] = self.hass.async_create_background_task(self._async_watch(entry_id), f"comfoconnect watch {bridge.uuid}")
+
+        if self._unsub_stop is None:
+            self._unsub_stop = self.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._async_stop)
+
+    async def async_remove_bridge(self, entry_id: str, drain_timeout: float = 0) -> ComfoConnectBridge:
+        """Stop managing the connection to a bridge, and disconnect from it."""
+        self._watch_tasks.pop(entry_id).cancel()
+        bridge = self.bridges.pop(entry_id)
+        self._local_uuids.pop(entry_id)
+        self._host_changed.pop(entry_id, None)
+        self._auth_failed.pop(entry_id, None)
+
+        if not self.bridges and self._unsub_stop is not None:
+            self._unsub_stop()
+            self._unsub_stop = None
+
+        await bridge.async_disconnect(drain_timeout)
+        return bridge
+
+    async def async_connect(self, bridge: ComfoConnectBridge, local_uuid: str) -> None:
+        """Connect to a bridge, waiting for a free slot when we are already connecting to other bridges."""
+        async with self._connect_semaphore:
+            await bridge.async_connect(local_uuid)
+
+    async def _async_watch(self, entry_id: str) -> None:
+        """Probe a bridge when it has been quiet for a while, and reconnect when it doesn't answer."""
+        bridge = self.bridges[entry_id]
+        loop = self.hass.loop
+        last_answer = loop.time()
+        failed_probes = 0
+
+        while True:
+            if bridge.connection_lost.is_set():
+                # The bridge closed the connection, so there is no point in probing it.
+                await self._async_reconnect(entry_id)
+                last_answer = loop.time()
+                failed_probes = 0
+                continue
+
+            # Anything the bridge sends proves that the connection works, not just the answers to our probes.
+            alive_at = max(last_answer, bridge.last_seen or 0)
+
+            if failed_probes:
+                await self._async_wait_lost(bridge, FAILED_PROBE_INTERVAL)
+                if bridge.connection_lost.is_set():
+                    continue
+                if (bridge.last_seen or 0) > alive_at:
+                    failed_probes = 0
+                    continue
+
+            elif (idle := loop.time() - alive_at) < bridge.keepalive_idle:
+                await self._async_wait_lost(bridge, bridge.keepalive_idle - idle)
+                continue
+
+            try:
+                await self._async_probe(bridge)
+
+            except AioComfoConnectNotConnected:
+                # The connection is gone, there is no point in probing again.
+                failed_probes = MAX_FAILED_PROBES
+
+            except (AioComfoConnectTimeout, AioComfoConnectNotReachable):
+                failed_probes += 1
+                _LOGGER.debug("Bridge %s didn't answer the keepalive (%d/%d)", bridge.uuid, failed_probes, MAX_FAILED_PROBES)
+
+            except ComfoConnectError as err:
+                # The bridge refused the keepalive, for example because another client took over the session.
+                _LOGGER.debug("Bridge %s refused the keepalive: %s", bridge.uuid, err.message)
+                failed_probes = MAX_FAILED_PROBES
+
+            else:
+                last_answer = loop.time()
+                failed_probes = 0
+                continue
+
+            # The state of the bridge makes the entities unavailable while we reconnect.
+            if failed_probes >= MAX_FAILED_PROBES:
+                await self._async_reconnect(entry_id)
+                last_answer = loop.time()
+                failed_probes = 0
+
+    @staticmethod
+    async def _async_wait_lost(bridge: ComfoConnectBridge, timeout: float) -> None:
+        """Wait for timeout seconds, or until the bridge closes the connection."""
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout(timeout):
+                await bridge.connection_lost.wait()
+
+    async def _async_probe(self, bridge: ComfoConnectBridge) -> None:
+        """Send a keepalive to a bridge, and measure the round-trip time."""
+        _LOGGER.debug("Sending keepalive to %s...", bridge.uuid)
+        start = self.hass.loop.time()
+
+        # Use cmd_time_request as a keepalive since cmd_keepalive doesn't send back a reply we can wait for
+        await bridge.scheduler.async_run(PRIORITY_KEEPALIVE, bridge.cmd_time_request)
+        bridge.rtt = self.hass.loop.time() - start
+        bridge.metrics.keepalive_rtt.record(bridge.rtt)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Return how long to wait before a reconnect attempt, with full jitter."""
+        return random.uniform(0, min(self._backoff_max, self._backoff_base * 2**attempt))
+
+    async def _async_reconnect(self, entry_id: str) -> None:
+        """Reconnect to a bridge until it works, backing off after every failed attempt."""
+        bridge = self.bridges[entry_id]
+        attempt = 0
+        reauth_started = False
+        while True:
+            await asyncio.sleep(self.backoff_delay(attempt))
+            try:
+                # Close what is left of the last connection first.
+                await bridge.async_disconnect()
+                await self.async_connect(bridge, self._local_uuids[entry_id])
+            except (AioComfoConnectTimeout, AioComfoConnectNotReachable, AioComfoConnectNotConnected) as err:
+                attempt += 1
+                _LOGGER.debug("Could not reconnect to %s (attempt %d): %s", bridge.uuid, attempt, err)
+            except ComfoConnectError as err:
+                attempt += 1
+                _LOGGER.debug("Bridge %s refused the reconnect (attempt %d): %s", bridge.uuid, attempt, err.message)
+                # Ask the user to register us again once, the reauth flow reloads the entry when it's done.
+                if isinstance(err, ComfoConnectNotAllowed) and not reauth_started:
+                    reauth_started = True
+                    _LOGGER.warning("Bridge %s doesn't allow us to connect anymore", bridge.uuid)
+                    if (auth_failed := self._auth_failed.get(entry_id)) is not None:
+                        auth_failed()
+                # The bridge answered, so it hasn't moved.
+                continue
+            else:
+                _LOGGER.info("Reconnected to %s", bridge.uuid)
+                return
+
+            # Try the new address right away, when the bridge has moved.
+            if attempt % REDISCOVER_AFTER_FAILURES == 0 and await self._async_relocate(entry_id):
+                attempt = 0
+
+    async def _async_relocate(self, entry_id: str) -> bool:
+        """Look for a bridge on other addresses, and return whether it was found on a new one."""
+        bridge = self.bridges[entry_id]
+        host = await self.discovery.async_locate(bridge.uuid, exclude=bridge.host)
+        if host is None or host == bridge.host:
+            return False
+
+        _LOGGER.info("Bridge %s moved from %s to %s", bridge.uuid, bridge.host, host)
+        bridge.host = host
+        if (host_changed := self._host_changed.get(entry_id)) is not None:
+            host_changed(host)
+        return True
+
+    async def _async_stop(self, event: Event) -> None:
+        """Disconnect from all bridges when Home Assistant stops."""
+        # The listener is removed once it has fired.
+        self._unsub_stop = None
+        for task in self._watch_tasks.values():
+            task.cancel()
+
+        await asyncio.gather(*(bridge.async_disconnect() for bridge in self.bridges.values()))
@@ -0,0 +1,158 @@
+"""Counters and latency histograms of the ComfoConnect integration, cheap enough to keep on all the time."""
+
+from __future__ import annotations
+
+import functools
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any
+
+# The upper bounds of the latency buckets, in seconds. One more bucket counts everything slower than the last bound.
+LATENCY_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# The commands of the bridge that we time, by method name.
+TIMED_COMMANDS = (
+    "get_property",
+    "set_property",
+    "set_property_typed",
+    "get_mode",
+    "set_mode",
+    "get_speed",
+    "set_speed",
+    "get_flow_for_speed",
+    "set_flow_for_speed",
+    "get_bypass",
+    "set_bypass",
+    "get_balance_mode",
+    "set_balance_mode",
+    "get_boost",
+    "set_boost",
+    "get_away",
+    "set_away",
+    "get_comfocool_mode",
+    "set_comfocool_mode",
+    "get_temperature_profile",
+    "set_temperature_profile",
+    "get_sensor_ventmode_temperature_passive",
+    "set_sensor_ventmode_temperature_passive",
+    "get_sensor_ventmode_humidity_comfort",
+    "set_sensor_ventmode_humidity_comfort",
+    "get_sensor_ventmode_humidity_protection",
+    "set_sensor_ventmode_humidity_protection",
+    "clear_errors",
+)
+
+
+class LatencyHistogram:
+    """A histogram of latencies with fixed buckets, that only adds to preallocated counters when it records."""
+
+    __slots__ = ("counts", "total", "max")
+
+    def __init__(self) -> None:
+        """Initialize the histogram."""
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Record a latency."""
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def count(self) -> int:
+        """Return how many latencies were recorded."""
+        return sum(self.counts)
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean latency in seconds, or None when nothing was recorded."""
+        count = self.count
+        return self.total / count if count else None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram in milliseconds."""
+        mean = self.mean
+        buckets = {f"<= {bound * 1000:g} ms": count for bound, count in zip(LATENCY_BUCKETS, self.counts)}
+        buckets[f"> {LATENCY_BUCKETS[-1] * 1000:g} ms"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(mean * 1000, 3) if mean is not None else None,
+            "max_ms": round(self.max * 1000, 3),
+            "buckets": buckets,
+        }
+
+
+class BridgeMetrics:
+    """The counters and histograms of one bridge."""
+
+    __slots__ = ("pdo_updates", "dispatch", "commands", "command_errors", "sessions", "resume", "keepalive_rtt")
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        # The number of updates we received, by sensor id.
+        self.pdo_updates: dict[int, int] = {}
+        # How long it took to pass an update on to the entities that listen for it.
+        self.dispatch = LatencyHistogram()
+        # How long the commands took, and how many of them failed, by method name.
+        self.commands = {name: LatencyHistogram() for name in TIMED_COMMANDS}
+        self.command_errors = dict.fromkeys(TIMED_COMMANDS, 0)
+        # The number of sessions we started, the first one included.
+        self.sessions = 0
+        # How long it took from a lost connection until all sensors were registered again.
+        self.resume = LatencyHistogram()
+        self.keepalive_rtt = LatencyHistogram()
+
+    @property
+    def reconnects(self) -> int:
+        """Return how often we started a session again after the first one."""
+        return max(self.sessions - 1, 0)
+
+    @property
+    def command_latency(self) -> float | None:
+        """Return the mean latency of all commands in seconds, or None when no command was sent."""
+        count = sum(histogram.count for histogram in self.commands.values())
+        return sum(histogram.total for histogram in self.commands.values()) / count if count else None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics, leaving out the commands that were never sent."""
+        return {
+            "pdo_updates": dict(sorted(self.pdo_updates.items())),
+            "pdo_updates_total": sum(self.pdo_updates.values()),
+            "dispatch": self.dispatch.as_dict(),
+            "commands": {
+                name: {**histogram.as_dict(), "errors": self.command_errors[name]}
+                for name, histogram in self.commands.items()
+                if histogram.count or self.command_errors[name]
+            },
+            "sessions": self.sessions,
+            "reconnects": self.reconnects,
+            "resume": self.resume.as_dict(),
+            "keepalive_rtt": self.keepalive_rtt.as_dict(),
+        }
+
+
+def timed_commands(cls: type) -> type:
+    """Wrap the TIMED_COMMANDS of a bridge class, so every call is recorded in the metrics of the bridge."""
+    for name in TIMED_COMMANDS:
+        setattr(cls, name, _timed(name, getattr(cls, name)))
+    return cls
+
+
+def _timed(name: str, command):
+    """Return command, recording its latency and failures."""
+
+    @functools.wraps(command)
+    async def timed(self, *args, **kwargs):
+        start = perf_counter()
+        try:
+            return await command(self, *args, **kwargs)
+        except Exception:
+            self.metrics.command_errors[name] += 1
+            raise
+        finally:
+            self.metrics.commands[name].record(perf_counter() - start)
+
+    return timed
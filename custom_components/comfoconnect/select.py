@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import logging
 from collections.abc import Awaitable, Coroutine
 from dataclasses import dataclass
@@ -34,9 +35,11 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from . import (
     DOMAIN,
     SIGNAL_COMFOCONNECT_AVAILABILITY,
-    SIGNAL_COMFOCONNECT_UPDATE_RECEIVED,
     ComfoConnectBridge,
+    async_installed_descriptions,
 )
+from .commands import COMMAND_MODE
+from .const import ATTR_STALE, OPTION_COMFOCOOL
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -46,7 +49,6 @@ class ComfoconnectSelectDescriptionMixin:
     """Mixin for required keys."""
 
     set_value_fn: Callable[[ComfoConnectBridge, str], Awaitable[Any]]
-    get_value_fn: Callable[[ComfoConnectBridge], Awaitable[Any]]
 
 
 @dataclass
@@ -54,31 +56,36 @@ class ComfoconnectSelectEntityDescription(SelectEntityDescription, ComfoconnectS
     """Describes ComfoConnect select entity."""
 
     sensor: AioComfoConnectSensor = None
-    sensor_value_fn: Callable[[str], Any] = None
+    # Reads a setting that the bridge doesn't push. A select with a sensor doesn't have one, since it's decoded from
+    # the sensor instead.
+    get_value_fn: Callable[[ComfoConnectBridge], Awaitable[Any]] | None = None
+    # The field of the VentilationState that holds the option, this defaults to the key. The field of a select with a
+    # sensor is decoded from it, as described in SENSOR_FIELDS.
+    field: str | None = None
+    # Writes to the same setting are debounced together, this defaults to the key.
+    command_key: str = None
+    # The option of the ventilation unit that the select belongs to.
+    option: str | None = None
 
 
 SELECT_TYPES = (
     ComfoconnectSelectEntityDescription(
         key="select_mode",
         name="Ventilation Mode",
+        field="mode",
+        command_key=COMMAND_MODE,
         icon="mdi:fan-auto",
         entity_category=EntityCategory.CONFIG,
-        get_value_fn=lambda ccb: cast(Coroutine, ccb.get_mode()),
         set_value_fn=lambda ccb, option: cast(Coroutine, ccb.set_mode(option)),
         options=[VentilationMode.AUTO, VentilationMode.MANUAL],
         # translation_key="setting",
         sensor=SENSORS.get(SENSOR_OPERATING_MODE),
-        sensor_value_fn=lambda value: {
-            -1: VentilationMode.AUTO,
-            1: VentilationMode.MANUAL,
-        }.get(value),
     ),
     ComfoconnectSelectEntityDescription(
         key="bypass_mode",
         name="Bypass Mode",
         icon="mdi:camera-iris",
         entity_category=EntityCategory.CONFIG,
-        get_value_fn=lambda ccb: cast(Coroutine, ccb.get_bypass()),
         set_value_fn=lambda ccb, option: cast(Coroutine, ccb.set_bypass(option)),
         options=[
             VentilationSetting.AUTO,
@@ -87,11 +94,6 @@ SELECT_TYPES = (
         ],
         # translation_key="setting",
         sensor=SENSORS.get(SENSOR_BYPASS_ACTIVATION_STATE),
-        sensor_value_fn=lambda value: {
-            0: VentilationSetting.AUTO,
-            1: VentilationSetting.ON,
-            2: VentilationSetting.OFF,
-        }.get(value),
     ),
     ComfoconnectSelectEntityDescription(
         key="balance_mode",
@@ -111,7 +113,6 @@ SELECT_TYPES = (
         name="Temperature Profile",
         icon="mdi:thermometer-auto",
         entity_category=EntityCategory.CONFIG,
-        get_value_fn=lambda ccb: cast(Coroutine, ccb.get_temperature_profile()),
         set_value_fn=lambda ccb, option: cast(Coroutine, ccb.set_temperature_profile(option)),
         options=[
             VentilationTemperatureProfile.WARM,
@@ -120,17 +121,11 @@ SELECT_TYPES = (
         ],
         # translation_key="temperature_profile",
         sensor=SENSORS.get(SENSOR_PROFILE_TEMPERATURE),
-        sensor_value_fn=lambda value: {
-            0: VentilationTemperatureProfile.NORMAL,
-            1: VentilationTemperatureProfile.COOL,
-            2: VentilationTemperatureProfile.WARM,
-        }.get(value),
     ),
     ComfoconnectSelectEntityDescription(
         key="comfocool",
         name="ComfoCool Mode",
         entity_category=EntityCategory.CONFIG,
-        get_value_fn=lambda ccb: cast(Coroutine, ccb.get_comfocool_mode()),
         set_value_fn=lambda ccb, option: cast(Coroutine, ccb.set_comfocool_mode(option)),
         options=[
             ComfoCoolMode.AUTO,
@@ -138,10 +133,7 @@ SELECT_TYPES = (
         ],
         # translation_key="comfocool",
         sensor=SENSORS.get(SENSOR_COMFOCOOL_STATE),
-        sensor_value_fn=lambda value: {
-            0: ComfoCoolMode.OFF,
-            1: ComfoCoolMode.AUTO,
-        }.get(value),
+        option=OPTION_COMFOCOOL,
     ),
     ComfoconnectSelectEntityDescription(
         key="boost_timeout",
@@ -160,16 +152,45 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the ComfoConnect selects."""
-    ccb = hass.data[DOMAIN][config_entry.entry_id]
+    ccb = hass.data[DOMAIN].bridges[config_entry.entry_id]
 
-    selects = [ComfoConnectSelect(ccb=ccb, config_entry=config_entry, description=description) for description in SELECT_TYPES]
+    # Only create the selects of the options that are installed.
+    descriptions = async_installed_descriptions(config_entry, SELECT_TYPES)
 
-    async_add_entities(selects, True)
+    # The coordinator pulls in requests through the update coordinator helper, which nothing else of ours needs.
+    from .coordinator import ComfoConnectSettingsCoordinator
+
+    # The settings that the bridge doesn't push are read by one coordinator for all entities, into the state of the bridge.
+    coordinator = ComfoConnectSettingsCoordinator(
+        hass,
+        ccb,
+        config_entry,
+        {description.field or description.key: description.get_value_fn for description in descriptions if not description.sensor},
+    )
+    config_entry.async_on_unload(config_entry.add_update_listener(coordinator.async_options_updated))
+    config_entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_COMFOCONNECT_AVAILABILITY.format(ccb.uuid), coordinator.async_availability_changed)
+    )
+
+    @callback
+    def async_settings_read() -> None:
+        if coordinator.last_update_success:
+            ccb.ventilation.async_update(coordinator.data)
+
+    config_entry.async_on_unload(coordinator.async_add_listener(async_settings_read))
+    # Don't keep the setup of the platform waiting for the round trips, the selects of the settings are unavailable
+    # until they are read.
+    config_entry.async_create_background_task(hass, coordinator.async_refresh(), f"{coordinator.name} first refresh")
+
+    selects = [ComfoConnectSelect(ccb=ccb, config_entry=config_entry, description=description) for description in descriptions]
+
+    async_add_entities(selects)
 
 
 class ComfoConnectSelect(SelectEntity):
     """Representation of a ComfoConnect select."""
 
+    _attr_should_poll = False
     _attr_has_entity_name = True
     entity_description: ComfoconnectSelectEntityDescription
 
@@ -182,15 +203,19 @@ class ComfoConnectSelect(SelectEntity):
         """Initialize the ComfoConnect select."""
         self._ccb = ccb
         self.entity_description = description
-        self._attr_should_poll = False if description.sensor else True
+        self._field = description.field or description.key
         self._attr_unique_id = f"{self._ccb.uuid}-{description.key}"
         self._attr_available = ccb.is_available
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, self._ccb.uuid)},
         )
 
+        # We don't know the option until the bridge sends the sensor, or the coordinator has read the setting.
+        self._attr_current_option = None
+
     async def async_added_to_hass(self) -> None:
-        """Register for sensor updates and availability changes."""
+        """Register for state changes and availability changes."""
+        self.async_on_remove(functools.partial(self._ccb.frame_writer.async_discard, self))
         self.async_on_remove(
             async_dispatcher_connect(
                 self.hass,
@@ -199,48 +224,48 @@ class ComfoConnectSelect(SelectEntity):
             )
         )
 
-        if not self.entity_description.sensor:
-            return
+        description = self.entity_description
+        ventilation = self._ccb.ventilation
+        if not description.sensor:
+            self.async_on_remove(ventilation.async_observe(self._field, self._handle_update))
+        else:
+            _LOGGER.debug("Registering for sensor %s (%d)", description.sensor.name, description.sensor.id)
+            self.async_on_remove(ventilation.async_observe_sensor(self._field, self._handle_update))
+            self.async_on_remove(self._ccb.async_request_sensor(description.sensor))
 
-        _LOGGER.debug(
-            "Registering for sensor %s (%d)",
-            self.entity_description.sensor.name,
-            self.entity_description.sensor.id,
-        )
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass,
-                SIGNAL_COMFOCONNECT_UPDATE_RECEIVED.format(self._ccb.uuid, self.entity_description.sensor.id),
-                self._handle_update,
-            )
-        )
-        await self._ccb.register_sensor(self.entity_description.sensor)
+        self._attr_current_option = getattr(ventilation.state, self._field)
+        if self._field in ventilation.stale:
+            # Mark the option from before a restart, until the bridge sends a fresh one.
+            self._attr_extra_state_attributes = {ATTR_STALE: True}
+
+    @property
+    def available(self) -> bool:
+        """Return whether the select is available, which a setting that the bridge doesn't push only is once it was read."""
+        return self._attr_available and (self.entity_description.sensor is not None or self._attr_current_option is not None)
 
     @callback
     def _handle_availability_update(self, available: bool) -> None:
         """Handle bridge availability changes."""
         self._attr_available = available
-        self.async_write_ha_state()
+        self._ccb.frame_writer.async_schedule(self)
 
     @callback
-    def _handle_update(self, value):
-        """Handle update callbacks."""
-        _LOGGER.debug(
-            "Handle update for sensor %s (%s): %s",
-            self.entity_description.sensor.name,
-            self.entity_description.sensor.id,
-            value,
-        )
-
-        self._attr_current_option = self.entity_description.sensor_value_fn(value)
-        self.async_write_ha_state()
-
-    async def async_update(self) -> None:
-        """Update the state."""
-        self._attr_current_option = await self.entity_description.get_value_fn(self._ccb)
+    def _handle_update(self, option: Any) -> None:
+        """Handle a change of the option in the state of the bridge."""
+        self._attr_current_option = option
+        self._attr_extra_state_attributes = None
+        self._ccb.frame_writer.async_schedule(self)
 
     async def async_select_option(self, option: str) -> None:
         """Set the selected option."""
-        await self.entity_description.set_value_fn(self._ccb, option)
-        self._attr_current_option = option
+        description = self.entity_description
+
+        async def write() -> str:
+            await description.set_value_fn(self._ccb, option)
+            return option
+
+        # When the option is changed again before this one is sent, we end up with the option that was sent last.
+        self._ccb.ventilation.async_set(self._field, await self._ccb.commands.async_call(description.command_key or description.key, write))
+        # Write the option right away, so the state is up to date when the service call returns, instead of in the next frame.
+        self._ccb.frame_writer.async_discard(self)
         self.async_write_ha_state()
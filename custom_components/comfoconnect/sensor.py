@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import logging
 from dataclasses import dataclass
 from datetime import timedelta
@@ -64,19 +65,42 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.util import Throttle
 
 from . import (
     DOMAIN,
+    SIGNAL_COMFOCONNECT_ALARMS,
     SIGNAL_COMFOCONNECT_AVAILABILITY,
-    SIGNAL_COMFOCONNECT_UPDATE_RECEIVED,
     ComfoConnectBridge,
+    async_installed_descriptions,
 )
+from .const import (
+    ATTR_ERRORS,
+    ATTR_LAST,
+    ATTR_MAX,
+    ATTR_MIN,
+    ATTR_SAMPLES,
+    ATTR_STALE,
+    CONF_DEVICE_INFO,
+    DEVICE_INFO_BRIDGE_SERIAL,
+    OPTION_COMFOCOOL,
+    OPTION_COMFOFOND,
+)
+from .filters import Aggregate, CoalescingThrottle, Deadband, Downsampler
 
 _LOGGER = logging.getLogger(__name__)
 
 MIN_TIME_BETWEEN_UPDATES = timedelta(seconds=10)
 
+# Temperatures jitter by the 0.1 °C resolution of the sensors, so we only write a change of at least 0.2 °C. The
+# airflows only get written when they change by at least 2%. Values within the deadband are still written when
+# nothing was written for the heartbeat interval.
+TEMPERATURE_DEADBAND = 0.2
+AIRFLOW_DEADBAND = 0.02
+HEARTBEAT_INTERVAL = timedelta(minutes=15)
+
+# Sensors that are downsampled write one aggregate per window. This matches the period of the short-term statistics.
+DOWNSAMPLE_WINDOW = timedelta(minutes=5)
+
 
 @dataclass
 class ComfoconnectRequiredKeysMixin:
@@ -90,7 +114,24 @@ class ComfoconnectSensorEntityDescription(SensorEntityDescription, ComfoconnectR
     """Describes ComfoConnect sensor entity."""
 
     throttle: bool = False
-    mapping: Callable = None
+    throttle_window: timedelta = MIN_TIME_BETWEEN_UPDATES
+    downsample: bool = False
+    deadband: float = 0.0
+    deadband_relative: float = 0.0
+    heartbeat: timedelta | None = HEARTBEAT_INTERVAL
+    downsample_window: timedelta = DOWNSAMPLE_WINDOW
+    # Turns the value of the sensor into the state, for the sensors whose value isn't the state as it is.
+    mapping: Callable | None = None
+    # The option of the ventilation unit that the sensor belongs to.
+    option: str | None = None
+
+
+@dataclass
+class ComfoconnectLinkSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor about the connection with the bridge."""
+
+    # Called with the bridge and the current loop time.
+    value_fn: Callable[[ComfoConnectBridge, float], float | None] = None
 
 
 SENSOR_TYPES = (
@@ -100,6 +141,7 @@ SENSOR_TYPES = (
         state_class=SensorStateClass.MEASUREMENT,
         name="Inside temperature",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=TEMPERATURE_DEADBAND,
         ccb_sensor=SENSORS.get(SENSOR_TEMPERATURE_EXTRACT),
     ),
     ComfoconnectSensorEntityDescription(
@@ -116,6 +158,7 @@ SENSOR_TYPES = (
         state_class=SensorStateClass.MEASUREMENT,
         name="Current RMOT",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=TEMPERATURE_DEADBAND,
         ccb_sensor=SENSORS.get(SENSOR_RMOT),
         entity_registry_enabled_default=False,
         entity_category=EntityCategory.DIAGNOSTIC,
@@ -126,6 +169,7 @@ SENSOR_TYPES = (
         state_class=SensorStateClass.MEASUREMENT,
         name="Outside temperature",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=TEMPERATURE_DEADBAND,
         ccb_sensor=SENSORS.get(SENSOR_TEMPERATURE_OUTDOOR),
     ),
     ComfoconnectSensorEntityDescription(
@@ -142,6 +186,7 @@ SENSOR_TYPES = (
         state_class=SensorStateClass.MEASUREMENT,
         name="Supply temperature",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=TEMPERATURE_DEADBAND,
         ccb_sensor=SENSORS.get(SENSOR_TEMPERATURE_SUPPLY),
     ),
     ComfoconnectSensorEntityDescription(
@@ -161,7 +206,7 @@ SENSOR_TYPES = (
         ccb_sensor=SENSORS.get(SENSOR_FAN_SUPPLY_SPEED),
         entity_registry_enabled_default=False,
         entity_category=EntityCategory.DIAGNOSTIC,
-        throttle=True,
+        downsample=True,
     ),
     ComfoconnectSensorEntityDescription(
         key=SENSOR_FAN_SUPPLY_DUTY,
@@ -172,7 +217,7 @@ SENSOR_TYPES = (
         ccb_sensor=SENSORS.get(SENSOR_FAN_SUPPLY_DUTY),
         entity_registry_enabled_default=False,
         entity_category=EntityCategory.DIAGNOSTIC,
-        throttle=True,
+        downsample=True,
     ),
     ComfoconnectSensorEntityDescription(
         key=SENSOR_FAN_EXHAUST_SPEED,
@@ -183,7 +228,7 @@ SENSOR_TYPES = (
         ccb_sensor=SENSORS.get(SENSOR_FAN_EXHAUST_SPEED),
         entity_registry_enabled_default=False,
         entity_category=EntityCategory.DIAGNOSTIC,
-        throttle=True,
+        downsample=True,
     ),
     ComfoconnectSensorEntityDescription(
         key=SENSOR_FAN_EXHAUST_DUTY,
@@ -194,7 +239,7 @@ SENSOR_TYPES = (
         ccb_sensor=SENSORS.get(SENSOR_FAN_EXHAUST_DUTY),
         entity_registry_enabled_default=False,
         entity_category=EntityCategory.DIAGNOSTIC,
-        throttle=True,
+        downsample=True,
     ),
     ComfoconnectSensorEntityDescription(
         key=SENSOR_TEMPERATURE_EXHAUST,
@@ -202,6 +247,7 @@ SENSOR_TYPES = (
         state_class=SensorStateClass.MEASUREMENT,
         name="Exhaust temperature",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=TEMPERATURE_DEADBAND,
         ccb_sensor=SENSORS.get(SENSOR_TEMPERATURE_EXHAUST),
     ),
     ComfoconnectSensorEntityDescription(
@@ -222,6 +268,7 @@ SENSOR_TYPES = (
         entity_registry_enabled_default=False,
         entity_category=EntityCategory.DIAGNOSTIC,
         throttle=True,
+        deadband_relative=AIRFLOW_DEADBAND,
     ),
     ComfoconnectSensorEntityDescription(
         key=SENSOR_FAN_EXHAUST_FLOW,
@@ -233,6 +280,7 @@ SENSOR_TYPES = (
         entity_registry_enabled_default=False,
         entity_category=EntityCategory.DIAGNOSTIC,
         throttle=True,
+        deadband_relative=AIRFLOW_DEADBAND,
     ),
     ComfoconnectSensorEntityDescription(
         key=SENSOR_BYPASS_STATE,
@@ -259,7 +307,7 @@ SENSOR_TYPES = (
         ccb_sensor=SENSORS.get(SENSOR_POWER_USAGE),
         entity_registry_enabled_default=False,
         entity_category=EntityCategory.DIAGNOSTIC,
-        throttle=True,
+        downsample=True,
     ),
     ComfoconnectSensorEntityDescription(
         key=SENSOR_POWER_USAGE_TOTAL,
@@ -281,7 +329,7 @@ SENSOR_TYPES = (
         ccb_sensor=SENSORS.get(SENSOR_PREHEATER_POWER),
         entity_registry_enabled_default=False,
         entity_category=EntityCategory.DIAGNOSTIC,
-        throttle=True,
+        downsample=True,
     ),
     ComfoconnectSensorEntityDescription(
         key=SENSOR_PREHEATER_POWER_TOTAL,
@@ -302,7 +350,7 @@ SENSOR_TYPES = (
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         ccb_sensor=SENSORS.get(SENSOR_ANALOG_INPUT_1),
         entity_category=EntityCategory.DIAGNOSTIC,
-        throttle=True,
+        downsample=True,
     ),
     ComfoconnectSensorEntityDescription(
         key=SENSOR_ANALOG_INPUT_2,
@@ -312,7 +360,7 @@ SENSOR_TYPES = (
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         ccb_sensor=SENSORS.get(SENSOR_ANALOG_INPUT_2),
         entity_category=EntityCategory.DIAGNOSTIC,
-        throttle=True,
+        downsample=True,
     ),
     ComfoconnectSensorEntityDescription(
         key=SENSOR_ANALOG_INPUT_3,
@@ -322,7 +370,7 @@ SENSOR_TYPES = (
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         ccb_sensor=SENSORS.get(SENSOR_ANALOG_INPUT_3),
         entity_category=EntityCategory.DIAGNOSTIC,
-        throttle=True,
+        downsample=True,
     ),
     ComfoconnectSensorEntityDescription(
         key=SENSOR_ANALOG_INPUT_4,
@@ -332,7 +380,7 @@ SENSOR_TYPES = (
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         ccb_sensor=SENSORS.get(SENSOR_ANALOG_INPUT_4),
         entity_category=EntityCategory.DIAGNOSTIC,
-        throttle=True,
+        downsample=True,
     ),
     ComfoconnectSensorEntityDescription(
         key=SENSOR_AIRFLOW_CONSTRAINTS,
@@ -348,6 +396,7 @@ SENSOR_TYPES = (
         name="ComfoFond GHE state",
         native_unit_of_measurement=PERCENTAGE,
         ccb_sensor=SENSORS.get(SENSOR_COMFOFOND_GHE_STATE),
+        option=OPTION_COMFOFOND,
         entity_registry_enabled_default=False,
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
@@ -357,7 +406,9 @@ SENSOR_TYPES = (
         state_class=SensorStateClass.MEASUREMENT,
         name="ComfoFond ground temperature",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=TEMPERATURE_DEADBAND,
         ccb_sensor=SENSORS.get(SENSOR_COMFOFOND_TEMP_GROUND),
+        option=OPTION_COMFOFOND,
         entity_registry_enabled_default=False,
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
@@ -367,7 +418,9 @@ SENSOR_TYPES = (
         state_class=SensorStateClass.MEASUREMENT,
         name="ComfoFond outdoor air temperature",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=TEMPERATURE_DEADBAND,
         ccb_sensor=SENSORS.get(SENSOR_COMFOFOND_TEMP_OUTDOOR),
+        option=OPTION_COMFOFOND,
         entity_registry_enabled_default=False,
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
@@ -377,7 +430,69 @@ SENSOR_TYPES = (
         state_class=SensorStateClass.MEASUREMENT,
         name="ComfoCool condensor temperature",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        deadband=TEMPERATURE_DEADBAND,
         ccb_sensor=SENSORS.get(SENSOR_COMFOCOOL_CONDENSOR_TEMP),
+        option=OPTION_COMFOCOOL,
+        entity_registry_enabled_default=False,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+)
+
+
+LINK_SENSOR_TYPES = (
+    ComfoconnectLinkSensorEntityDescription(
+        key="bridge_rtt",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        name="Bridge round-trip time",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda ccb, now: round(ccb.rtt * 1000, 1) if ccb.rtt is not None else None,
+        entity_registry_enabled_default=False,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    ComfoconnectLinkSensorEntityDescription(
+        key="bridge_last_seen",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        name="Bridge last seen",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        value_fn=lambda ccb, now: round(now - ccb.last_seen) if ccb.last_seen is not None else None,
+        entity_registry_enabled_default=False,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    ComfoconnectLinkSensorEntityDescription(
+        key="bridge_pdo_updates",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        name="Bridge sensor updates",
+        value_fn=lambda ccb, now: sum(ccb.metrics.pdo_updates.values()),
+        entity_registry_enabled_default=False,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    ComfoconnectLinkSensorEntityDescription(
+        key="bridge_dispatch_time",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        name="Bridge update dispatch time",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda ccb, now: round(ccb.metrics.dispatch.mean * 1000, 3) if ccb.metrics.dispatch.mean is not None else None,
+        entity_registry_enabled_default=False,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    ComfoconnectLinkSensorEntityDescription(
+        key="bridge_command_latency",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        name="Bridge command latency",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda ccb, now: round(ccb.metrics.command_latency * 1000, 1) if ccb.metrics.command_latency is not None else None,
+        entity_registry_enabled_default=False,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    ComfoconnectLinkSensorEntityDescription(
+        key="bridge_reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        name="Bridge reconnects",
+        value_fn=lambda ccb, now: ccb.metrics.reconnects,
         entity_registry_enabled_default=False,
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
@@ -390,9 +505,14 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the ComfoConnect sensors."""
-    ccb = hass.data[DOMAIN][config_entry.entry_id]
+    ccb = hass.data[DOMAIN].bridges[config_entry.entry_id]
 
-    sensors = [ComfoConnectSensor(ccb=ccb, config_entry=config_entry, description=description) for description in SENSOR_TYPES]
+    # Only create the sensors of the options that are installed.
+    descriptions = async_installed_descriptions(config_entry, SENSOR_TYPES)
+
+    sensors = [ComfoConnectSensor(ccb=ccb, config_entry=config_entry, description=description) for description in descriptions]
+    sensors += [ComfoConnectLinkSensor(ccb=ccb, config_entry=config_entry, description=description) for description in LINK_SENSOR_TYPES]
+    sensors.append(ComfoConnectAlarmsSensor(ccb))
 
     async_add_entities(sensors, True)
 
@@ -413,33 +533,54 @@ class ComfoConnectSensor(SensorEntity):
         """Initialize the ComfoConnect sensor."""
         self._ccb = ccb
         self.entity_description = description
+        self._decode = description.mapping
         self._attr_unique_id = f"{self._ccb.uuid}-{description.key}"
         self._attr_available = ccb.is_available
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, self._ccb.uuid)},
         )
 
+        # Show the value we had before a restart, until the bridge sends a fresh one.
+        if (value := ccb.sensor_cache.get(description.key)) is not None:
+            self._update_value(value)
+            self._attr_extra_state_attributes = {ATTR_STALE: True}
+
     async def async_added_to_hass(self) -> None:
         """Register for sensor updates."""
+        self.async_on_remove(functools.partial(self._ccb.frame_writer.async_discard, self))
         _LOGGER.debug(
             "Registering for sensor %s (%d)",
             self.entity_description.name,
             self.entity_description.key,
         )
 
-        # If the sensor should be throttled, pass it through the Throttle utility
-        if self.entity_description.throttle:
-            update_handler = Throttle(MIN_TIME_BETWEEN_UPDATES)(self._handle_update)
+        description = self.entity_description
+
+        # If the sensor should be downsampled, write the mean of every window, with the minimum, maximum and last value
+        if description.downsample:
+            downsampler = Downsampler(self.hass.loop, description.downsample_window.total_seconds(), self._handle_aggregate)
+            self.async_on_remove(downsampler.async_cancel)
+            update_handler = downsampler.async_call
         else:
-            update_handler = self._handle_update
+            # If the sensor should be throttled, write at most one state per window, but always write the newest value
+            if description.throttle:
+                throttle = CoalescingThrottle(self.hass.loop, description.throttle_window.total_seconds(), self._handle_update)
+                self.async_on_remove(throttle.async_cancel)
+                update_handler = throttle.async_call
+            else:
+                update_handler = self._handle_update
 
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass,
-                SIGNAL_COMFOCONNECT_UPDATE_RECEIVED.format(self._ccb.uuid, self.entity_description.key),
+            # Drop the values that don't differ enough from the last one we wrote, before they reach the throttle
+            deadband = Deadband(
+                self.hass.loop,
                 update_handler,
+                description.deadband,
+                description.deadband_relative,
+                description.heartbeat.total_seconds() if description.heartbeat else None,
             )
-        )
+            update_handler = deadband.async_call
+
+        self.async_on_remove(self._ccb.async_subscribe_sensor(self.entity_description.key, update_handler))
         self.async_on_remove(
             async_dispatcher_connect(
                 self.hass,
@@ -447,13 +588,13 @@ class ComfoConnectSensor(SensorEntity):
                 self._handle_availability_update,
             )
         )
-        await self._ccb.register_sensor(self.entity_description.ccb_sensor)
+        self.async_on_remove(self._ccb.async_request_sensor(self.entity_description.ccb_sensor))
 
     @callback
     def _handle_availability_update(self, available: bool) -> None:
         """Handle bridge availability changes."""
         self._attr_available = available
-        self.async_write_ha_state()
+        self._ccb.frame_writer.async_schedule(self)
 
     @callback
     def _handle_update(self, value):
@@ -465,8 +606,103 @@ class ComfoConnectSensor(SensorEntity):
             value,
         )
 
-        if self.entity_description.mapping:
-            self._attr_native_value = self.entity_description.mapping(value)
-        else:
-            self._attr_native_value = value
-        self.async_write_ha_state()
+        self._update_value(value)
+        self._attr_extra_state_attributes = None
+        self._ccb.frame_writer.async_schedule(self)
+
+    @callback
+    def _handle_aggregate(self, aggregate: Aggregate) -> None:
+        """Handle the aggregate of a window of updates."""
+        self._attr_native_value = round(aggregate.mean, 2)
+        self._attr_extra_state_attributes = {
+            ATTR_MIN: aggregate.min,
+            ATTR_MAX: aggregate.max,
+            ATTR_LAST: aggregate.last,
+            ATTR_SAMPLES: aggregate.count,
+        }
+        self._ccb.frame_writer.async_schedule(self)
+
+    def _update_value(self, value) -> None:
+        """Set the value of the sensor."""
+        decode = self._decode
+        self._attr_native_value = value if decode is None else decode(value)
+
+
+class ComfoConnectLinkSensor(SensorEntity):
+    """Representation of a sensor about the connection with the bridge, which is read from memory on every poll."""
+
+    _attr_has_entity_name = True
+    entity_description: ComfoconnectLinkSensorEntityDescription
+
+    def __init__(
+        self,
+        ccb: ComfoConnectBridge,
+        config_entry: ConfigEntry,
+        description: ComfoconnectLinkSensorEntityDescription,
+    ) -> None:
+        """Initialize the ComfoConnect link sensor."""
+        self._ccb = ccb
+        self.entity_description = description
+        self._attr_unique_id = f"{self._ccb.uuid}-{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, config_entry.data[CONF_DEVICE_INFO][DEVICE_INFO_BRIDGE_SERIAL])},
+        )
+
+    async def async_update(self) -> None:
+        """Read the value from the bridge."""
+        self._attr_native_value = self.entity_description.value_fn(self._ccb, self.hass.loop.time())
+
+
+class ComfoConnectAlarmsSensor(SensorEntity):
+    """Representation of the number of active errors of all nodes, with their messages by node id."""
+
+    _attr_should_poll = False
+    _attr_has_entity_name = True
+    _attr_name = "Active alarms"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, ccb: ComfoConnectBridge) -> None:
+        """Initialize the ComfoConnect alarms sensor."""
+        self._ccb = ccb
+        self._attr_unique_id = f"{self._ccb.uuid}-active_alarms"
+        self._attr_available = ccb.is_available
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, self._ccb.uuid)},
+        )
+        self._update_alarms()
+
+    async def async_added_to_hass(self) -> None:
+        """Register for alarm updates."""
+        self.async_on_remove(functools.partial(self._ccb.frame_writer.async_discard, self))
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_COMFOCONNECT_ALARMS.format(self._ccb.uuid),
+                self._handle_alarms_update,
+            )
+        )
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_COMFOCONNECT_AVAILABILITY.format(self._ccb.uuid),
+                self._handle_availability_update,
+            )
+        )
+
+    @callback
+    def _handle_availability_update(self, available: bool) -> None:
+        """Handle bridge availability changes."""
+        self._attr_available = available
+        self._ccb.frame_writer.async_schedule(self)
+
+    @callback
+    def _handle_alarms_update(self, node_id: int) -> None:
+        """Handle a change of the active errors of a node."""
+        self._update_alarms()
+        self._ccb.frame_writer.async_schedule(self)
+
+    def _update_alarms(self) -> None:
+        """Set the state from the active errors of all nodes."""
+        alarms = self._ccb.alarms
+        self._attr_native_value = sum(len(errors) for errors in alarms.values())
+        self._attr_extra_state_attributes = {ATTR_ERRORS: {node_id: list(errors.values()) for node_id, errors in sorted(alarms.items())}}
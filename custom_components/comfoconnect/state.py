@@ -0,0 +1,153 @@
+"""The decoded state of a ventilation unit, shared by all entities of a bridge."""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, fields
+from typing import TYPE_CHECKING, Any
+
+from aiocomfoconnect.const import ComfoCoolMode, VentilationMode, VentilationSetting, VentilationSpeed, VentilationTemperatureProfile
+from aiocomfoconnect.sensors import (
+    SENSOR_BYPASS_ACTIVATION_STATE,
+    SENSOR_COMFOCOOL_STATE,
+    SENSOR_FAN_SPEED_MODE,
+    SENSOR_OPERATING_MODE,
+    SENSOR_PROFILE_TEMPERATURE,
+)
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.util.percentage import ordered_list_item_to_percentage
+
+from .decoders import compile_lookup
+
+if TYPE_CHECKING:
+    from . import ComfoConnectBridge
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class VentilationState:
+    """The latest decoded value of the sensors and settings that the entities show, None until it's known."""
+
+    # Decoded from the sensors that the bridge pushes.
+    mode: str | None = None
+    fan_speed: int | None = None
+    bypass_mode: str | None = None
+    temperature_profile: str | None = None
+    comfocool: str | None = None
+    # Read by the settings coordinator, since the bridge doesn't push them.
+    balance_mode: str | None = None
+    boost_timeout: str | None = None
+
+
+# The names of the fields, which are the only fields that can be set and observed.
+STATE_FIELDS = frozenset(field.name for field in fields(VentilationState))
+
+# The speeds that the fan shows as a percentage, and the speed of every value of the fan speed sensor.
+FAN_SPEEDS = [VentilationSpeed.LOW, VentilationSpeed.MEDIUM, VentilationSpeed.HIGH]
+FAN_SPEED_MAPPING = {
+    0: VentilationSpeed.AWAY,
+    1: VentilationSpeed.LOW,
+    2: VentilationSpeed.MEDIUM,
+    3: VentilationSpeed.HIGH,
+}
+# The percentage of every value of the fan speed sensor, computed once.
+FAN_SPEED_PERCENTAGES = {
+    value: ordered_list_item_to_percentage(FAN_SPEEDS, speed) if speed in FAN_SPEEDS else 0 for value, speed in FAN_SPEED_MAPPING.items()
+}
+
+# The fields that are decoded from a sensor, with the sensor id and the decoder of the field. Every entity that shows
+# a field gets the same value, whichever platform was set up first.
+SENSOR_FIELDS: dict[str, tuple[int, Callable[[Any], Any]]] = {
+    "mode": (SENSOR_OPERATING_MODE, compile_lookup({-1: VentilationMode.AUTO}, VentilationMode.MANUAL)),
+    "fan_speed": (SENSOR_FAN_SPEED_MODE, compile_lookup(FAN_SPEED_PERCENTAGES)),
+    "bypass_mode": (
+        SENSOR_BYPASS_ACTIVATION_STATE,
+        compile_lookup({0: VentilationSetting.AUTO, 1: VentilationSetting.ON, 2: VentilationSetting.OFF}),
+    ),
+    "temperature_profile": (
+        SENSOR_PROFILE_TEMPERATURE,
+        compile_lookup({0: VentilationTemperatureProfile.NORMAL, 1: VentilationTemperatureProfile.COOL, 2: VentilationTemperatureProfile.WARM}),
+    ),
+    "comfocool": (SENSOR_COMFOCOOL_STATE, compile_lookup({0: ComfoCoolMode.OFF, 1: ComfoCoolMode.AUTO})),
+}
+
+
+class VentilationStateStore:
+    """
+    Keep the decoded state of a bridge, and tell the observers of a field when its value changes.
+
+    A field that is decoded from a sensor is bound to it by the first entity that observes it, so every update of
+    the sensor is decoded once, however many entities show it. Its value starts out as the decoded value that was
+    cached before a restart, and the field is stale until the bridge sends a fresh one.
+    """
+
+    __slots__ = ("state", "stale", "_ccb", "_observers", "_bound")
+
+    def __init__(self, ccb: ComfoConnectBridge) -> None:
+        """Initialize the store."""
+        self.state = VentilationState()
+        # The fields that still have the value from before a restart.
+        self.stale: set[str] = set()
+        self._ccb = ccb
+        # The observers of every field, as tuples, like the listeners of the sensors of the bridge.
+        self._observers: dict[str, tuple[Callable[[Any], None], ...]] = {}
+        # The fields that are bound to their sensor, by name.
+        self._bound: set[str] = set()
+
+    @callback
+    def async_observe(self, field: str, observer: Callable[[Any], None]) -> CALLBACK_TYPE:
+        """Call observer with every new value of a field, and return a function to stop."""
+        if field not in STATE_FIELDS:
+            raise ValueError(f"Unknown field: {field}")
+        self._observers[field] = (*self._observers.get(field, ()), observer)
+
+        @callback
+        def stop() -> None:
+            observers = list(self._observers.get(field, ()))
+            observers.remove(observer)
+            if observers:
+                self._observers[field] = tuple(observers)
+            else:
+                self._observers.pop(field, None)
+
+        return stop
+
+    @callback
+    def async_observe_sensor(self, field: str, observer: Callable[[Any], None]) -> CALLBACK_TYPE:
+        """Observe a field that is decoded from a sensor, and bind the field to the sensor when it isn't yet."""
+        if field not in SENSOR_FIELDS:
+            raise ValueError(f"Not a sensor field: {field}")
+        stop = self.async_observe(field, observer)
+        if field not in self._bound:
+            self._bound.add(field)
+            sensor_id, decode = SENSOR_FIELDS[field]
+            if (value := self._ccb.sensor_cache.get(sensor_id)) is not None:
+                setattr(self.state, field, decode(value))
+                self.stale.add(field)
+            # The store lives as long as the bridge, so the binding is never removed.
+            self._ccb.async_subscribe_sensor(sensor_id, lambda value: self.async_set(field, decode(value)))
+        return stop
+
+    @callback
+    def async_set(self, field: str, value: Any) -> None:
+        """Set a field, and tell its observers when the value changed or is no longer stale."""
+        if value is None:
+            return
+        if field in self.stale:
+            self.stale.discard(field)
+        elif getattr(self.state, field) == value:
+            return
+        setattr(self.state, field, value)
+        for observer in self._observers.get(field, ()):
+            try:
+                observer(value)
+            except Exception:
+                _LOGGER.exception("Error handling a change of %s", field)
+
+    @callback
+    def async_update(self, values: Mapping[str, Any]) -> None:
+        """Set the fields that were read together."""
+        for field, value in values.items():
+            self.async_set(field, value)
@@ -0,0 +1,46 @@
+"""Benchmarks that compare a hot path with the implementation it replaced, for tests."""
+
+from __future__ import annotations
+
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+
+async def async_create_hass(config_dir) -> HomeAssistant:
+    """Create Home Assistant on the loop of a runner, since a benchmark runs its rounds outside of the loop."""
+    return HomeAssistant(str(config_dir))
+
+
+def benchmark_comparison(
+    benchmark,
+    before: Callable[[], Any],
+    after: Callable[[], Any],
+    *,
+    rounds: int = 5,
+    warmup_rounds: int = 1,
+) -> tuple[float, float]:
+    """
+    Benchmark after with the benchmark fixture, time before with the same rounds, and return both medians in seconds.
+
+    Both medians are recorded in the extra info of the benchmark, so the report shows what the change gained. Since
+    the benchmark fixture is used, the comparison only runs with make bench.
+    """
+    for _ in range(warmup_rounds):
+        before()
+    durations = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        before()
+        durations.append(time.perf_counter() - start)
+    before_median = statistics.median(durations)
+
+    benchmark.pedantic(after, rounds=rounds, warmup_rounds=warmup_rounds)
+    after_median = benchmark.stats.stats.median
+
+    benchmark.extra_info["before_median_seconds"] = before_median
+    benchmark.extra_info["after_median_seconds"] = after_median
+    return before_median, after_median
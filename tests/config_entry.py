@@ -0,0 +1,52 @@
+"""Config entries that Home Assistant sets up like it does on startup, for tests."""
+
+from __future__ import annotations
+
+import inspect
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any
+
+from custom_components.comfoconnect.const import DOMAIN
+from fake_bridge import BRIDGE_UUID, ENTRY_ID
+from homeassistant import loader
+from homeassistant.config_entries import ConfigEntries, ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity, restore_state, translation
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers import issue_registry as ir
+
+
+async def async_setup_config_entries(hass: HomeAssistant) -> None:
+    """Load the helpers that Home Assistant loads before it sets up the config entries."""
+    # The requirements of the integration are installed already.
+    hass.config.skip_pip = True
+    loader.async_setup(hass)
+    entity.async_setup(hass)
+    translation.async_setup(hass)
+    await dr.async_load(hass)
+    await er.async_load(hass)
+    await ir.async_load(hass)
+    await restore_state.async_load(hass)
+    hass.config_entries = ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+
+
+def create_config_entry(data: Mapping[str, Any], entry_id: str = ENTRY_ID) -> ConfigEntry:
+    """Return a config entry of the integration with the given data."""
+    kwargs = {
+        "version": 1,
+        "minor_version": 1,
+        "domain": DOMAIN,
+        "title": BRIDGE_UUID,
+        "data": dict(data),
+        "source": "user",
+        "options": {},
+        "unique_id": BRIDGE_UUID,
+        "entry_id": entry_id,
+    }
+    # Newer versions of Home Assistant require the keys the entry was discovered with.
+    if "discovery_keys" in inspect.signature(ConfigEntry).parameters:
+        kwargs["discovery_keys"] = MappingProxyType({})
+    return ConfigEntry(**kwargs)
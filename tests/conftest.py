@@ -1,7 +1,20 @@
 """Pytest configuration."""
 
 import sys
+from collections.abc import AsyncGenerator
 from pathlib import Path
 
+import pytest
+
 # Make custom_components importable, since it isn't installed as a package.
 sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from homeassistant.core import HomeAssistant
+
+
+@pytest.fixture
+async def hass(tmp_path) -> AsyncGenerator[HomeAssistant, None]:
+    """Return a Home Assistant instance that isn't started, and stop it after the test."""
+    hass = HomeAssistant(str(tmp_path))
+    yield hass
+    await hass.async_stop(force=True)
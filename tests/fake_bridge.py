@@ -0,0 +1,177 @@
+"""A ComfoConnectBridge that answers from memory instead of the network, for tests."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+from aiocomfoconnect.exceptions import AioComfoConnectNotConnected, AioComfoConnectNotReachable, AioComfoConnectTimeout, ComfoConnectError
+from aiocomfoconnect.properties import PROPERTY_FIRMWARE_VERSION, PROPERTY_MODEL, PROPERTY_NAME
+from aiocomfoconnect.protobuf import zehnder_pb2
+from custom_components.comfoconnect import ComfoConnectBridge
+from custom_components.comfoconnect.cache import SensorValueCache
+from homeassistant.core import HomeAssistant
+
+BRIDGE_HOST = "192.0.2.1"
+BRIDGE_UUID = "00000000000000000000000000000001"
+BRIDGE_SERIAL = "DEM0123456789"
+ENTRY_ID = "01JCOMFOCONNECTENTRY000000"
+
+# The properties of the ventilation unit that the fake knows about.
+PROPERTIES = {
+    PROPERTY_MODEL.property_id: "ComfoAirQ 450",
+    PROPERTY_FIRMWARE_VERSION.property_id: 3222278144,
+    PROPERTY_NAME.property_id: "ComfoAirQ",
+}
+
+# The settings of the ventilation unit that the bridge doesn't push.
+SETTINGS = {
+    "balance_mode": "balance",
+    "boost_timeout": 0,
+}
+
+
+def alarm_notification(*error_ids: int) -> SimpleNamespace:
+    """Return the alarm notification that the bridge sends for a node with these errors."""
+    errors = bytearray(8)
+    for error_id in error_ids:
+        errors[error_id // 8] |= 1 << (error_id % 8)
+    # The errors are numbered differently up to firmware 1.4.0, see aiocomfoconnect.const.ERRORS_140.
+    return SimpleNamespace(swProgramVersion=PROPERTIES[PROPERTY_FIRMWARE_VERSION.property_id] + 1, errors=bytes(errors))
+
+
+class FakeBridge(ComfoConnectBridge):
+    """
+    A bridge that simulates the round-trip of every request with a delay.
+
+    Requests can be in flight at the same time, like they can on a real bridge, and the fake keeps track of
+    what it was asked so tests can make assertions about the traffic.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        latency: float = 0.0,
+        sensor_cache: SensorValueCache | None = None,
+        host: str = BRIDGE_HOST,
+        uuid: str = BRIDGE_UUID,
+    ) -> None:
+        """Initialize the fake bridge."""
+        super().__init__(hass, host, uuid, sensor_cache or SensorValueCache(hass, ENTRY_ID))
+        self.latency = latency
+        self.online = True
+        self.connected = False
+        # The address the bridge is really at, connecting to another one fails.
+        self.address = host
+        # A bridge that hangs is connected, but doesn't answer.
+        self.hangs = False
+        # The error that the bridge answers connects and keepalives with, when it refuses us.
+        self.refuses: ComfoConnectError | None = None
+        self.probes: list[float] = []
+        # The start and end time of every connection attempt, and whether it worked.
+        self.connect_attempts: list[tuple[float, float, bool]] = []
+        self.requests: list[str] = []
+        self.rmi_messages: list[bytes] = []
+        self.subscriptions: set[int] = set()
+        # The product id of every node on the bus, by node id, which the bridge announces when it's asked for them.
+        self.bus_nodes: dict[int, int] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _request(self, name: str) -> None:
+        """Simulate the round-trip of a request."""
+        self.requests.append(name)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+    async def connect(self, uuid: str):
+        """Connect to the bridge, which only works when it's online."""
+        start = self.hass.loop.time()
+        await self._request("connect")
+        reachable = self.online and self.host == self.address
+        self.connect_attempts.append((start, self.hass.loop.time(), reachable and self.refuses is None))
+        if not reachable:
+            raise AioComfoConnectNotReachable("The bridge is offline")
+        if self.refuses is not None:
+            raise self.refuses
+        self.connected = True
+
+    async def disconnect(self):
+        """Disconnect from the bridge."""
+        self.connected = False
+
+    def drop(self) -> None:
+        """Simulate that the bridge drops off the network."""
+        self.online = False
+        self.connected = False
+
+    def move(self, address: str) -> None:
+        """Simulate that the bridge got another address from DHCP."""
+        self.address = address
+        self.connected = False
+
+    def alarm(self, node_id: int, *error_ids: int) -> None:
+        """Simulate that the bridge sends the active errors of a node."""
+        self._alarm_callback(node_id, alarm_notification(*error_ids))
+
+    def receive(self) -> None:
+        """Simulate that the bridge pushes a message."""
+        self.last_seen = self.hass.loop.time()
+
+    async def cmd_time_request(self):
+        """Answer a keepalive."""
+        self.probes.append(self.hass.loop.time())
+        await self._request("time")
+        if not self.connected:
+            raise AioComfoConnectNotConnected("Not connected")
+        if self.refuses is not None:
+            raise self.refuses
+        if self.hangs:
+            raise AioComfoConnectTimeout("No answer")
+
+    async def cmd_rpdo_request(self, pdid: int, pdo_type: int = 1, zone: int = 1, timeout=None):
+        """Subscribe to, or unsubscribe from a sensor."""
+        await self._request("rpdo")
+        if timeout == 0:
+            self.subscriptions.discard(pdid)
+        else:
+            self.subscriptions.add(pdid)
+
+    async def cmd_node_request(self):
+        """Announce the nodes on the bus one by one, after the request was sent."""
+        await self._request("nodes")
+        for index, (node_id, product_id) in enumerate(self.bus_nodes.items(), start=1):
+            notification = SimpleNamespace(nodeId=node_id, productId=product_id, zoneId=1, mode=zehnder_pb2.CnNodeNotification.NODE_NORMAL)
+            self.hass.loop.call_later(index * self.latency, self._process_node_notification, notification)
+
+    async def cmd_rmi_request(self, message, node_id=None):
+        """Answer a RMI request with an empty schedule."""
+        self.rmi_messages.append(message)
+        await self._request("rmi")
+        if self.hangs:
+            raise AioComfoConnectTimeout("No answer")
+        return SimpleNamespace(message=bytes(14))
+
+    async def cmd_version_request(self):
+        """Return the version of the bridge."""
+        await self._request("version")
+        return SimpleNamespace(serialNumber=BRIDGE_SERIAL, gatewayVersion=1075838976)
+
+    async def get_property(self, prop, node_id=None):
+        """Return a property of the ventilation unit."""
+        await self._request("property")
+        return PROPERTIES[prop.property_id]
+
+    async def get_balance_mode(self):
+        """Return the balance mode."""
+        await self._request("balance_mode")
+        return SETTINGS["balance_mode"]
+
+    async def get_boost(self):
+        """Return the remaining boost time."""
+        await self._request("boost_timeout")
+        return SETTINGS["boost_timeout"]
@@ -0,0 +1,156 @@
+"""A ComfoConnect bridge on a local TCP port, that speaks enough of the protocol for aiocomfoconnect, for benchmarks."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import struct
+
+from aiocomfoconnect.bridge import Message
+from aiocomfoconnect.const import ProductId
+from aiocomfoconnect.properties import PROPERTY_FIRMWARE_VERSION, PROPERTY_MODEL, PROPERTY_NAME
+from aiocomfoconnect.protobuf import zehnder_pb2
+from fake_bridge import BRIDGE_SERIAL, BRIDGE_UUID
+
+Operation = zehnder_pb2.GatewayOperation
+
+# The answers to the property reads, by (unit, subunit, property id).
+PROPERTIES = {
+    (PROPERTY_MODEL.unit, PROPERTY_MODEL.subunit, PROPERTY_MODEL.property_id): b"ComfoAirQ 450\x00",
+    (PROPERTY_FIRMWARE_VERSION.unit, PROPERTY_FIRMWARE_VERSION.subunit, PROPERTY_FIRMWARE_VERSION.property_id): struct.pack("<I", 3222278144),
+    (PROPERTY_NAME.unit, PROPERTY_NAME.subunit, PROPERTY_NAME.property_id): b"ComfoAirQ\x00",
+}
+
+# The answer to a read of a schedule, which means that the setting isn't active.
+SCHEDULE_INACTIVE = bytes.fromhex("0000000000580200000000000001")
+
+
+class TcpBridge:
+    """
+    A bridge that listens on a local port, like a ComfoConnect LAN C listens on port 56747.
+
+    It starts a session for anyone, announces a ComfoAirQ, confirms sensor registrations with the current value of the
+    sensor, answers property and schedule reads, and can push sensor updates at a given rate.
+    """
+
+    def __init__(self, uuid: str = BRIDGE_UUID, rpdo_latency: float = 0) -> None:
+        """Initialize the bridge, that takes rpdo_latency seconds to confirm a sensor registration."""
+        self.uuid = uuid
+        self.port: int | None = None
+        self.rpdo_latency = rpdo_latency
+        self.subscriptions: dict[int, int] = {}
+        # How often each sensor was registered, by sensor id.
+        self.registrations: dict[int, int] = {}
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._local_uuid = "00" * 16
+        self._values = itertools.count()
+
+    async def start(self) -> None:
+        """Start listening on a free port."""
+        self._server = await asyncio.start_server(self._handle_client, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Stop listening, and close all connections."""
+        self.drop()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def drop(self) -> None:
+        """Close all connections, like the bridge does when it reboots."""
+        for writer in self._writers:
+            writer.close()
+        self._writers.clear()
+
+    async def push(self, count: int, rate: float | None = None, value: int | None = None, sensors: int | None = None) -> None:
+        """Push count updates of the first sensors that were subscribed in turn, at rate updates per second or as fast as possible."""
+        pdids = itertools.cycle(list(self.subscriptions)[:sensors])
+        for index in range(count):
+            pdid = next(pdids)
+            self._send_pdo(pdid, next(self._values) % 100 if value is None or index < count - 1 else value)
+            if rate:
+                await asyncio.sleep(1 / rate)
+            elif index % 100 == 0:
+                # Let the transport flush, like a real network would.
+                await asyncio.sleep(0)
+
+        for writer in self._writers:
+            await writer.drain()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer the requests of a client until it disconnects."""
+        self._writers.add(writer)
+        try:
+            while True:
+                length = int.from_bytes(await reader.readexactly(4), byteorder="big")
+                request = Message.decode(await reader.readexactly(length))
+                self._local_uuid = request.src
+                self._answer(writer, request)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _answer(self, writer: asyncio.StreamWriter, request: Message) -> None:
+        """Answer a request."""
+        reference = request.cmd.reference
+        match request.cmd.type:
+            case Operation.StartSessionRequestType:
+                self._send(writer, Operation.StartSessionConfirmType, zehnder_pb2.StartSessionConfirm(), reference)
+                self._send_node(writer)
+            case Operation.CnNodeRequestType:
+                self._send_node(writer)
+            case Operation.CnTimeRequestType:
+                self._send(writer, Operation.CnTimeConfirmType, zehnder_pb2.CnTimeConfirm(currentTime=0), reference)
+            case Operation.VersionRequestType:
+                version = zehnder_pb2.VersionConfirm(gatewayVersion=1075838976, serialNumber=BRIDGE_SERIAL, comfoNetVersion=0)
+                self._send(writer, Operation.VersionConfirmType, version, reference)
+            case Operation.CnRmiRequestType:
+                response = zehnder_pb2.CnRmiResponse(result=0, message=self._rmi(request.msg.message))
+                self._send(writer, Operation.CnRmiResponseType, response, reference)
+            case Operation.CnRpdoRequestType:
+                if self.rpdo_latency:
+                    asyncio.get_running_loop().call_later(self.rpdo_latency, self._confirm_rpdo, writer, request)
+                else:
+                    self._confirm_rpdo(writer, request)
+
+    def _confirm_rpdo(self, writer: asyncio.StreamWriter, request: Message) -> None:
+        """Confirm a sensor registration, and send the current value of the sensor."""
+        if writer not in self._writers:
+            return
+        self._send(writer, Operation.CnRpdoConfirmType, zehnder_pb2.CnRpdoConfirm(), request.cmd.reference)
+        if request.msg.timeout == 0:
+            self.subscriptions.pop(request.msg.pdid, None)
+        else:
+            self.registrations[request.msg.pdid] = self.registrations.get(request.msg.pdid, 0) + 1
+            self.subscriptions[request.msg.pdid] = request.msg.type
+            self._send_pdo(request.msg.pdid, next(self._values) % 100)
+
+    @staticmethod
+    def _rmi(message: bytes) -> bytes:
+        """Return the answer to a RMI request."""
+        if message[0] == 0x01:
+            return PROPERTIES.get((message[1], message[2], message[4]), b"\x00")
+        if message[0] == 0x83:
+            return SCHEDULE_INACTIVE
+        return b""
+
+    def _send_node(self, writer: asyncio.StreamWriter) -> None:
+        """Announce the ventilation unit."""
+        node = zehnder_pb2.CnNodeNotification(nodeId=1, productId=ProductId.COMFOAIRQ, zoneId=1, mode=zehnder_pb2.CnNodeNotification.NODE_NORMAL)
+        self._send(writer, Operation.CnNodeNotificationType, node)
+
+    def _send_pdo(self, pdid: int, value: int) -> None:
+        """Send a sensor update to all clients."""
+        notification = zehnder_pb2.CnRpdoNotification(pdid=pdid, data=value.to_bytes(4, byteorder="little", signed=True))
+        for writer in self._writers:
+            self._send(writer, Operation.CnRpdoNotificationType, notification)
+
+    def _send(self, writer: asyncio.StreamWriter, operation: int, msg, reference: int | None = None) -> None:
+        """Send a message to a client."""
+        cmd = zehnder_pb2.GatewayOperation(type=operation, result=Operation.OK)
+        if reference is not None:
+            cmd.reference = reference
+        writer.write(Message(cmd, msg, self.uuid, self._local_uuid).encode())
@@ -0,0 +1,98 @@
+"""Tests for the alarms of the ComfoConnectBridge."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from aiocomfoconnect import ComfoConnect
+from comparison import async_create_hass, benchmark_comparison
+from custom_components.comfoconnect import SIGNAL_COMFOCONNECT_ALARMS
+from custom_components.comfoconnect.const import ATTR_ACTIVE, ATTR_ERROR_ID, ATTR_NODE_ID, CONF_UUID, EVENT_ALARM
+from fake_bridge import BRIDGE_UUID, FakeBridge, alarm_notification
+from homeassistant.core import Event, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+# How often the fake bridge repeats the same alarm in the benchmark.
+BENCHMARK_ALARMS = 20_000
+
+
+# The errors we raise, see aiocomfoconnect.const.ERRORS.
+ERROR_OVERHEATING = 21
+ERROR_TEMP_HRU = 22
+
+
+async def test_only_raised_and_cleared_errors_fire_events(hass, caplog) -> None:
+    """Test that an alarm is diffed against the active errors of the node, and that repeats are ignored."""
+    caplog.set_level(logging.WARNING)
+    bridge = FakeBridge(hass)
+    events: list[Event] = []
+    updated_nodes: list[int] = []
+    hass.bus.async_listen(EVENT_ALARM, callback(lambda event: events.append(event)))
+    async_dispatcher_connect(hass, SIGNAL_COMFOCONNECT_ALARMS.format(BRIDGE_UUID), updated_nodes.append)
+
+    bridge.alarm(1, ERROR_OVERHEATING)
+    bridge.alarm(1, ERROR_OVERHEATING)
+    bridge.alarm(1, ERROR_OVERHEATING, ERROR_TEMP_HRU)
+    bridge.alarm(2)
+    assert set(bridge.alarms[1]) == {ERROR_OVERHEATING, ERROR_TEMP_HRU}
+    assert 2 not in bridge.alarms
+
+    bridge.alarm(1, ERROR_TEMP_HRU)
+    bridge.alarm(1)
+    await hass.async_block_till_done()
+
+    assert [(event.data[ATTR_ERROR_ID], event.data[ATTR_ACTIVE]) for event in events] == [
+        (ERROR_OVERHEATING, True),
+        (ERROR_TEMP_HRU, True),
+        (ERROR_OVERHEATING, False),
+        (ERROR_TEMP_HRU, False),
+    ]
+    assert {(event.data[CONF_UUID], event.data[ATTR_NODE_ID]) for event in events} == {(BRIDGE_UUID, 1)}
+    assert updated_nodes == [1, 1, 1, 1]
+    assert bridge.alarms == {}
+    # One warning for each of the two errors that were raised, not one for every repeat.
+    assert len(caplog.records) == 2
+
+
+def test_benchmark_repeated_alarm(benchmark, tmp_path) -> None:
+    """
+    Compare the repeats of an alarm per second that the bridge handles now with the callback it replaced.
+
+    The callback built a message of all errors and logged a warning for every alarm, while the bridge now drops a
+    repeat before it's decoded.
+    """
+
+    def string_building_alarm_callback(node_id, errors) -> None:
+        message = f"Alarm received for Node {node_id}:\n"
+        for error_id, error in errors.items():
+            message += f"* {error_id}: {error}\n"
+        logging.getLogger("custom_components.comfoconnect").warning(message)
+
+    with asyncio.Runner() as runner:
+        hass = runner.run(async_create_hass(tmp_path))
+        bridge = FakeBridge(hass)
+        events: list[Event] = []
+        hass.bus.async_listen(EVENT_ALARM, callback(lambda event: events.append(event)))
+        alarm = alarm_notification(ERROR_OVERHEATING, ERROR_TEMP_HRU)
+
+        # Before: decode every alarm, and log all its errors, with a bridge of its own.
+        string_building_bridge = FakeBridge(hass)
+        string_building_bridge._alarm_callback_fn = string_building_alarm_callback
+
+        def decode_and_log() -> None:
+            for _ in range(BENCHMARK_ALARMS):
+                ComfoConnect._alarm_callback(string_building_bridge, 1, alarm)
+
+        # After: only the first alarm is decoded and diffed.
+        def drop_repeats() -> None:
+            for _ in range(BENCHMARK_ALARMS):
+                bridge._alarm_callback(1, alarm)
+
+        before, after = benchmark_comparison(benchmark, decode_and_log, drop_repeats)
+        runner.run(hass.async_block_till_done())
+
+    benchmark.extra_info["string_building_alarms_per_second"] = round(BENCHMARK_ALARMS / before)
+    benchmark.extra_info["diffed_alarms_per_second"] = round(BENCHMARK_ALARMS / after)
+    assert len(events) == 2
+    assert after < before
@@ -0,0 +1,278 @@
+"""
+Benchmarks of the integration against a bridge on a local TCP port.
+
+Every benchmark asserts a budget, so CI fails when a change makes a hot path a lot slower. The budgets are set with
+plenty of headroom for slow CI runners, since they are meant to catch regressions, not small variations.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import tracemalloc
+
+import custom_components.comfoconnect as integration_module
+import pytest
+from aiocomfoconnect.sensors import SENSORS
+from config_entry import async_setup_config_entries, create_config_entry
+from custom_components.comfoconnect import ComfoConnectBridge
+from custom_components.comfoconnect.const import CONF_DEVICE_INFO, CONF_INSTALLED_OPTIONS, CONF_LOCAL_UUID, CONF_UUID, DOMAIN
+from fake_bridge import BRIDGE_UUID, ENTRY_ID
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_HOST, EVENT_STATE_CHANGED
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from tcp_bridge import TcpBridge
+
+LOCAL_UUID = "00000000000000000000000000001337"
+
+# How many sensor updates the bridge pushes in one round of the throughput benchmark.
+THROUGHPUT_UPDATES = 5_000
+
+# How many sensors the bridge pushes in a burst, and how many updates of every sensor.
+BURST_SENSORS = 40
+BURST_UPDATES_PER_SENSOR = 5
+
+# The budgets.
+SETUP_BUDGET = 0.5  # seconds, from adding the config entry until it's loaded and the sensors are registered
+THROUGHPUT_BUDGET = 5_000  # sensor updates per second, from the socket to the state machine
+RECONNECT_BUDGET = 2.0  # seconds, from a dropped connection until sensor updates arrive again
+MEMORY_BUDGET = 32 * 1024  # bytes per entity
+BURST_STATE_CHANGES_BUDGET = BURST_SENSORS  # state changes per burst, since every entity writes once per iteration of the loop
+
+
+class Integration:
+    """The integration, set up from a config entry by Home Assistant against a TcpBridge."""
+
+    def __init__(self, hass: HomeAssistant, tcp_bridge: TcpBridge) -> None:
+        """Initialize the integration."""
+        self.hass = hass
+        self.tcp_bridge = tcp_bridge
+
+    @property
+    def bridge(self) -> ComfoConnectBridge:
+        """Return the bridge that async_setup_entry connected to."""
+        return self.hass.data[DOMAIN].bridges[ENTRY_ID]
+
+    @property
+    def entities(self) -> list[er.RegistryEntry]:
+        """Return the entities of the config entry."""
+        return er.async_entries_for_config_entry(er.async_get(self.hass), ENTRY_ID)
+
+    async def async_add(self) -> None:
+        """Add the config entry of the bridge, like the config flow does, and wait until it's set up."""
+        entry = create_config_entry({CONF_HOST: "127.0.0.1", CONF_UUID: BRIDGE_UUID, CONF_LOCAL_UUID: LOCAL_UUID})
+        await self.hass.config_entries.async_add(entry)
+        assert entry.state is ConfigEntryState.LOADED
+
+    async def async_wait_settled(self) -> None:
+        """Wait until the installed options are detected, and the entry is reloaded without the other options."""
+        entry = self.hass.config_entries.async_get_entry(ENTRY_ID)
+        while CONF_INSTALLED_OPTIONS not in entry.data:
+            await asyncio.sleep(0.01)
+        await self.hass.async_block_till_done()
+        assert entry.state is ConfigEntryState.LOADED
+
+    async def async_remove(self) -> None:
+        """Remove the config entry, with its devices, entities and cached sensor values."""
+        await self.hass.config_entries.async_remove(ENTRY_ID)
+
+    async def async_setup(self) -> None:
+        """Set up the config entry again, like Home Assistant does when it starts with the device information cached."""
+        assert await self.hass.config_entries.async_setup(ENTRY_ID)
+
+    async def async_unload(self) -> None:
+        """Unload the config entry, like Home Assistant does when it stops."""
+        assert await self.hass.config_entries.async_unload(ENTRY_ID)
+
+    async def async_wait_for_updates(self, count: int) -> None:
+        """Wait until the bridge has passed on count sensor updates."""
+        received = 0
+        done = asyncio.Event()
+
+        def update_callback(value) -> None:
+            nonlocal received
+            received += 1
+            if received == count:
+                done.set()
+
+        unsubscribes = [self.bridge.async_subscribe_sensor(sensor_id, update_callback) for sensor_id in self.tcp_bridge.subscriptions]
+        try:
+            await done.wait()
+        finally:
+            for unsubscribe in unsubscribes:
+                unsubscribe()
+
+
+async def _async_start(tmp_path, monkeypatch) -> Integration:
+    """Start Home Assistant and the bridge, without adding the config entry."""
+    hass = HomeAssistant(str(tmp_path))
+    await async_setup_config_entries(hass)
+
+    tcp_bridge = TcpBridge()
+    await tcp_bridge.start()
+
+    def local_bridge(hass: HomeAssistant, host: str, uuid: str, sensor_cache) -> ComfoConnectBridge:
+        bridge = ComfoConnectBridge(hass, host, uuid, sensor_cache)
+        bridge.PORT = tcp_bridge.port
+        # The local bridge doesn't send the invalid values that the hold works around.
+        bridge.sensor_delay = 0
+        return bridge
+
+    monkeypatch.setattr(integration_module, "ComfoConnectBridge", local_bridge)
+    return Integration(hass, tcp_bridge)
+
+
+async def _async_stop(integration: Integration) -> None:
+    """Stop Home Assistant and the bridge."""
+    await integration.hass.async_stop(force=True)
+    await integration.tcp_bridge.stop()
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["first_start", "cached_device_info"])
+def test_benchmark_setup(benchmark, tmp_path, monkeypatch, cached: bool) -> None:
+    """
+    Benchmark async_setup_entry, from adding the config entry until it's loaded and the sensors are registered.
+
+    On the first start the device information is fetched before the platforms are set up, and the installed options
+    are detected in the background. After that, the devices are registered from the cached device information, which
+    is refreshed in the background.
+    """
+    with asyncio.Runner() as runner:
+        integration = runner.run(_async_start(tmp_path, monkeypatch))
+        if cached:
+            runner.run(integration.async_add())
+            runner.run(integration.async_wait_settled())
+            runner.run(integration.async_unload())
+            assert CONF_DEVICE_INFO in integration.hass.config_entries.async_get_entry(ENTRY_ID).data
+            setup, unload = integration.async_setup, integration.async_unload
+        else:
+            setup, unload = integration.async_add, integration.async_remove
+
+        def teardown() -> None:
+            benchmark.extra_info["entities"] = len(integration.entities)
+            benchmark.extra_info["sensors"] = len(integration.tcp_bridge.subscriptions)
+            runner.run(unload())
+
+        benchmark.pedantic(lambda: runner.run(setup()), teardown=teardown, rounds=10, warmup_rounds=1)
+        runner.run(_async_stop(integration))
+
+    assert benchmark.stats.stats.median < SETUP_BUDGET
+
+
+def test_benchmark_sensor_throughput(benchmark, tmp_path, monkeypatch) -> None:
+    """Benchmark how many sensor updates per second make it from the socket to the state machine."""
+    with asyncio.Runner() as runner:
+        integration = runner.run(_async_start(tmp_path, monkeypatch))
+        runner.run(integration.async_add())
+        runner.run(integration.async_wait_settled())
+
+        async def push() -> None:
+            waiter = asyncio.ensure_future(integration.async_wait_for_updates(THROUGHPUT_UPDATES))
+            await integration.tcp_bridge.push(THROUGHPUT_UPDATES)
+            await waiter
+            await integration.hass.async_block_till_done()
+
+        benchmark.pedantic(lambda: runner.run(push()), rounds=5, warmup_rounds=1)
+
+        runner.run(integration.async_unload())
+        runner.run(_async_stop(integration))
+
+    rate = THROUGHPUT_UPDATES / benchmark.stats.stats.median
+    benchmark.extra_info["updates_per_second"] = round(rate)
+    assert rate > THROUGHPUT_BUDGET
+
+
+def test_benchmark_state_write_burst(benchmark, tmp_path, monkeypatch) -> None:
+    """Benchmark how many state changes per second the state machine gets during a burst of updates of 40 sensors."""
+    with asyncio.Runner() as runner:
+        integration = runner.run(_async_start(tmp_path, monkeypatch))
+        runner.run(integration.async_add())
+        runner.run(integration.async_wait_settled())
+        state_changes = 0
+
+        @callback
+        def count_state_change(event) -> None:
+            nonlocal state_changes
+            state_changes += 1
+
+        integration.hass.bus.async_listen(EVENT_STATE_CHANGED, count_state_change)
+
+        # The entities that are enabled by default don't need 40 sensors, so the burst includes sensors without one.
+        for sensor in SENSORS.values():
+            if len(integration.tcp_bridge.subscriptions) >= BURST_SENSORS:
+                break
+            if sensor.id not in integration.tcp_bridge.subscriptions:
+                integration.bridge.async_request_sensor(sensor)
+                runner.run(integration.hass.async_block_till_done())
+        updates = BURST_SENSORS * BURST_UPDATES_PER_SENSOR
+
+        async def burst() -> None:
+            waiter = asyncio.ensure_future(integration.async_wait_for_updates(updates))
+            await integration.tcp_bridge.push(updates, sensors=BURST_SENSORS)
+            await waiter
+            await integration.hass.async_block_till_done()
+
+        benchmark.pedantic(lambda: runner.run(burst()), rounds=10, warmup_rounds=1)
+
+        runner.run(integration.async_unload())
+        runner.run(_async_stop(integration))
+
+    # The warmup round counts as well.
+    per_burst = state_changes / (benchmark.stats.stats.rounds + 1)
+    benchmark.extra_info["state_changes_per_burst"] = round(per_burst, 1)
+    benchmark.extra_info["state_changes_per_second"] = round(per_burst / benchmark.stats.stats.median)
+    benchmark.extra_info["updates_per_second"] = round(updates / benchmark.stats.stats.median)
+    assert per_burst < BURST_STATE_CHANGES_BUDGET
+
+
+def test_benchmark_reconnect(benchmark, tmp_path, monkeypatch) -> None:
+    """Benchmark how long it takes until sensor updates arrive again after the bridge dropped the connection."""
+    with asyncio.Runner() as runner:
+        integration = runner.run(_async_start(tmp_path, monkeypatch))
+        runner.run(integration.async_add())
+        runner.run(integration.async_wait_settled())
+
+        def settle() -> None:
+            # Let the bridge finish registering the sensors again, so the next drop doesn't race with it.
+            runner.run(asyncio.sleep(0.2))
+
+        async def reconnect() -> None:
+            waiter = asyncio.ensure_future(integration.async_wait_for_updates(1))
+            integration.tcp_bridge.drop()
+            await waiter
+
+        benchmark.pedantic(lambda: runner.run(reconnect()), setup=settle, rounds=5)
+
+        runner.run(integration.async_unload())
+        runner.run(_async_stop(integration))
+
+    assert benchmark.stats.stats.median < RECONNECT_BUDGET
+
+
+def test_benchmark_memory_per_entity(benchmark, tmp_path, monkeypatch) -> None:
+    """Measure how much memory the integration uses per entity."""
+    with asyncio.Runner() as runner:
+        integration = runner.run(_async_start(tmp_path, monkeypatch))
+
+        # Leave out what Home Assistant loads once, like the modules and the translations of the integration.
+        runner.run(integration.async_add())
+        runner.run(integration.async_wait_settled())
+        runner.run(integration.async_remove())
+
+        async def setup() -> None:
+            await integration.async_add()
+            await integration.async_wait_settled()
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        benchmark.pedantic(lambda: runner.run(setup()), rounds=1)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        per_entity = sum(stat.size_diff for stat in after.compare_to(before, "filename")) / len(integration.entities)
+
+        runner.run(integration.async_unload())
+        runner.run(_async_stop(integration))
+
+    benchmark.extra_info["bytes_per_entity"] = round(per_entity)
+    assert per_entity < MEMORY_BUDGET
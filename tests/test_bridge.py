@@ -0,0 +1,312 @@
+"""Tests for the ComfoConnectBridge."""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+
+from aiocomfoconnect.sensors import SENSOR_FAN_SPEED_MODE, SENSOR_OPERATING_MODE, SENSOR_TEMPERATURE_EXTRACT, SENSORS
+from comparison import async_create_hass, benchmark_comparison
+from config_entry import async_setup_config_entries, create_config_entry
+from custom_components import comfoconnect as integration
+from custom_components.comfoconnect import ComfoConnectBridge, async_fetch_device_info
+from custom_components.comfoconnect.cache import SensorValueCache
+from custom_components.comfoconnect.const import (
+    CONF_DEVICE_INFO,
+    CONF_INSTALLED_OPTIONS,
+    CONF_LOCAL_UUID,
+    CONF_UUID,
+    DEVICE_INFO_BRIDGE_SERIAL,
+    DEVICE_INFO_UNIT_MODEL,
+    DEVICE_INFO_UNIT_NAME,
+    DOMAIN,
+)
+from fake_bridge import BRIDGE_HOST, BRIDGE_SERIAL, BRIDGE_UUID, ENTRY_ID, FakeBridge
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_HOST
+from homeassistant.core import callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_connect, dispatcher_send
+from tcp_bridge import TcpBridge
+
+# How many updates we push through the benchmark, enough to get a stable number on slow CI runners.
+BENCHMARK_UPDATES = 20_000
+
+
+async def test_sensor_updates_are_dispatched_to_subscribers(hass) -> None:
+    """Test that an update only reaches the listeners of that sensor, until they unsubscribe."""
+    bridge = FakeBridge(hass)
+    sensor = SENSORS[SENSOR_TEMPERATURE_EXTRACT]
+    received = []
+
+    unsubscribe = bridge.async_subscribe_sensor(sensor.id, received.append)
+    bridge.async_subscribe_sensor(sensor.id + 1, lambda value: received.append(("other", value)))
+
+    bridge.sensor_callback(sensor, 21.5)
+    unsubscribe()
+    bridge.sensor_callback(sensor, 22.0)
+
+    assert received == [21.5]
+
+
+async def test_listener_can_unsubscribe_while_dispatching(hass) -> None:
+    """Test that a listener that unsubscribes during an update doesn't skip the other listeners."""
+    bridge = FakeBridge(hass)
+    sensor = SENSORS[SENSOR_TEMPERATURE_EXTRACT]
+    received = []
+
+    def unsubscribe_on_update(value) -> None:
+        unsubscribe()
+
+    unsubscribe = bridge.async_subscribe_sensor(sensor.id, unsubscribe_on_update)
+    bridge.async_subscribe_sensor(sensor.id, received.append)
+
+    bridge.sensor_callback(sensor, 21.5)
+    bridge.sensor_callback(sensor, 22.0)
+
+    assert received == [21.5, 22.0]
+
+
+async def test_failing_listener_does_not_block_the_others(hass) -> None:
+    """Test that an exception in one listener doesn't keep the update from the next one."""
+    bridge = FakeBridge(hass)
+    sensor = SENSORS[SENSOR_TEMPERATURE_EXTRACT]
+    received = []
+
+    def fail(value) -> None:
+        raise ValueError(value)
+
+    bridge.async_subscribe_sensor(sensor.id, fail)
+    bridge.async_subscribe_sensor(sensor.id, received.append)
+
+    bridge.sensor_callback(sensor, 21.5)
+
+    assert received == [21.5]
+
+
+def test_benchmark_sensor_dispatch(benchmark, tmp_path) -> None:
+    """
+    Compare the updates per second of the subscriber table with the dispatcher signal it replaced.
+
+    The dispatcher formatted a signal name and hopped through call_soon_threadsafe for every update, while
+    the bridge now calls its listeners inline.
+    """
+    with asyncio.Runner() as runner:
+        hass = runner.run(async_create_hass(tmp_path))
+        bridge = FakeBridge(hass)
+        sensor = SENSORS[SENSOR_TEMPERATURE_EXTRACT]
+        received = 0
+
+        @callback
+        def handle_update(value) -> None:
+            nonlocal received
+            received += 1
+
+        async def dispatch() -> None:
+            # Before: a dispatcher signal per update.
+            nonlocal received
+            received = 0
+            for value in range(BENCHMARK_UPDATES):
+                dispatcher_send(hass, "comfoconnect_update_{}_{}".format(BRIDGE_UUID, sensor.id), value)
+            while received < BENCHMARK_UPDATES:
+                await asyncio.sleep(0)
+
+        async def call_listeners() -> None:
+            # After: the subscriber table of the bridge.
+            nonlocal received
+            received = 0
+            for value in range(BENCHMARK_UPDATES):
+                bridge.sensor_callback(sensor, value)
+            assert received == BENCHMARK_UPDATES
+
+        async_dispatcher_connect(hass, f"comfoconnect_update_{BRIDGE_UUID}_{sensor.id}", handle_update)
+        bridge.async_subscribe_sensor(sensor.id, handle_update)
+        before, after = benchmark_comparison(benchmark, lambda: runner.run(dispatch()), lambda: runner.run(call_listeners()))
+
+    benchmark.extra_info["dispatcher_updates_per_second"] = round(BENCHMARK_UPDATES / before)
+    benchmark.extra_info["subscriber_table_updates_per_second"] = round(BENCHMARK_UPDATES / after)
+    assert after < before
+
+
+def _platform_sensors() -> list:
+    """Return the sensors that the entities of the sensor, binary_sensor and select platforms request."""
+    binary_sensor = importlib.import_module("custom_components.comfoconnect.binary_sensor")
+    select = importlib.import_module("custom_components.comfoconnect.select")
+    sensor = importlib.import_module("custom_components.comfoconnect.sensor")
+
+    return [
+        *(description.ccb_sensor for description in sensor.SENSOR_TYPES),
+        *(description.ccb_sensor for description in binary_sensor.SENSOR_TYPES),
+        *(description.sensor for description in select.SELECT_TYPES if description.sensor),
+        # The fan requests these as well
+        SENSORS[SENSOR_FAN_SPEED_MODE],
+        SENSORS[SENSOR_OPERATING_MODE],
+    ]
+
+
+async def test_requested_sensors_are_registered_once(hass) -> None:
+    """Test that sensors requested during setup are registered in one batch, without duplicates."""
+    bridge = FakeBridge(hass)
+
+    # Both the fan and the ventilation mode select request the operating mode.
+    bridge.async_request_sensor(SENSORS[SENSOR_OPERATING_MODE])
+    bridge.async_request_sensor(SENSORS[SENSOR_OPERATING_MODE])
+    bridge.async_request_sensor(SENSORS[SENSOR_TEMPERATURE_EXTRACT])
+    assert bridge.requests == []
+
+    await bridge.async_register_requested_sensors()
+    assert bridge.requests == ["rpdo", "rpdo"]
+    assert bridge.subscriptions == {SENSOR_OPERATING_MODE, SENSOR_TEMPERATURE_EXTRACT}
+
+    # After setup, a newly requested sensor is registered right away, and a known one isn't registered again.
+    bridge.async_request_sensor(SENSORS[SENSOR_FAN_SPEED_MODE])
+    bridge.async_request_sensor(SENSORS[SENSOR_OPERATING_MODE])
+    await hass.async_block_till_done()
+    assert bridge.subscriptions == {SENSOR_OPERATING_MODE, SENSOR_TEMPERATURE_EXTRACT, SENSOR_FAN_SPEED_MODE}
+    assert len(bridge.requests) == 3
+
+
+async def test_sensor_requests_are_reference_counted(hass) -> None:
+    """Test that a sensor is deregistered when the last entity that requested it releases it."""
+    bridge = FakeBridge(hass)
+
+    release_fan = bridge.async_request_sensor(SENSORS[SENSOR_OPERATING_MODE])
+    release_select = bridge.async_request_sensor(SENSORS[SENSOR_OPERATING_MODE])
+    # An entity that is removed during setup never gets its sensor registered.
+    bridge.async_request_sensor(SENSORS[SENSOR_TEMPERATURE_EXTRACT])()
+    await bridge.async_register_requested_sensors()
+    assert bridge.subscriptions == {SENSOR_OPERATING_MODE}
+
+    release_fan()
+    await hass.async_block_till_done()
+    assert bridge.subscriptions == {SENSOR_OPERATING_MODE}
+
+    release_select()
+    await hass.async_block_till_done()
+    assert bridge.subscriptions == set()
+    assert bridge.requests == ["rpdo", "rpdo"]
+
+    # A sensor that is requested again while it's being deregistered ends up registered.
+    release = bridge.async_request_sensor(SENSORS[SENSOR_FAN_SPEED_MODE])
+    await hass.async_block_till_done()
+    release()
+    bridge.async_request_sensor(SENSORS[SENSOR_FAN_SPEED_MODE])
+    await hass.async_block_till_done()
+    assert bridge.subscriptions == {SENSOR_FAN_SPEED_MODE}
+
+
+async def test_released_sensors_are_no_longer_sent(hass) -> None:
+    """Test that the bridge stops sending the sensors of the entities that were removed."""
+    tcp_bridge = TcpBridge()
+    await tcp_bridge.start()
+    bridge = ComfoConnectBridge(hass, "127.0.0.1", tcp_bridge.uuid, SensorValueCache(hass, ENTRY_ID))
+    bridge.PORT = tcp_bridge.port
+    bridge.sensor_delay = 0
+    await bridge.async_connect("00000000000000000000000000001337")
+
+    sensors = _platform_sensors()
+    releases = [bridge.async_request_sensor(sensor) for sensor in sensors]
+    await bridge.async_register_requested_sensors()
+    received = {}
+    for sensor in sensors:
+        bridge.async_subscribe_sensor(sensor.id, lambda value, sensor_id=sensor.id: received.update({sensor_id: received.get(sensor_id, 0) + 1}))
+
+    # Most entities of the integration are disabled by default, which removes them.
+    for release in releases[len(releases) // 4 :]:
+        release()
+    await hass.async_block_till_done()
+    kept = {sensor.id for sensor in sensors[: len(sensors) // 4]}
+    assert set(tcp_bridge.subscriptions) == kept
+
+    received.clear()
+    await tcp_bridge.push(1_000)
+    await asyncio.sleep(0.1)
+    assert set(received) == kept
+    assert sum(received.values()) == 1_000
+
+    await bridge.async_disconnect()
+    await tcp_bridge.stop()
+
+
+def test_benchmark_sensor_registration(benchmark, tmp_path) -> None:
+    """Compare registering the sensors of all platforms one by one with registering them in one batch."""
+    latency = 0.02
+    sensors = _platform_sensors()
+
+    with asyncio.Runner() as runner:
+        hass = runner.run(async_create_hass(tmp_path))
+        bridges: list[FakeBridge] = []
+
+        async def register_one_by_one() -> None:
+            # Before: every entity awaited its own registration.
+            bridge = FakeBridge(hass, latency=latency)
+            for sensor in sensors:
+                await bridge.register_sensor(sensor)
+
+        async def register_in_one_batch() -> None:
+            # After: the bridge collects the requests and registers them in one batch.
+            bridges.append(FakeBridge(hass, latency=latency))
+            for sensor in sensors:
+                bridges[-1].async_request_sensor(sensor)
+            await bridges[-1].async_register_requested_sensors()
+
+        before, after = benchmark_comparison(
+            benchmark, lambda: runner.run(register_one_by_one()), lambda: runner.run(register_in_one_batch()), rounds=3, warmup_rounds=0
+        )
+
+    assert bridges[-1].subscriptions == {sensor.id for sensor in sensors}
+    benchmark.extra_info["batched_registration_requests"] = len(bridges[-1].requests)
+    assert after < before / 4
+
+
+async def test_device_info_is_fetched_concurrently(hass) -> None:
+    """Test that the version and the properties of the unit are requested at the same time."""
+    bridge = FakeBridge(hass, latency=0.01)
+
+    device_info = await async_fetch_device_info(bridge)
+
+    assert bridge.max_in_flight == 4
+    assert device_info[DEVICE_INFO_BRIDGE_SERIAL] == BRIDGE_SERIAL
+    assert device_info[DEVICE_INFO_UNIT_MODEL] == "ComfoAirQ 450"
+
+
+async def test_setup_with_cached_device_info_refreshes_it_in_the_background(hass, monkeypatch) -> None:
+    """Test that a setup with cached device information doesn't wait for the bridge, and refreshes the cache after."""
+    answer = asyncio.Event()
+
+    class SlowBridge(FakeBridge):
+        async def cmd_version_request(self):
+            await answer.wait()
+            return await super().cmd_version_request()
+
+    monkeypatch.setattr(integration, "ComfoConnectBridge", lambda hass, host, uuid, sensor_cache: SlowBridge(hass, sensor_cache=sensor_cache))
+    await async_setup_config_entries(hass)
+    cached = await async_fetch_device_info(FakeBridge(hass))
+    cached[DEVICE_INFO_UNIT_NAME] = "Before the restart"
+    entry = create_config_entry(
+        {
+            CONF_HOST: BRIDGE_HOST,
+            CONF_UUID: BRIDGE_UUID,
+            CONF_LOCAL_UUID: "local",
+            CONF_DEVICE_INFO: cached,
+            CONF_INSTALLED_OPTIONS: [],
+        }
+    )
+
+    # The bridge doesn't answer until the setup is done.
+    async with asyncio.timeout(5):
+        await hass.config_entries.async_add(entry)
+
+    device_registry = dr.async_get(hass)
+    assert entry.state is ConfigEntryState.LOADED
+    assert entry.data[CONF_DEVICE_INFO] == cached
+    assert device_registry.async_get_device({(DOMAIN, BRIDGE_UUID)}).name == "Before the restart"
+
+    # The refresh is a background task, which Home Assistant doesn't wait for.
+    answer.set()
+    async with asyncio.timeout(5):
+        while entry.data[CONF_DEVICE_INFO] == cached:
+            await asyncio.sleep(0.01)
+
+    assert entry.data[CONF_DEVICE_INFO][DEVICE_INFO_UNIT_NAME] == "ComfoAirQ"
+    assert device_registry.async_get_device({(DOMAIN, BRIDGE_UUID)}).name == "ComfoAirQ"
@@ -0,0 +1,90 @@
+"""Tests for the cache of the last known sensor values."""
+
+from __future__ import annotations
+
+import importlib
+
+from aiocomfoconnect.sensors import SENSOR_SEASON_HEATING_ACTIVE, SENSOR_TEMPERATURE_EXTRACT, SENSORS
+from custom_components.comfoconnect.cache import SensorValueCache
+from custom_components.comfoconnect.const import ATTR_STALE
+from fake_bridge import ENTRY_ID, FakeBridge
+from homeassistant.core import HomeAssistant
+
+
+def _description(platform: str, key: int):
+    """Return the entity description of a platform for a sensor."""
+    module = importlib.import_module(f"custom_components.comfoconnect.{platform}")
+    return next(description for description in module.SENSOR_TYPES if description.key == key)
+
+
+async def test_entities_restore_last_known_value(hass) -> None:
+    """Test that after a restart, entities show the cached values as stale while the bridge doesn't send anything."""
+    sensor = importlib.import_module("custom_components.comfoconnect.sensor")
+    binary_sensor = importlib.import_module("custom_components.comfoconnect.binary_sensor")
+
+    sensor_cache = SensorValueCache(hass, ENTRY_ID)
+    await sensor_cache.async_load()
+    bridge = FakeBridge(hass, sensor_cache=sensor_cache)
+
+    bridge.sensor_callback(SENSORS[SENSOR_TEMPERATURE_EXTRACT], 21.5)
+    bridge.sensor_callback(SENSORS[SENSOR_SEASON_HEATING_ACTIVE], True)
+
+    # This happens when the config entry is unloaded, or Home Assistant stops.
+    await sensor_cache.async_save()
+
+    # Home Assistant restarts with the same configuration directory.
+    restarted = HomeAssistant(hass.config.config_dir)
+    try:
+        sensor_cache = SensorValueCache(restarted, ENTRY_ID)
+        await sensor_cache.async_load()
+
+        # This bridge never sends an update.
+        bridge = FakeBridge(restarted, sensor_cache=sensor_cache)
+
+        temperature = sensor.ComfoConnectSensor(bridge, None, _description("sensor", SENSOR_TEMPERATURE_EXTRACT))
+        assert temperature.native_value == 21.5
+        assert temperature.extra_state_attributes == {ATTR_STALE: True}
+
+        heating = binary_sensor.ComfoConnectBinarySensor(bridge, None, _description("binary_sensor", SENSOR_SEASON_HEATING_ACTIVE))
+        assert heating.is_on is True
+        assert heating.extra_state_attributes == {ATTR_STALE: True}
+    finally:
+        await restarted.async_stop(force=True)
+
+
+async def test_unknown_sensor_has_no_state(hass) -> None:
+    """Test that an entity without a cached value starts without a state, and isn't marked as stale."""
+    sensor = importlib.import_module("custom_components.comfoconnect.sensor")
+
+    sensor_cache = SensorValueCache(hass, ENTRY_ID)
+    await sensor_cache.async_load()
+    bridge = FakeBridge(hass, sensor_cache=sensor_cache)
+
+    temperature = sensor.ComfoConnectSensor(bridge, None, _description("sensor", SENSOR_TEMPERATURE_EXTRACT))
+    assert temperature.native_value is None
+    assert temperature.extra_state_attributes is None
+
+
+async def test_updates_schedule_a_single_write(hass) -> None:
+    """Test that a stream of updates doesn't keep postponing the write to storage."""
+    sensor_cache = SensorValueCache(hass, ENTRY_ID)
+    writes = 0
+
+    def data_to_save():
+        nonlocal writes
+        writes += 1
+        return original_data_to_save()
+
+    original_data_to_save = sensor_cache._data_to_save
+    sensor_cache._data_to_save = data_to_save
+
+    for value in range(100):
+        sensor_cache.async_set(SENSOR_TEMPERATURE_EXTRACT, value)
+
+    await sensor_cache.async_save()
+    assert writes == 1
+    assert sensor_cache.get(SENSOR_TEMPERATURE_EXTRACT) == 99
+
+    # Nothing changed since the last write.
+    await sensor_cache.async_save()
+    assert writes == 1
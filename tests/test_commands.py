@@ -0,0 +1,122 @@
+"""Tests for the CommandDebouncer."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from aiocomfoconnect.const import VentilationSpeed
+from aiocomfoconnect.exceptions import AioComfoConnectTimeout
+from custom_components.comfoconnect.commands import (
+    COMMAND_SPEED,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    CommandDebouncer,
+    CommandExpired,
+    CommandScheduler,
+)
+from fake_bridge import FakeBridge
+
+SPEEDS = [VentilationSpeed.AWAY, VentilationSpeed.LOW, VentilationSpeed.MEDIUM, VentilationSpeed.HIGH]
+
+
+async def test_burst_of_commands_is_collapsed(hass) -> None:
+    """Test that a burst of writes to the fan speed sends the first and the last one, and that every caller gets the result."""
+    bridge = FakeBridge(hass, latency=0.2)
+    debouncer = CommandDebouncer(hass, delay=0.05)
+
+    async def set_speed(speed: str) -> str:
+        await bridge.set_speed(speed)
+        return speed
+
+    callers = []
+    for index in range(50):
+        speed = SPEEDS[index % len(SPEEDS)]
+        callers.append(asyncio.ensure_future(debouncer.async_call(COMMAND_SPEED, lambda speed=speed: set_speed(speed))))
+        await asyncio.sleep(0.005)
+
+    results = await asyncio.gather(*callers)
+
+    # The first write is sent right away, and then superseded by the last one.
+    assert len(bridge.rmi_messages) == 2
+    assert bridge.rmi_messages[-1][-1] == SPEEDS.index(SPEEDS[49 % len(SPEEDS)])
+    assert results == [SPEEDS[49 % len(SPEEDS)]] * 50
+    assert bridge.max_in_flight == 1
+
+    # A write to a setting that is idle again is sent right away.
+    start = hass.loop.time()
+    await debouncer.async_call(COMMAND_SPEED, lambda: set_speed(VentilationSpeed.LOW))
+    assert hass.loop.time() - start < 0.25
+
+
+async def test_error_reaches_every_caller(hass) -> None:
+    """Test that all callers get the error of the command that was sent, and that the next write is sent again."""
+    bridge = FakeBridge(hass, latency=0.05)
+    bridge.hangs = True
+    debouncer = CommandDebouncer(hass, delay=0.01)
+
+    callers = [asyncio.ensure_future(debouncer.async_call("mode", lambda: bridge.set_mode("auto"))) for _ in range(3)]
+    results = await asyncio.gather(*callers, return_exceptions=True)
+    assert all(isinstance(result, AioComfoConnectTimeout) for result in results)
+
+    bridge.hangs = False
+    await debouncer.async_call("mode", lambda: bridge.set_mode("manual"))
+    # The first write was superseded before it was sent.
+    assert len(bridge.rmi_messages) == 2
+
+
+async def test_cancel_cancels_the_callers(hass) -> None:
+    """Test that the callers stop waiting when the entry is unloaded."""
+    bridge = FakeBridge(hass, latency=1)
+    debouncer = CommandDebouncer(hass)
+
+    caller = asyncio.ensure_future(debouncer.async_call(COMMAND_SPEED, lambda: bridge.set_speed("low")))
+    await asyncio.sleep(0.01)
+    debouncer.async_cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+
+
+async def test_interactive_commands_go_first(hass) -> None:
+    """Test that a user command is sent before the background reads that were queued earlier, within the window."""
+    bridge = FakeBridge(hass, latency=0.05)
+    scheduler = CommandScheduler(hass, max_in_flight=2)
+
+    reads = [asyncio.ensure_future(scheduler.async_run(PRIORITY_BACKGROUND, bridge.get_bypass)) for _ in range(6)]
+    await asyncio.sleep(0)
+    await scheduler.async_run(PRIORITY_INTERACTIVE, lambda: bridge.set_speed("high"))
+    await asyncio.gather(*reads)
+
+    # The write was queued behind the two reads in flight, and went before the four reads that waited.
+    assert [message[0] for message in bridge.rmi_messages].index(0x84) == 2
+    assert bridge.max_in_flight == 2
+    assert scheduler.in_flight == 0
+
+
+async def test_expired_background_reads_are_dropped(hass) -> None:
+    """Test that a read that is still queued at its deadline is never sent."""
+    bridge = FakeBridge(hass, latency=0.1)
+    scheduler = CommandScheduler(hass, max_in_flight=1)
+    deadline = hass.loop.time() + 0.05
+
+    reads = [asyncio.ensure_future(scheduler.async_run(PRIORITY_BACKGROUND, bridge.get_bypass, deadline)) for _ in range(3)]
+    results = await asyncio.gather(*reads, return_exceptions=True)
+
+    assert results[0] == "auto"
+    assert all(isinstance(result, CommandExpired) for result in results[1:])
+    assert len(bridge.rmi_messages) == 1
+
+
+async def test_cancelled_requests_free_their_slot(hass) -> None:
+    """Test that requests that are cancelled while queued or in flight don't keep a slot in the window."""
+    bridge = FakeBridge(hass, latency=0.05)
+    scheduler = CommandScheduler(hass, max_in_flight=1)
+
+    requests = [asyncio.ensure_future(scheduler.async_run(PRIORITY_BACKGROUND, bridge.get_bypass)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    for request in requests[:2]:
+        request.cancel()
+
+    assert await requests[2] == "auto"
+    assert scheduler.in_flight == 0
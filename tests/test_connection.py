@@ -0,0 +1,192 @@
+"""Tests for the connection state machine of the ComfoConnectBridge."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiocomfoconnect.exceptions import AioComfoConnectNotConnected
+from aiocomfoconnect.sensors import SENSORS
+from custom_components.comfoconnect import SIGNAL_COMFOCONNECT_AVAILABILITY, ComfoConnectBridge
+from custom_components.comfoconnect.cache import SensorValueCache
+from custom_components.comfoconnect.commands import PRIORITY_INTERACTIVE
+from custom_components.comfoconnect.const import ConnectionState
+from custom_components.comfoconnect.coordinator import ComfoConnectSettingsCoordinator
+from custom_components.comfoconnect.manager import RECONNECT_BACKOFF_BASE, ComfoConnectManager
+from fake_bridge import ENTRY_ID, FakeBridge
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from tcp_bridge import TcpBridge
+
+
+async def test_connect_is_single_flight(hass) -> None:
+    """Test that callers that connect at the same time share one connection attempt."""
+    bridge = FakeBridge(hass, latency=0.2)
+    availability = []
+    async_dispatcher_connect(hass, SIGNAL_COMFOCONNECT_AVAILABILITY.format(bridge.uuid), availability.append)
+
+    connects = [asyncio.ensure_future(bridge.async_connect("local")) for _ in range(5)]
+    await asyncio.sleep(0.05)
+    assert bridge.state is ConnectionState.CONNECTING
+
+    await asyncio.gather(*connects)
+    assert bridge.state is ConnectionState.CONNECTED
+    assert len(bridge.connect_attempts) == 1
+    assert availability == [True]
+
+    # Connecting again while we are connected doesn't do anything.
+    await bridge.async_connect("local")
+    assert len(bridge.connect_attempts) == 1
+
+
+async def test_commands_wait_while_connecting(hass) -> None:
+    """Test that a command that is sent while we are connecting is held back until we are connected."""
+    bridge = FakeBridge(hass, latency=0.2)
+
+    connect = asyncio.ensure_future(bridge.async_connect("local"))
+    await asyncio.sleep(0)
+    await bridge.scheduler.async_run(PRIORITY_INTERACTIVE, lambda: bridge.set_speed("high"))
+
+    assert bridge.requests == ["connect", "rmi"]
+    await connect
+
+
+async def test_commands_fail_when_disconnected(hass) -> None:
+    """Test that a command fails right away when we aren't connecting."""
+    bridge = FakeBridge(hass)
+
+    with pytest.raises(AioComfoConnectNotConnected):
+        await bridge.scheduler.async_run(PRIORITY_INTERACTIVE, lambda: bridge.set_speed("high"))
+    assert bridge.requests == []
+
+
+async def test_disconnect_drains_requests_in_flight(hass) -> None:
+    """Test that we wait for the requests in flight before we disconnect, and refuse new ones meanwhile."""
+    bridge = FakeBridge(hass, latency=0.1)
+    await bridge.async_connect("local")
+
+    command = asyncio.ensure_future(bridge.scheduler.async_run(PRIORITY_INTERACTIVE, lambda: bridge.set_speed("high")))
+    await asyncio.sleep(0)
+    disconnect = asyncio.ensure_future(bridge.async_disconnect(drain_timeout=1))
+    await asyncio.sleep(0)
+    assert bridge.state is ConnectionState.DRAINING
+
+    with pytest.raises(AioComfoConnectNotConnected):
+        await bridge.scheduler.async_run(PRIORITY_INTERACTIVE, lambda: bridge.set_speed("low"))
+
+    await disconnect
+    assert command.done()
+    assert bridge.state is ConnectionState.DISCONNECTED
+    assert not bridge.is_available
+
+
+async def test_lost_connection_is_left_to_the_manager(hass) -> None:
+    """Test that the bridge doesn't reconnect on its own after the bridge dropped the connection, but tells the manager."""
+    tcp_bridge = TcpBridge()
+    await tcp_bridge.start()
+
+    bridge = ComfoConnectBridge(hass, "127.0.0.1", tcp_bridge.uuid, SensorValueCache(hass, ENTRY_ID))
+    bridge.PORT = tcp_bridge.port
+    availability = []
+    async_dispatcher_connect(hass, SIGNAL_COMFOCONNECT_AVAILABILITY.format(bridge.uuid), availability.append)
+
+    await bridge.async_connect("00000000000000000000000000001337")
+    tcp_bridge.drop()
+
+    async with asyncio.timeout(1):
+        await bridge.connection_lost.wait()
+    assert bridge.state is ConnectionState.CONNECTING
+
+    # The loop of aiocomfoconnect would have started another session after a second.
+    await asyncio.sleep(1.5)
+    assert bridge.metrics.sessions == 1
+    assert bridge.state is ConnectionState.CONNECTING
+    assert availability == [True, False]
+
+    await bridge.async_disconnect()
+    await tcp_bridge.stop()
+
+
+async def test_lost_connection_is_reconnected_by_the_manager(hass) -> None:
+    """Test that the manager reconnects right away when the bridge dropped the connection, without waiting for a probe."""
+    tcp_bridge = TcpBridge()
+    await tcp_bridge.start()
+
+    bridge = ComfoConnectBridge(hass, "127.0.0.1", tcp_bridge.uuid, SensorValueCache(hass, ENTRY_ID))
+    bridge.PORT = tcp_bridge.port
+    availability = []
+    async_dispatcher_connect(hass, SIGNAL_COMFOCONNECT_AVAILABILITY.format(bridge.uuid), availability.append)
+
+    manager = ComfoConnectManager(hass)
+    await manager.async_connect(bridge, "00000000000000000000000000001337")
+    await manager.async_add_bridge(ENTRY_ID, bridge, "00000000000000000000000000001337")
+    tcp_bridge.drop()
+
+    async with asyncio.timeout(1):
+        await bridge.connection_lost.wait()
+    async with asyncio.timeout(RECONNECT_BACKOFF_BASE + 1):
+        while bridge.state is not ConnectionState.CONNECTED:
+            await asyncio.sleep(0.01)
+    assert availability == [True, False, True]
+    assert not bridge.connection_lost.is_set()
+    assert bridge.metrics.sessions == 2
+
+    await manager.async_remove_bridge(ENTRY_ID)
+    await tcp_bridge.stop()
+
+
+# The budget from a dropped connection until all sensors and settings are fresh again. The manager waits up to
+# RECONNECT_BACKOFF_BASE before it reconnects, registering the sensors one by one would take another second on top of that.
+RESUME_BUDGET = 1.5
+
+
+async def test_resume_after_lost_connection(hass) -> None:
+    """Test that all sensors are registered again in one batch, and the settings are read again, after a lost connection."""
+    tcp_bridge = TcpBridge(rpdo_latency=0.05)
+    await tcp_bridge.start()
+
+    bridge = ComfoConnectBridge(hass, "127.0.0.1", tcp_bridge.uuid, SensorValueCache(hass, ENTRY_ID))
+    bridge.PORT = tcp_bridge.port
+    bridge.sensor_delay = 0
+    manager = ComfoConnectManager(hass)
+    await manager.async_connect(bridge, "00000000000000000000000000001337")
+    await manager.async_add_bridge(ENTRY_ID, bridge, "00000000000000000000000000001337")
+
+    sensors = list(SENSORS.values())[:20]
+    for sensor in sensors:
+        bridge.async_request_sensor(sensor)
+    await bridge.async_register_requested_sensors()
+
+    coordinator = ComfoConnectSettingsCoordinator(hass, bridge, SimpleNamespace(options={}), {"balance_mode": lambda ccb: ccb.get_balance_mode()})
+    await coordinator.async_refresh()
+    async_dispatcher_connect(hass, SIGNAL_COMFOCONNECT_AVAILABILITY.format(bridge.uuid), coordinator.async_availability_changed)
+    refreshed = asyncio.Event()
+    coordinator.async_add_listener(refreshed.set)
+
+    stale = {sensor.id for sensor in sensors}
+    fresh = asyncio.Event()
+    for sensor in sensors:
+
+        def update_callback(value, sensor_id=sensor.id) -> None:
+            stale.discard(sensor_id)
+            if not stale:
+                fresh.set()
+
+        bridge.async_subscribe_sensor(sensor.id, update_callback)
+
+    start = hass.loop.time()
+    tcp_bridge.drop()
+    async with asyncio.timeout(5):
+        await fresh.wait()
+        await refreshed.wait()
+    recovery = hass.loop.time() - start
+
+    assert recovery < RESUME_BUDGET
+    assert bridge.state is ConnectionState.CONNECTED
+    assert bridge.metrics.resume.count == 1
+    # Every sensor was registered once per session.
+    assert all(tcp_bridge.registrations[sensor.id] == 2 for sensor in sensors)
+
+    await coordinator.async_shutdown()
+    await manager.async_remove_bridge(ENTRY_ID)
+    await tcp_bridge.stop()
@@ -0,0 +1,157 @@
+"""Tests and microbenchmarks for the decoding of sensor values into entity states."""
+
+from __future__ import annotations
+
+import importlib
+import tracemalloc
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import pytest
+from aiocomfoconnect.const import VentilationMode, VentilationSetting
+from aiocomfoconnect.sensors import (
+    SENSOR_AIRFLOW_CONSTRAINTS,
+    SENSOR_BYPASS_ACTIVATION_STATE,
+    SENSOR_FAN_SPEED_MODE,
+    SENSOR_OPERATING_MODE,
+    SENSOR_SEASON_HEATING_ACTIVE,
+)
+from comparison import benchmark_comparison
+from custom_components.comfoconnect.decoders import compile_lookup
+from homeassistant.util.percentage import ordered_list_item_to_percentage
+
+# How often every decoder runs in a round of a microbenchmark.
+BENCHMARK_DECODES = 100_000
+
+
+@dataclass
+class DecoderCase:
+    """A decoder of a platform, with the way the platform decoded the values before, and some values to decode."""
+
+    decode: Callable[[Any], Any]
+    before: Callable[[Any], Any]
+    values: Sequence[Any]
+    # Whether the decoder has to be faster than before, the ones that weren't replaced only have to keep up.
+    faster: bool = True
+
+
+def _field_decoder(field: str, sensor_id: int) -> Callable[[Any], Any]:
+    """Return the decoder of a field of the ventilation state, which is decoded from the given sensor."""
+    state = importlib.import_module("custom_components.comfoconnect.state")
+    assert state.SENSOR_FIELDS[field][0] == sensor_id
+    return state.SENSOR_FIELDS[field][1]
+
+
+def _select_case() -> DecoderCase:
+    """Return the decoder of the bypass mode, and the dict literal that the select description built for every update."""
+
+    def literal(value):
+        return {0: VentilationSetting.AUTO, 1: VentilationSetting.ON, 2: VentilationSetting.OFF}.get(value)
+
+    return DecoderCase(_field_decoder("bypass_mode", SENSOR_BYPASS_ACTIVATION_STATE), literal, (0, 1, 2, 3))
+
+
+def _fan_speed_case() -> DecoderCase:
+    """Return the precomputed percentages of the fan speed, and computing them for every update."""
+    state = importlib.import_module("custom_components.comfoconnect.state")
+
+    def computed(value):
+        return 0 if value == 0 else ordered_list_item_to_percentage(state.FAN_SPEEDS, state.FAN_SPEED_MAPPING[value])
+
+    return DecoderCase(_field_decoder("fan_speed", SENSOR_FAN_SPEED_MODE), computed, (0, 1, 2, 3))
+
+
+def _fan_mode_case() -> DecoderCase:
+    """Return the decoder of the operating mode, and the conditional of the fan that it replaced."""
+
+    def conditional(value):
+        return VentilationMode.AUTO if value == -1 else VentilationMode.MANUAL
+
+    return DecoderCase(_field_decoder("mode", SENSOR_OPERATING_MODE), conditional, (-1, 1, 5), faster=False)
+
+
+def _sensor_case() -> DecoderCase:
+    """Return the mapping of a sensor, which only the sensors whose value isn't the state as it is have."""
+    sensor = importlib.import_module("custom_components.comfoconnect.sensor")
+    description = next(description for description in sensor.SENSOR_TYPES if description.key == SENSOR_AIRFLOW_CONSTRAINTS)
+
+    def described(value):
+        return description.mapping(value) if description.mapping else value
+
+    return DecoderCase(description.mapping, described, (["MaxFlow"], []), faster=False)
+
+
+def _binary_sensor_case() -> DecoderCase:
+    """Return a binary sensor decoder."""
+    binary_sensor = importlib.import_module("custom_components.comfoconnect.binary_sensor")
+
+    def conditional(value):
+        return True if value else False
+
+    return DecoderCase(binary_sensor.SENSOR_DECODERS[SENSOR_SEASON_HEATING_ACTIVE], conditional, (0, 1, 2), faster=False)
+
+
+DECODER_CASES = {
+    "select": _select_case,
+    "fan_speed": _fan_speed_case,
+    "fan_mode": _fan_mode_case,
+    "sensor": _sensor_case,
+    "binary_sensor": _binary_sensor_case,
+}
+
+
+def _decode_all(decode: Callable[[Any], Any], values: Sequence[Any]) -> None:
+    """Decode all values."""
+    for value in values:
+        decode(value)
+
+
+def _allocated(decode: Callable[[Any], Any], values: Sequence[Any]) -> int:
+    """Return the most memory that the decoder allocated while it decoded the values, in bytes."""
+    repeated = list(values) * 1_000
+    tracemalloc.start()
+    try:
+        # Create the iterator first, so only what the decoder allocates is measured.
+        values_iterator = iter(repeated)
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for value in values_iterator:
+            decode(value)
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+
+def test_lookup_returns_the_default_for_unknown_values() -> None:
+    """Test that a lookup returns the value from the table, or the default."""
+    table = {1: "one"}
+    decode = compile_lookup(table)
+    decode_with_default = compile_lookup(table, "other")
+    table[2] = "two"
+
+    assert (decode(1), decode(2)) == ("one", None)
+    assert (decode_with_default(1), decode_with_default(2)) == ("one", "other")
+
+
+@pytest.mark.parametrize("case", DECODER_CASES)
+def test_decoders_match_and_do_not_allocate(case) -> None:
+    """Test that a decoder decodes like the platform did before, without allocating anything."""
+    decoder = DECODER_CASES[case]()
+
+    assert [decoder.decode(value) for value in decoder.values] == [decoder.before(value) for value in decoder.values]
+    assert _allocated(decoder.decode, decoder.values) == 0
+
+
+@pytest.mark.parametrize("case", DECODER_CASES)
+def test_benchmark_decoders(benchmark, case) -> None:
+    """Compare a decoder with the way the platform decoded the values before."""
+    decoder = DECODER_CASES[case]()
+    repeated = list(decoder.values) * (BENCHMARK_DECODES // len(decoder.values))
+
+    before, after = benchmark_comparison(benchmark, lambda: _decode_all(decoder.before, repeated), lambda: _decode_all(decoder.decode, repeated))
+    benchmark.extra_info["before_decodes_per_second"] = round(len(repeated) / before)
+    benchmark.extra_info["after_decodes_per_second"] = round(len(repeated) / after)
+
+    if decoder.faster:
+        assert after < before
@@ -0,0 +1,179 @@
+"""Tests for the BridgeDiscovery."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from ipaddress import ip_address
+
+from aiocomfoconnect import Bridge
+from aiocomfoconnect.protobuf import zehnder_pb2
+from custom_components.comfoconnect import discovery as discovery_module
+from custom_components.comfoconnect.config_flow import ComfoConnectConfigFlow
+from custom_components.comfoconnect.discovery import BridgeDiscovery
+from custom_components.comfoconnect.manager import async_get_manager
+from fake_bridge import BRIDGE_HOST, BRIDGE_UUID
+from homeassistant.components import network
+
+OTHER_UUID = "00000000000000000000000000000002"
+
+
+def _mock_broadcast(monkeypatch, answers: list[tuple[float, Bridge]], timeout: float = 1) -> list[list[str]]:
+    """Let a broadcast find the bridges after the given delays, and return the broadcasts that were sent."""
+    sweeps: list[list[str]] = []
+
+    async def async_stream_bridges(broadcast_addresses, on_bridge):
+        sweeps.append(broadcast_addresses)
+        start = asyncio.get_running_loop().time()
+        for delay, bridge in answers:
+            await asyncio.sleep(start + delay - asyncio.get_running_loop().time())
+            on_bridge(bridge)
+        await asyncio.sleep(start + timeout - asyncio.get_running_loop().time())
+        return [bridge for _, bridge in answers]
+
+    async def async_get_ipv4_broadcast_addresses(hass):
+        return ["255.255.255.255"]
+
+    monkeypatch.setattr(discovery_module, "async_stream_bridges", async_stream_bridges)
+    monkeypatch.setattr(network, "async_get_ipv4_broadcast_addresses", async_get_ipv4_broadcast_addresses)
+    return sweeps
+
+
+async def test_sweep_is_shared(hass, monkeypatch) -> None:
+    """Test that callers that discover at the same time share one broadcast."""
+    bridge = Bridge(BRIDGE_HOST, BRIDGE_UUID)
+    sweeps = _mock_broadcast(monkeypatch, [(0.01, bridge)], timeout=0.05)
+
+    discovery = BridgeDiscovery(hass)
+
+    results = await asyncio.gather(*(discovery.async_discover() for _ in range(6)))
+    assert results == [[bridge]] * 6
+    assert len(sweeps) == 1
+
+    # A sweep that starts after the previous one is done broadcasts again.
+    await discovery.async_discover()
+    assert len(sweeps) == 2
+
+
+async def test_sweep_broadcasts_without_the_network_integration(hass, monkeypatch, caplog) -> None:
+    """Test that a sweep uses the broadcast addresses of the network integration, or warns and uses the limited broadcast without it."""
+    sweeps = _mock_broadcast(monkeypatch, [], timeout=0)
+
+    async def async_get_ipv4_broadcast_addresses(hass):
+        return [ip_address("192.168.1.255"), ip_address("10.0.0.255")]
+
+    monkeypatch.setattr(network, "async_get_ipv4_broadcast_addresses", async_get_ipv4_broadcast_addresses)
+
+    discovery = BridgeDiscovery(hass)
+
+    await discovery.async_discover()
+    await discovery.async_discover()
+    hass.config.components.add("network")
+    await discovery.async_discover()
+
+    assert sweeps == [["255.255.255.255"], ["255.255.255.255"], [ip_address("192.168.1.255"), ip_address("10.0.0.255")]]
+    # The fallback is logged, but only once.
+    assert [record.getMessage() for record in caplog.records if record.levelno == logging.WARNING] == [
+        "Discovery only broadcasts to 255.255.255.255, since the network integration isn't set up"
+    ]
+
+
+async def test_settled_sweep_returns_early(hass, monkeypatch) -> None:
+    """Test that a caller that wants the bridges soon gets them once they stop answering, and late answers are cached."""
+    first, second, late = Bridge(BRIDGE_HOST, BRIDGE_UUID), Bridge("192.0.2.2", OTHER_UUID), Bridge("192.0.2.3", "3" * 32)
+    _mock_broadcast(monkeypatch, [(0.01, first), (0.05, second), (0.8, late)])
+
+    discovery = BridgeDiscovery(hass)
+
+    start = hass.loop.time()
+    assert await discovery.async_discover(settle=True) == [first, second]
+    assert hass.loop.time() - start < 0.5
+
+    # The sweep goes on, and caches the bridge that answered late.
+    await discovery.async_discover()
+    assert discovery.async_bridges() == [first, second, late]
+
+
+async def test_cache_expires(hass, monkeypatch) -> None:
+    """Test that the bridges that answered are only trusted for the TTL."""
+    bridge = Bridge(BRIDGE_HOST, BRIDGE_UUID)
+    _mock_broadcast(monkeypatch, [(0, bridge)], timeout=0)
+
+    discovery = BridgeDiscovery(hass, ttl=0.1)
+    await discovery.async_discover()
+    assert discovery.async_get(BRIDGE_UUID) is bridge
+
+    await asyncio.sleep(0.15)
+    assert discovery.async_get(BRIDGE_UUID) is None
+    assert discovery.async_bridges() == []
+
+
+async def test_locate_asks_the_cache_and_recent_hosts_first(hass, monkeypatch) -> None:
+    """Test that a bridge is looked for in the cache, then at its recent addresses, and only then with a broadcast."""
+    probes = []
+
+    async def discover_bridges(host, timeout):
+        probes.append(host)
+        return [Bridge(host, BRIDGE_UUID)] if host == "192.0.2.2" else []
+
+    monkeypatch.setattr(discovery_module, "discover_bridges", discover_bridges)
+    sweeps = _mock_broadcast(monkeypatch, [(0, Bridge("192.0.2.4", BRIDGE_UUID))], timeout=0)
+
+    discovery = BridgeDiscovery(hass, ttl=0)
+    for host in ("192.0.2.3", "192.0.2.2", BRIDGE_HOST):
+        discovery.async_remember_host(BRIDGE_UUID, host)
+
+    # The current address is left out, and the other ones are asked at the same time.
+    assert await discovery.async_locate(BRIDGE_UUID, exclude=BRIDGE_HOST) == "192.0.2.2"
+    assert sorted(probes) == ["192.0.2.2", "192.0.2.3"]
+    assert sweeps == []
+
+    # The bridge isn't at any address we know anymore.
+    assert await discovery.async_locate(BRIDGE_UUID, exclude="192.0.2.2") == "192.0.2.4"
+    assert len(sweeps) == 1
+
+
+async def test_stream_parses_the_answers(monkeypatch) -> None:
+    """Test that every bridge is passed on once as it answers, and that invalid answers are ignored."""
+
+    class AnsweringBridge(asyncio.DatagramProtocol):
+        def connection_made(self, transport) -> None:
+            self.transport = transport
+
+        def datagram_received(self, data, addr) -> None:
+            operation = zehnder_pb2.DiscoveryOperation()
+            response = operation.searchGatewayResponse
+            response.ipaddress, response.uuid, response.version, response.type = BRIDGE_HOST, bytes.fromhex(BRIDGE_UUID), 1, 1
+            # An answer that can't be parsed, and the same answer twice, like a bridge on two networks sends.
+            self.transport.sendto(b"\xff", addr)
+            self.transport.sendto(operation.SerializeToString(), addr)
+            self.transport.sendto(operation.SerializeToString(), addr)
+
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(AnsweringBridge, local_addr=("127.0.0.1", 0))
+    monkeypatch.setattr(Bridge, "PORT", transport.get_extra_info("sockname")[1])
+    streamed: list[Bridge] = []
+    try:
+        bridges = await discovery_module.async_stream_bridges([ip_address("127.0.0.1")], streamed.append, timeout=0.2)
+    finally:
+        transport.close()
+
+    assert [(bridge.host, bridge.uuid, bridge.bridge_type) for bridge in streamed] == [(BRIDGE_HOST, BRIDGE_UUID, 1)]
+    assert bridges == streamed
+
+
+async def test_flow_looks_for_new_bridges_when_the_cached_ones_are_configured(hass, monkeypatch) -> None:
+    """Test that the config flow waits for a broadcast when all bridges that answered recently are configured."""
+    configured, new = Bridge(BRIDGE_HOST, BRIDGE_UUID), Bridge("192.0.2.2", OTHER_UUID)
+    sweeps = _mock_broadcast(monkeypatch, [(0.01, configured), (0.02, new)], timeout=0.5)
+
+    discovery = async_get_manager(hass).discovery
+    discovery._async_found(configured)
+    flow = ComfoConnectConfigFlow()
+    flow.hass = hass
+    monkeypatch.setattr(flow, "_async_current_ids", lambda include_ignore=True: {BRIDGE_UUID})
+
+    await flow.async_step_user()
+
+    assert list(flow.discovered_bridges) == [OTHER_UUID]
+    assert len(sweeps) == 1
@@ -0,0 +1,293 @@
+"""Tests for the sensor update filters."""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import random
+from collections.abc import Callable
+
+from custom_components.comfoconnect.filters import Aggregate, CoalescingThrottle, Deadband, Downsampler
+
+# How long the recorder benchmark simulates, and how often the bridge pushes an update of a sensor.
+RECORDER_SECONDS = 24 * 60 * 60
+RECORDER_UPDATE_INTERVAL = 1
+
+
+class FakeTimerHandle:
+    """A timer of the FakeLoop."""
+
+    def __init__(self, when: float, callback: Callable[[], None]) -> None:
+        """Initialize the timer."""
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Cancel the timer."""
+        self.cancelled = True
+
+
+class FakeLoop:
+    """An event loop clock that only moves when the test advances it."""
+
+    def __init__(self) -> None:
+        """Initialize the clock at zero."""
+        self.now = 0.0
+        self._timers: list[tuple[float, int, FakeTimerHandle]] = []
+        self._sequence = itertools.count()
+
+    def time(self) -> float:
+        """Return the current time."""
+        return self.now
+
+    def call_at(self, when: float, callback: Callable[[], None]) -> FakeTimerHandle:
+        """Schedule a callback at the given time."""
+        handle = FakeTimerHandle(when, callback)
+        heapq.heappush(self._timers, (when, next(self._sequence), handle))
+        return handle
+
+    @property
+    def pending_timers(self) -> int:
+        """Return how many timers are scheduled."""
+        return sum(1 for _, _, handle in self._timers if not handle.cancelled)
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock forward and run the timers that are due."""
+        self.now += seconds
+        while self._timers and self._timers[0][0] <= self.now:
+            _, _, handle = heapq.heappop(self._timers)
+            if not handle.cancelled:
+                handle.callback()
+
+
+def test_throttle_passes_first_value_immediately() -> None:
+    """Test that a value is written right away when nothing was written in the window."""
+    loop = FakeLoop()
+    written = []
+    throttle = CoalescingThrottle(loop, 10, written.append)
+
+    throttle.async_call(1)
+
+    assert written == [1]
+    assert loop.pending_timers == 0
+
+
+def test_throttle_coalesces_to_the_newest_value() -> None:
+    """Test that updates within the window collapse into one write of the newest value, from a single timer."""
+    loop = FakeLoop()
+    written = []
+    throttle = CoalescingThrottle(loop, 10, written.append)
+
+    throttle.async_call(1)
+    for value in range(2, 7):
+        loop.advance(1)
+        throttle.async_call(value)
+
+    assert written == [1]
+    assert loop.pending_timers == 1
+
+    loop.advance(4.9)
+    assert written == [1]
+
+    loop.advance(0.1)
+    assert written == [1, 6]
+
+
+def test_throttle_always_writes_the_final_value() -> None:
+    """Test that the value a sensor settles on is written, even when no update follows it."""
+    loop = FakeLoop()
+    written = []
+    throttle = CoalescingThrottle(loop, 10, written.append)
+
+    throttle.async_call(50)
+    loop.advance(9)
+    throttle.async_call(80)
+    loop.advance(60)
+
+    assert written == [50, 80]
+
+
+def test_throttle_writes_at_most_once_per_window() -> None:
+    """Test that a steady stream of updates results in one write per window."""
+    loop = FakeLoop()
+    written = []
+    throttle = CoalescingThrottle(loop, 10, written.append)
+
+    for value in range(100):
+        throttle.async_call(value)
+        loop.advance(1)
+
+    # The timer that fires at the end of every window writes the value that arrived just before it.
+    assert written == [0, 9, 19, 29, 39, 49, 59, 69, 79, 89, 99]
+
+
+def test_throttle_window_is_configurable() -> None:
+    """Test that the window of the throttle is honoured."""
+    loop = FakeLoop()
+    written = []
+    throttle = CoalescingThrottle(loop, 2.5, written.append)
+
+    throttle.async_call(1)
+    throttle.async_call(2)
+    loop.advance(2.5)
+    throttle.async_call(3)
+
+    assert written == [1, 2]
+
+    loop.advance(2.5)
+    assert written == [1, 2, 3]
+
+
+def test_throttle_cancel_drops_pending_value() -> None:
+    """Test that nothing is written anymore after the entity is removed."""
+    loop = FakeLoop()
+    written = []
+    throttle = CoalescingThrottle(loop, 10, written.append)
+
+    throttle.async_call(1)
+    throttle.async_call(2)
+    throttle.async_cancel()
+    loop.advance(10)
+
+    assert written == [1]
+
+
+def test_deadband_drops_identical_values() -> None:
+    """Test that without a deadband, only values that are the same as the last one are dropped."""
+    loop = FakeLoop()
+    written = []
+    deadband = Deadband(loop, written.append)
+
+    for value in (1, 1, 0, 0, 0, 1, [1], [1], [2]):
+        deadband.async_call(value)
+
+    assert written == [1, 0, 1, [1], [2]]
+
+
+def test_deadband_drops_jitter() -> None:
+    """Test that values within the deadband of the last written value are dropped, while a slow drift still gets through."""
+    loop = FakeLoop()
+    written = []
+    deadband = Deadband(loop, written.append, absolute=0.2)
+
+    for value in (21.5, 21.6, 21.5, 21.4, 21.5, 21.6, 21.7, 21.8, 21.9):
+        deadband.async_call(value)
+
+    assert written == [21.5, 21.7, 21.9]
+
+
+def test_deadband_relative() -> None:
+    """Test that a relative deadband scales with the last written value."""
+    loop = FakeLoop()
+    written = []
+    deadband = Deadband(loop, written.append, relative=0.02)
+
+    for value in (100, 101, 102, 104, 105, 10, 10.1, 10.3):
+        deadband.async_call(value)
+
+    assert written == [100, 102, 105, 10, 10.3]
+
+
+def test_deadband_heartbeat() -> None:
+    """Test that a value within the deadband is written when nothing was written for the heartbeat interval."""
+    loop = FakeLoop()
+    written = []
+    deadband = Deadband(loop, written.append, absolute=0.2, heartbeat=900)
+
+    deadband.async_call(21.5)
+    for _ in range(9):
+        loop.advance(100)
+        deadband.async_call(21.6)
+
+    assert written == [21.5, 21.6]
+    assert loop.pending_timers == 0
+
+
+def test_downsampler_passes_first_value_immediately() -> None:
+    """Test that the first value is written right away, as an aggregate of one value."""
+    loop = FakeLoop()
+    written = []
+    downsampler = Downsampler(loop, 300, written.append)
+
+    downsampler.async_call(1500)
+
+    assert [(a.min, a.max, a.mean, a.last, a.count) for a in written] == [(1500, 1500, 1500, 1500, 1)]
+    assert loop.pending_timers == 0
+
+
+def test_downsampler_writes_the_aggregate_of_the_window() -> None:
+    """Test that the values in a window are written as one aggregate, from a single timer."""
+    loop = FakeLoop()
+    written = []
+    downsampler = Downsampler(loop, 300, written.append)
+
+    downsampler.async_call(0)
+    for value in (10, 40, 20, 30):
+        loop.advance(60)
+        downsampler.async_call(value)
+
+    assert len(written) == 1
+    assert loop.pending_timers == 1
+
+    loop.advance(60)
+    aggregate = written[-1]
+    assert (aggregate.min, aggregate.max, aggregate.mean, aggregate.last, aggregate.count) == (10, 40, 25, 30, 4)
+
+    # A window without values doesn't write anything.
+    loop.advance(600)
+    assert len(written) == 2
+
+
+def test_downsampler_cancel_drops_pending_aggregate() -> None:
+    """Test that nothing is written anymore after the entity is removed."""
+    loop = FakeLoop()
+    written = []
+    downsampler = Downsampler(loop, 300, written.append)
+
+    downsampler.async_call(1)
+    downsampler.async_call(2)
+    downsampler.async_cancel()
+    loop.advance(300)
+
+    assert len(written) == 1
+
+
+def _recorder_rows(make_filter: Callable[[FakeLoop, Callable], Callable] | None) -> int:
+    """Return how many rows the recorder writes for a day of updates of a sensor, with or without a filter."""
+    loop = FakeLoop()
+    rows = 0
+    last_state = None
+
+    def write_state(state) -> None:
+        # The recorder only writes a row when the state or its attributes changed.
+        nonlocal rows, last_state
+        if isinstance(state, Aggregate):
+            state = (round(state.mean, 2), state.min, state.max, state.last, state.count)
+        if state != last_state:
+            rows += 1
+            last_state = state
+
+    handler = make_filter(loop, write_state) if make_filter else write_state
+    values = random.Random(7)
+    for _ in range(RECORDER_SECONDS // RECORDER_UPDATE_INTERVAL):
+        handler(round(values.gauss(1500, 50)))
+        loop.advance(RECORDER_UPDATE_INTERVAL)
+    return rows
+
+
+def test_benchmark_recorder_rows(benchmark) -> None:
+    """Compare the recorder rows that a day of fan speed updates causes, unfiltered, throttled and downsampled."""
+    rows = benchmark.pedantic(
+        lambda: {
+            "unfiltered": _recorder_rows(None),
+            "throttled": _recorder_rows(lambda loop, action: CoalescingThrottle(loop, 10, action).async_call),
+            "downsampled": _recorder_rows(lambda loop, action: Downsampler(loop, 300, action).async_call),
+        },
+        rounds=1,
+    )
+    benchmark.extra_info.update(rows)
+
+    # One row per five minute window, and one for the very first value.
+    assert rows["downsampled"] <= RECORDER_SECONDS // 300 + 1
+    assert rows["downsampled"] * 20 < rows["throttled"] < rows["unfiltered"]
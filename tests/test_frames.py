@@ -0,0 +1,79 @@
+"""Tests for the batching of state writes."""
+
+from __future__ import annotations
+
+import asyncio
+
+from custom_components.comfoconnect.frames import FrameWriter
+
+
+class FakeEntity:
+    """An entity that records the states it writes."""
+
+    def __init__(self, entity_id: str, fail: bool = False) -> None:
+        """Initialize the entity, as if it was added to Home Assistant."""
+        self.hass = object()
+        self.entity_id = entity_id
+        self.state = None
+        self.written: list = []
+        self.fail = fail
+
+    def async_write_ha_state(self) -> None:
+        """Record the state, or fail."""
+        if self.fail:
+            raise RuntimeError("Broken entity")
+        self.written.append(self.state)
+
+
+async def test_entity_is_written_once_per_frame_with_its_last_state() -> None:
+    """Test that all changes of an entity in one iteration of the loop are written once, with the last state."""
+    writer = FrameWriter(asyncio.get_running_loop())
+    first = FakeEntity("sensor.first")
+    second = FakeEntity("sensor.second")
+
+    for state in range(10):
+        first.state = state
+        writer.async_schedule(first)
+    writer.async_schedule(second)
+    assert first.written == []
+
+    await asyncio.sleep(0)
+    assert first.written == [9]
+    assert second.written == [None]
+
+    first.state = 10
+    writer.async_schedule(first)
+    await asyncio.sleep(0)
+    assert first.written == [9, 10]
+    assert second.written == [None]
+    assert (writer.writes, writer.frames) == (3, 2)
+
+
+async def test_failing_or_removed_entity_does_not_block_the_others() -> None:
+    """Test that an entity that fails to write, or was removed, doesn't keep the others from being written."""
+    writer = FrameWriter(asyncio.get_running_loop())
+    broken = FakeEntity("sensor.broken", fail=True)
+    removed = FakeEntity("sensor.removed")
+    working = FakeEntity("sensor.working")
+
+    for entity in (broken, removed, working):
+        writer.async_schedule(entity)
+    # Removing an entity leaves hass set, so the entity discards its write itself.
+    writer.async_discard(removed)
+    await asyncio.sleep(0)
+
+    assert removed.written == []
+    assert working.written == [None]
+
+
+async def test_cancel_drops_the_next_frame() -> None:
+    """Test that the writes of the next frame are dropped when the writer is cancelled."""
+    writer = FrameWriter(asyncio.get_running_loop())
+    entity = FakeEntity("sensor.entity")
+
+    writer.async_schedule(entity)
+    writer.async_cancel()
+    await asyncio.sleep(0)
+
+    assert entity.written == []
+    assert writer.frames == 0
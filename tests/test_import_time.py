@@ -0,0 +1,81 @@
+"""
+Import time budget of the integration and its platforms.
+
+Home Assistant imports an integration on every cold start, which adds up on a Raspberry Pi. Every platform is
+imported in a fresh interpreter with python -X importtime, after the modules that Home Assistant has already
+loaded by then, so only what the integration adds is counted. The budget has plenty of headroom for slow CI runners,
+the modules that must stay lazy are checked by name.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from custom_components.comfoconnect import PLATFORMS
+
+# The modules that Home Assistant has loaded when it imports the platform of an integration.
+PRELOADED = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.dispatcher",
+)
+
+# The modules that are only imported when they are used, see discovery.py and select.py.
+LAZY_MODULES = (
+    "homeassistant.components.network",
+    "homeassistant.helpers.update_coordinator",
+)
+
+IMPORT_TIME_BUDGET = 0.15  # seconds, for the integration and one platform
+
+
+def _import_times(preloaded: list[str], modules: list[str]) -> list[tuple[str, int]]:
+    """Import modules after preloaded in a fresh interpreter, and return what modules imported, with the cumulative microseconds."""
+    code = "; ".join(f"import {module}" for module in (*preloaded, *modules))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Every line is "import time: self | cumulative | name", with the name indented by how deep it was imported. A
+    # module is reported when it's done, after the modules it imported, which are ours when it's one of ours.
+    times: list[tuple[str, int]] = []
+    pending: list[tuple[str, int]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        pending.append((name, int(cumulative)))
+        if _is_top_level(name):
+            if name.strip().split(".")[0] == "custom_components":
+                times.extend(pending)
+            pending = []
+    return times
+
+
+def _is_top_level(name: str) -> bool:
+    """Return whether a name of the importtime output was imported at the top level."""
+    return not name.startswith("  ", 1)
+
+
+@pytest.mark.parametrize("platform", PLATFORMS)
+def test_import_time(platform, record_property) -> None:
+    """Test that importing the integration and a platform stays within the budget, and leaves the lazy modules alone."""
+    times = _import_times(
+        [*PRELOADED, f"homeassistant.components.{platform}"], ["custom_components.comfoconnect", f"custom_components.comfoconnect.{platform}"]
+    )
+
+    # The modules that were imported at the top level include the time of everything they imported.
+    total = sum(cumulative for name, cumulative in times if _is_top_level(name)) / 1_000_000
+    record_property("import_seconds", round(total, 4))
+
+    imported = {name.strip() for name, _ in times}
+    assert not imported.intersection(LAZY_MODULES)
+    assert total < IMPORT_TIME_BUDGET
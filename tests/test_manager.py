@@ -0,0 +1,380 @@
+"""Tests for the ComfoConnectManager."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from types import SimpleNamespace
+
+import custom_components.comfoconnect as integration
+import pytest
+from aiocomfoconnect import Bridge
+from aiocomfoconnect.exceptions import AioComfoConnectTimeout, ComfoConnectNotAllowed, ComfoConnectOtherSession
+from custom_components.comfoconnect import ComfoConnectBridge
+from custom_components.comfoconnect import discovery as discovery_module
+from custom_components.comfoconnect import manager as manager_module
+from custom_components.comfoconnect.cache import SensorValueCache
+from custom_components.comfoconnect.const import CONF_LOCAL_UUID, CONF_UUID, DOMAIN, ConnectionState
+from custom_components.comfoconnect.manager import ComfoConnectManager
+from custom_components.comfoconnect.sensor import LINK_SENSOR_TYPES
+from fake_bridge import BRIDGE_HOST, BRIDGE_UUID, FakeBridge
+from homeassistant.components import network
+from homeassistant.const import CONF_HOST
+from homeassistant.exceptions import ConfigEntryNotReady
+from tcp_bridge import TcpBridge
+
+BRIDGES = 6
+MAX_CONCURRENT_CONNECTS = 2
+
+
+def _max_overlap(intervals: list[tuple[float, float]]) -> int:
+    """Return the largest number of intervals that overlap."""
+    events = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals], key=lambda event: (event[0], event[1]))
+    overlap = max_overlap = 0
+    for _, change in events:
+        overlap += change
+        max_overlap = max(max_overlap, overlap)
+    return max_overlap
+
+
+def _mock_discovery(monkeypatch, bridges: list[Bridge]) -> tuple[list[str], list[list[str]]]:
+    """Let discovery find the given bridges, and return the unicast probes and broadcasts it was asked for."""
+    probes: list[str] = []
+    sweeps: list[list[str]] = []
+
+    async def discover_bridges(host, timeout):
+        probes.append(host)
+        return [bridge for bridge in bridges if bridge.host == host]
+
+    async def async_stream_bridges(broadcast_addresses, on_bridge):
+        sweeps.append(broadcast_addresses)
+        for bridge in bridges:
+            on_bridge(bridge)
+        return bridges
+
+    async def async_get_ipv4_broadcast_addresses(hass):
+        return ["255.255.255.255"]
+
+    monkeypatch.setattr(discovery_module, "discover_bridges", discover_bridges)
+    monkeypatch.setattr(discovery_module, "async_stream_bridges", async_stream_bridges)
+    monkeypatch.setattr(network, "async_get_ipv4_broadcast_addresses", async_get_ipv4_broadcast_addresses)
+    return probes, sweeps
+
+
+async def test_bridges_that_drop_together_reconnect_spread_out(hass, monkeypatch) -> None:
+    """Test that bridges that drop at the same moment reconnect with jitter, backoff and a cap on concurrent connects."""
+    random.seed(7)
+    # The bridges are gone, so discovery doesn't find them on another address.
+    _mock_discovery(monkeypatch, [])
+
+    manager = ComfoConnectManager(hass, backoff_base=0.05, backoff_max=0.4, max_concurrent_connects=MAX_CONCURRENT_CONNECTS)
+    bridges = [FakeBridge(hass, latency=0.02, uuid=f"{index:032x}") for index in range(BRIDGES)]
+    await asyncio.gather(*(manager.async_connect(bridge, "local") for bridge in bridges))
+    for index, bridge in enumerate(bridges):
+        bridge.keepalive_idle = 0.05
+        await manager.async_add_bridge(f"entry{index}", bridge, "local")
+
+    # A network blip takes all the bridges away at once, and they come back a second later.
+    for bridge in bridges:
+        bridge.drop()
+
+    async with asyncio.timeout(1):
+        while any(bridge.is_available for bridge in bridges):
+            await asyncio.sleep(0.01)
+
+    await asyncio.sleep(1)
+    for bridge in bridges:
+        bridge.online = True
+
+    async with asyncio.timeout(5):
+        while not all(bridge.is_available for bridge in bridges):
+            await asyncio.sleep(0.01)
+
+    # Leave out the first connect of every bridge.
+    attempts = [attempt for bridge in bridges for attempt in bridge.connect_attempts[1:]]
+    assert _max_overlap([(start, end) for start, end, _ in attempts]) <= MAX_CONCURRENT_CONNECTS
+
+    # The jitter spreads the first attempts, instead of all bridges connecting at the same moment.
+    first_attempts = sorted(bridge.connect_attempts[1][0] for bridge in bridges)
+    assert len(set(first_attempts)) == BRIDGES
+
+    # The backoff keeps the number of failed attempts low, a fixed 50 ms retry would need about 20 per bridge.
+    for bridge in bridges:
+        failed = [attempt for attempt in bridge.connect_attempts[1:] if not attempt[2]]
+        assert len(failed) <= 8
+        assert bridge.connect_attempts[-1][2]
+
+    for index in range(BRIDGES):
+        await manager.async_remove_bridge(f"entry{index}")
+
+
+async def test_connections_that_drop_together_are_reconnected_spread_out(hass) -> None:
+    """Test that the manager alone reconnects real bridges whose connections drop at the same moment, spread out."""
+    random.seed(7)
+
+    class RecordingBridge(ComfoConnectBridge):
+        """A bridge that records when it starts and finishes connecting."""
+
+        connects: list[tuple[float, float]]
+
+        async def connect(self, uuid: str):
+            start = self.hass.loop.time()
+            try:
+                await super().connect(uuid)
+            finally:
+                self.connects.append((start, self.hass.loop.time()))
+
+    tcp_bridges = [TcpBridge(uuid=f"{index:032x}") for index in range(BRIDGES)]
+    bridges = []
+    for index, tcp_bridge in enumerate(tcp_bridges):
+        await tcp_bridge.start()
+        bridge = RecordingBridge(hass, "127.0.0.1", tcp_bridge.uuid, SensorValueCache(hass, f"entry{index}"))
+        bridge.PORT = tcp_bridge.port
+        bridge.connects = []
+        bridges.append(bridge)
+
+    manager = ComfoConnectManager(hass, backoff_base=0.5, max_concurrent_connects=MAX_CONCURRENT_CONNECTS)
+    await asyncio.gather(*(manager.async_connect(bridge, "00000000000000000000000000001337") for bridge in bridges))
+    for index, bridge in enumerate(bridges):
+        await manager.async_add_bridge(f"entry{index}", bridge, "00000000000000000000000000001337")
+
+    # A power cut reboots all the bridges at once, which closes their connections.
+    for tcp_bridge in tcp_bridges:
+        tcp_bridge.drop()
+
+    async with asyncio.timeout(5):
+        while not all(len(bridge.connects) == 2 and bridge.state is ConnectionState.CONNECTED for bridge in bridges):
+            await asyncio.sleep(0.01)
+    # aiocomfoconnect would have started a session of its own for every bridge after a second.
+    await asyncio.sleep(1.5)
+    assert all(bridge.metrics.sessions == 2 for bridge in bridges)
+
+    reconnects = [bridge.connects[1] for bridge in bridges]
+    assert _max_overlap(reconnects) <= MAX_CONCURRENT_CONNECTS
+    # The jitter spreads the reconnects, instead of all bridges connecting at the same moment.
+    assert len({start for start, _ in reconnects}) == BRIDGES
+
+    for index in range(BRIDGES):
+        await manager.async_remove_bridge(f"entry{index}")
+    for tcp_bridge in tcp_bridges:
+        await tcp_bridge.stop()
+
+
+async def test_backoff_delay_is_capped(hass) -> None:
+    """Test that the reconnect delay grows with every attempt, up to the maximum."""
+    random.seed(7)
+
+    manager = ComfoConnectManager(hass, backoff_base=1, backoff_max=60)
+
+    assert all(0 <= manager.backoff_delay(0) <= 1 for _ in range(100))
+    assert all(0 <= manager.backoff_delay(3) <= 8 for _ in range(100))
+    assert all(0 <= manager.backoff_delay(20) <= 60 for _ in range(100))
+    assert max(manager.backoff_delay(20) for _ in range(100)) > 8
+
+
+async def test_traffic_replaces_keepalives(hass) -> None:
+    """Test that a bridge is only probed when it has been quiet for the idle time, and that the probe is timed."""
+    manager = ComfoConnectManager(hass)
+    bridge = FakeBridge(hass, latency=0.02)
+    await manager.async_connect(bridge, "local")
+    bridge.keepalive_idle = 0.1
+    await manager.async_add_bridge("entry", bridge, "local")
+
+    # The bridge pushes sensor updates, so we don't need to probe it.
+    for _ in range(25):
+        bridge.receive()
+        await asyncio.sleep(0.02)
+    assert bridge.probes == []
+
+    # When it goes quiet, we probe it once per idle time.
+    quiet_since = hass.loop.time()
+    await asyncio.sleep(0.3)
+    assert len(bridge.probes) == 2
+    assert bridge.probes[0] - quiet_since < 0.1
+    assert 0.02 <= bridge.rtt < 0.05
+
+    sensors = {description.key: description for description in LINK_SENSOR_TYPES}
+    assert sensors["bridge_rtt"].value_fn(bridge, hass.loop.time()) == round(bridge.rtt * 1000, 1)
+    assert sensors["bridge_last_seen"].value_fn(bridge, bridge.last_seen + 12.3) == 12
+
+    await manager.async_remove_bridge("entry")
+
+
+async def test_failed_probe_is_retried_quickly(hass, monkeypatch) -> None:
+    """Test that a bridge that doesn't answer is probed again quickly, and reconnected when it still doesn't answer."""
+    monkeypatch.setattr(manager_module, "FAILED_PROBE_INTERVAL", 0.02)
+
+    manager = ComfoConnectManager(hass, backoff_base=0.01)
+    bridge = FakeBridge(hass)
+    await manager.async_connect(bridge, "local")
+    bridge.hangs = True
+    bridge.keepalive_idle = 0.2
+    await manager.async_add_bridge("entry", bridge, "local")
+
+    async with asyncio.timeout(1):
+        while len(bridge.connect_attempts) < 2:
+            await asyncio.sleep(0.005)
+
+    # The second probe follows the failed one after the short interval, not after the idle time.
+    assert len(bridge.probes) == manager_module.MAX_FAILED_PROBES
+    assert bridge.probes[1] - bridge.probes[0] < 0.1
+
+    await manager.async_remove_bridge("entry")
+
+
+async def test_moved_bridge_is_found_on_a_recent_address(hass, monkeypatch) -> None:
+    """Test that a bridge that DHCP moved is looked for on the addresses it recently had, without a broadcast."""
+    monkeypatch.setattr(manager_module, "FAILED_PROBE_INTERVAL", 0.02)
+    probes, sweeps = _mock_discovery(monkeypatch, [Bridge("192.0.2.2", BRIDGE_UUID)])
+
+    manager = ComfoConnectManager(hass, backoff_base=0.01)
+
+    # The bridge had the other address before.
+    manager.discovery.async_remember_host(BRIDGE_UUID, "192.0.2.2")
+
+    bridge = FakeBridge(hass)
+    await manager.async_connect(bridge, "local")
+    bridge.keepalive_idle = 0.05
+    hosts = []
+    await manager.async_add_bridge("entry", bridge, "local", hosts.append)
+
+    bridge.move("192.0.2.2")
+    async with asyncio.timeout(1):
+        while not (bridge.is_available and bridge.host == "192.0.2.2"):
+            await asyncio.sleep(0.005)
+
+    assert hosts == ["192.0.2.2"]
+    assert probes == ["192.0.2.2"]
+    assert sweeps == []
+    failed = [attempt for attempt in bridge.connect_attempts[1:] if not attempt[2]]
+    assert len(failed) == manager_module.REDISCOVER_AFTER_FAILURES
+
+    await manager.async_remove_bridge("entry")
+
+
+async def test_moved_bridge_is_found_with_a_broadcast(hass, monkeypatch) -> None:
+    """Test that a bridge that moved to an address we haven't seen it at is found with a broadcast."""
+    monkeypatch.setattr(manager_module, "FAILED_PROBE_INTERVAL", 0.02)
+    probes, sweeps = _mock_discovery(monkeypatch, [Bridge("192.0.2.3", BRIDGE_UUID)])
+
+    manager = ComfoConnectManager(hass, backoff_base=0.01)
+    bridge = FakeBridge(hass)
+    await manager.async_connect(bridge, "local")
+    bridge.keepalive_idle = 0.05
+    hosts = []
+    await manager.async_add_bridge("entry", bridge, "local", hosts.append)
+
+    bridge.move("192.0.2.3")
+    async with asyncio.timeout(1):
+        while not (bridge.is_available and bridge.host == "192.0.2.3"):
+            await asyncio.sleep(0.005)
+
+    # The only address we knew is the one that stopped working, so there was nothing to ask first.
+    assert hosts == ["192.0.2.3"]
+    assert probes == []
+    assert len(sweeps) == 1
+
+    await manager.async_remove_bridge("entry")
+
+
+async def test_bridge_that_took_over_the_session_is_reconnected(hass, monkeypatch) -> None:
+    """Test that a bridge that refuses the keepalive, because another client took over the session, is reconnected."""
+    monkeypatch.setattr(manager_module, "FAILED_PROBE_INTERVAL", 0.02)
+
+    manager = ComfoConnectManager(hass, backoff_base=0.01)
+    bridge = FakeBridge(hass)
+    await manager.async_connect(bridge, "local")
+    bridge.keepalive_idle = 0.02
+    await manager.async_add_bridge("entry", bridge, "local")
+
+    # The other client keeps the session for a while.
+    bridge.refuses = ComfoConnectOtherSession(None)
+    async with asyncio.timeout(1):
+        while len(bridge.connect_attempts) < 3:
+            await asyncio.sleep(0.005)
+    bridge.refuses = None
+
+    async with asyncio.timeout(1):
+        while not bridge.connect_attempts[-1][2]:
+            await asyncio.sleep(0.005)
+
+    assert bridge.is_available
+    assert not manager._watch_tasks["entry"].done()
+    await manager.async_remove_bridge("entry")
+
+
+async def test_bridge_that_no_longer_allows_us_starts_a_reauth(hass, monkeypatch) -> None:
+    """Test that a bridge that doesn't allow us to reconnect asks for a reauth once, and is still reconnected after."""
+    monkeypatch.setattr(manager_module, "FAILED_PROBE_INTERVAL", 0.02)
+
+    manager = ComfoConnectManager(hass, backoff_base=0.01)
+    bridge = FakeBridge(hass)
+    await manager.async_connect(bridge, "local")
+    bridge.keepalive_idle = 0.02
+    reauths = []
+    await manager.async_add_bridge("entry", bridge, "local", auth_failed=lambda: reauths.append(bridge.uuid))
+
+    # The bridge was reset, and forgot that we were registered.
+    bridge.drop()
+    bridge.online = True
+    bridge.refuses = ComfoConnectNotAllowed(None)
+    async with asyncio.timeout(1):
+        while len(bridge.connect_attempts) < 4:
+            await asyncio.sleep(0.005)
+
+    assert reauths == [bridge.uuid]
+    assert not manager._watch_tasks["entry"].done()
+
+    # The user registered us again.
+    bridge.refuses = None
+    async with asyncio.timeout(1):
+        while not bridge.is_available:
+            await asyncio.sleep(0.005)
+
+    assert reauths == [bridge.uuid]
+    await manager.async_remove_bridge("entry")
+
+
+async def test_added_bridge_replaces_the_watcher_of_the_entry(hass) -> None:
+    """Test that adding a bridge for an entry that still has a watcher stops that watcher first."""
+    manager = ComfoConnectManager(hass)
+    old_bridge = FakeBridge(hass)
+    await manager.async_add_bridge("entry", old_bridge, "local")
+    old_watcher = manager._watch_tasks["entry"]
+
+    await manager.async_add_bridge("entry", FakeBridge(hass), "local")
+
+    assert old_watcher.cancelled()
+    assert manager._watch_tasks["entry"] is not old_watcher
+    await manager.async_remove_bridge("entry")
+
+
+async def test_failed_setup_leaves_no_bridge_behind(hass, monkeypatch) -> None:
+    """Test that a setup that fails after connecting disconnects the bridge, stops watching it, and is retried."""
+    bridges = []
+
+    def create_bridge(*args) -> FakeBridge:
+        bridges.append(FakeBridge(hass))
+        return bridges[-1]
+
+    async def refresh_device_info(*args) -> None:
+        raise AioComfoConnectTimeout("No answer")
+
+    monkeypatch.setattr(integration, "ComfoConnectBridge", create_bridge)
+    monkeypatch.setattr(integration, "async_refresh_device_info", refresh_device_info)
+    entry = SimpleNamespace(
+        entry_id="entry",
+        data={CONF_HOST: BRIDGE_HOST, CONF_UUID: BRIDGE_UUID, CONF_LOCAL_UUID: "local"},
+        options={},
+        async_on_unload=lambda unload: None,
+        add_update_listener=lambda listener: None,
+        async_start_reauth=lambda hass: None,
+    )
+
+    with pytest.raises(ConfigEntryNotReady):
+        await integration.async_setup_entry(hass, entry)
+
+    manager = hass.data[DOMAIN]
+    assert not manager.bridges
+    assert not manager._watch_tasks
+    assert not bridges[0].connected
@@ -0,0 +1,101 @@
+"""Tests for the metrics of the ComfoConnectBridge."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from aiocomfoconnect.exceptions import AioComfoConnectTimeout
+from aiocomfoconnect.sensors import SENSOR_TEMPERATURE_EXTRACT, SENSORS
+from custom_components.comfoconnect import async_fetch_device_info
+from custom_components.comfoconnect.const import (
+    CONF_DEVICE_INFO,
+    CONF_LOCAL_UUID,
+    CONF_UUID,
+    DEVICE_INFO_BRIDGE_SERIAL,
+    DEVICE_INFO_UNIT_MODEL,
+    DOMAIN,
+)
+from custom_components.comfoconnect.diagnostics import async_get_config_entry_diagnostics
+from custom_components.comfoconnect.manager import ComfoConnectManager
+from custom_components.comfoconnect.metrics import LatencyHistogram
+from custom_components.comfoconnect.sensor import LINK_SENSOR_TYPES
+from fake_bridge import BRIDGE_HOST, ENTRY_ID, FakeBridge
+from homeassistant.const import CONF_HOST
+
+
+def test_histogram_buckets() -> None:
+    """Test that a latency lands in the first bucket whose bound it doesn't exceed."""
+    histogram = LatencyHistogram()
+    for seconds in (0.00005, 0.001, 0.002, 0.2, 60):
+        histogram.record(seconds)
+
+    assert histogram.count == 5
+    assert histogram.max == 60
+    assert histogram.as_dict()["buckets"] == {
+        "<= 0.1 ms": 1,
+        "<= 1 ms": 1,
+        "<= 5 ms": 1,
+        "<= 10 ms": 0,
+        "<= 50 ms": 0,
+        "<= 100 ms": 0,
+        "<= 500 ms": 1,
+        "<= 1000 ms": 0,
+        "<= 5000 ms": 0,
+        "> 5000 ms": 1,
+    }
+    assert LatencyHistogram().mean is None
+
+
+async def test_commands_and_updates_are_counted(hass) -> None:
+    """Test that the bridge times its commands, counts the failed ones, and counts the sensor updates."""
+    bridge = FakeBridge(hass, latency=0.01)
+    sensor = SENSORS[SENSOR_TEMPERATURE_EXTRACT]
+
+    await bridge.set_speed("low")
+    await bridge.get_bypass()
+    bridge.hangs = True
+    with pytest.raises(AioComfoConnectTimeout):
+        await bridge.set_speed("high")
+
+    bridge.async_subscribe_sensor(sensor.id, lambda value: None)
+    for value in (21.5, 21.6, 21.7):
+        bridge.sensor_callback(sensor, value)
+
+    metrics = bridge.metrics.as_dict()
+    assert set(metrics["commands"]) == {"set_speed", "get_bypass"}
+    assert metrics["commands"]["set_speed"]["count"] == 2
+    assert metrics["commands"]["set_speed"]["errors"] == 1
+    assert metrics["commands"]["get_bypass"]["mean_ms"] >= 10
+    assert metrics["pdo_updates"] == {sensor.id: 3}
+    assert metrics["dispatch"]["count"] == 3
+
+    sensors = {description.key: description for description in LINK_SENSOR_TYPES}
+    now = hass.loop.time()
+    assert sensors["bridge_pdo_updates"].value_fn(bridge, now) == 3
+    assert sensors["bridge_command_latency"].value_fn(bridge, now) >= 10
+    assert sensors["bridge_reconnects"].value_fn(bridge, now) == 0
+
+
+async def test_diagnostics(hass) -> None:
+    """Test that the diagnostics contain the metrics, without the host, the uuids and the serial number."""
+    manager = hass.data[DOMAIN] = ComfoConnectManager(hass)
+    bridge = FakeBridge(hass)
+    manager.bridges[ENTRY_ID] = bridge
+    await bridge.get_bypass()
+
+    data = {
+        CONF_HOST: BRIDGE_HOST,
+        CONF_LOCAL_UUID: "secret",
+        CONF_UUID: bridge.uuid,
+        CONF_DEVICE_INFO: await async_fetch_device_info(bridge),
+    }
+    entry = SimpleNamespace(entry_id=ENTRY_ID, data=data, options={})
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    for key in (CONF_HOST, CONF_LOCAL_UUID, CONF_UUID):
+        assert diagnostics["entry"]["data"][key] == "**REDACTED**"
+    assert diagnostics["entry"]["data"][CONF_DEVICE_INFO][DEVICE_INFO_BRIDGE_SERIAL] == "**REDACTED**"
+    assert diagnostics["entry"]["data"][CONF_DEVICE_INFO][DEVICE_INFO_UNIT_MODEL] == "ComfoAirQ 450"
+    assert diagnostics["metrics"]["commands"]["get_bypass"]["count"] == 1
+    assert diagnostics["metrics"]["reconnects"] == 0
@@ -0,0 +1,91 @@
+"""Tests for the detection of the installed options."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import custom_components.comfoconnect as integration
+import pytest
+from aiocomfoconnect.bridge import Node
+from aiocomfoconnect.const import ProductId
+from aiocomfoconnect.exceptions import AioComfoConnectTimeout
+from aiocomfoconnect.sensors import SENSOR_COMFOFOND_GHE_PRESENT, SENSORS
+from custom_components.comfoconnect import async_installed_descriptions, async_probe_installed_options
+from custom_components.comfoconnect.const import CONF_INSTALLED_OPTIONS, CONF_UUID, DOMAIN, OPTION_COMFOCOOL, OPTION_COMFOFOND
+from custom_components.comfoconnect.select import SELECT_TYPES
+from custom_components.comfoconnect.sensor import SENSOR_TYPES
+from fake_bridge import BRIDGE_UUID, FakeBridge
+from homeassistant.const import Platform
+from homeassistant.helpers import entity_registry as er
+
+
+@pytest.mark.parametrize(
+    ("nodes", "ghe_present", "expected"),
+    [
+        ([ProductId.COMFOAIRQ], False, []),
+        ([ProductId.COMFOAIRQ, ProductId.COMFOCOOL], False, [OPTION_COMFOCOOL]),
+        ([ProductId.COMFOAIRQ], True, [OPTION_COMFOFOND]),
+    ],
+)
+async def test_options_are_probed(hass, monkeypatch, nodes, ghe_present, expected) -> None:
+    """Test that a ComfoCool is detected by its node, and a ComfoFond by the sensor that tells whether it's present."""
+    monkeypatch.setattr(integration, "NODE_SETTLE", 0.05)
+
+    bridge = FakeBridge(hass, latency=0.02)
+    bridge.sensor_delay = 0
+    # The bridge has only announced the ventilation unit when we probe, the other nodes follow when we ask.
+    bridge._nodes = {1: Node(1, ProductId.COMFOAIRQ, 1, 0)}
+    bridge.bus_nodes = dict(enumerate(nodes, start=1))
+    await bridge.async_connect("local")
+    await bridge.async_register_requested_sensors()
+
+    # The bridge sends the value of the sensor when it's registered.
+    sensor = SENSORS[SENSOR_COMFOFOND_GHE_PRESENT]
+    hass.loop.call_later(0.01, bridge.sensor_callback, sensor, ghe_present)
+
+    assert await async_probe_installed_options(bridge) == expected
+    await hass.async_block_till_done()
+    assert "nodes" in bridge.requests
+    # The sensor is only registered while we wait for it.
+    assert bridge.subscriptions == set()
+
+
+async def test_node_request_fails_when_the_bridge_keeps_announcing(hass) -> None:
+    """Test that we don't decide on the nodes while the bridge is still announcing them, so the options aren't cached."""
+    bridge = FakeBridge(hass, latency=0.02)
+    bridge.bus_nodes = {node_id: ProductId.COMFOAIRQ for node_id in range(1, 20)}
+    await bridge.async_connect("local")
+
+    with pytest.raises(AioComfoConnectTimeout):
+        await bridge.async_request_nodes(0.05, 0.2)
+
+
+async def test_probe_fails_when_the_bridge_is_silent(hass) -> None:
+    """Test that the probe gives up when the bridge doesn't send the sensor, so the options aren't cached."""
+    bridge = FakeBridge(hass)
+    await bridge.async_register_requested_sensors()
+
+    with pytest.raises(AioComfoConnectTimeout):
+        await bridge.async_read_sensor(SENSORS[SENSOR_COMFOFOND_GHE_PRESENT], 0.05)
+
+
+async def test_entities_of_absent_options_are_skipped(hass) -> None:
+    """Test that only the entities of installed options are created, and the ones created before we knew are kept in the registry."""
+    await er.async_load(hass)
+    entity_registry = er.async_get(hass)
+    condensor = next(description for description in SENSOR_TYPES if description.option == OPTION_COMFOCOOL)
+    entity_id = entity_registry.async_get_or_create(Platform.SENSOR, DOMAIN, f"{BRIDGE_UUID}-{condensor.key}").entity_id
+
+    # Until we know, all entities are created.
+    entry = SimpleNamespace(data={CONF_UUID: BRIDGE_UUID})
+    assert async_installed_descriptions(entry, SENSOR_TYPES) == list(SENSOR_TYPES)
+
+    entry = SimpleNamespace(data={CONF_UUID: BRIDGE_UUID, CONF_INSTALLED_OPTIONS: [OPTION_COMFOFOND]})
+    sensors = async_installed_descriptions(entry, SENSOR_TYPES)
+    assert condensor not in sensors
+    assert {description.option for description in sensors} == {None, OPTION_COMFOFOND}
+    # A detection that missed the option mustn't cost the user the entity and its customizations.
+    assert entity_registry.async_get(entity_id) is not None
+
+    selects = async_installed_descriptions(entry, SELECT_TYPES)
+    assert [description.key for description in SELECT_TYPES if description not in selects] == ["comfocool"]
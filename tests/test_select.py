@@ -0,0 +1,98 @@
+"""Tests for the ComfoConnect select entities."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+
+from aiocomfoconnect.const import VentilationMode, VentilationSetting
+from aiocomfoconnect.sensors import SENSOR_OPERATING_MODE, SENSORS
+from custom_components.comfoconnect.const import ATTR_STALE
+from custom_components.comfoconnect.coordinator import ComfoConnectSettingsCoordinator
+from custom_components.comfoconnect.select import SELECT_TYPES, ComfoConnectSelect
+from fake_bridge import SETTINGS, FakeBridge
+from homeassistant.const import CONF_SCAN_INTERVAL
+
+
+async def test_settings_are_read_together(hass) -> None:
+    """Test that the settings without a sensor are read by one coordinator, with the requests in flight at the same time."""
+    bridge = FakeBridge(hass, latency=0.01)
+    await bridge.async_connect("local")
+    bridge.requests.clear()
+    readers = {description.key: description.get_value_fn for description in SELECT_TYPES if not description.sensor}
+    coordinator = ComfoConnectSettingsCoordinator(hass, bridge, SimpleNamespace(options={}), readers)
+
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.data == SETTINGS
+    assert sorted(bridge.requests) == sorted(SETTINGS)
+    assert bridge.max_in_flight == len(SETTINGS)
+
+
+async def test_scan_interval_follows_the_options(hass) -> None:
+    """Test that a changed scan interval is applied without reloading the entry."""
+    entry = SimpleNamespace(options={})
+    coordinator = ComfoConnectSettingsCoordinator(hass, FakeBridge(hass), entry, {})
+
+    assert coordinator.update_interval == timedelta(seconds=30)
+
+    entry.options = {CONF_SCAN_INTERVAL: 120}
+    await coordinator.async_options_updated(hass, entry)
+
+    assert coordinator.update_interval == timedelta(seconds=120)
+
+
+async def test_settings_are_unavailable_until_read(hass) -> None:
+    """Test that a select of a setting that the bridge doesn't push is unavailable until the setting was read."""
+    bridge = FakeBridge(hass)
+    await bridge.async_connect("local")
+    descriptions = {description.key: description for description in SELECT_TYPES}
+    balance_mode = ComfoConnectSelect(bridge, SimpleNamespace(), descriptions["balance_mode"])
+    bypass_mode = ComfoConnectSelect(bridge, SimpleNamespace(), descriptions["bypass_mode"])
+
+    assert not balance_mode.available
+    assert bypass_mode.available
+
+    balance_mode._handle_update(SETTINGS["balance_mode"])
+
+    assert balance_mode.available
+
+
+async def test_selected_option_is_written_once(hass) -> None:
+    """Test that a selected option is written right away, and not again in the next frame."""
+    bridge = FakeBridge(hass)
+    await bridge.async_connect("local")
+    descriptions = {description.key: description for description in SELECT_TYPES}
+    bypass_mode = ComfoConnectSelect(bridge, SimpleNamespace(), descriptions["bypass_mode"])
+    bypass_mode.hass = hass
+    written = []
+    bypass_mode.async_write_ha_state = lambda: written.append(bypass_mode.current_option)
+    await bypass_mode.async_added_to_hass()
+
+    await bypass_mode.async_select_option(VentilationSetting.OFF)
+    await asyncio.sleep(0)
+
+    assert written == [VentilationSetting.OFF]
+
+
+async def test_cached_option_is_stale_and_shared_with_the_fan(hass) -> None:
+    """Test that the ventilation mode select starts with the cached option marked stale, decoded like the fan does."""
+    bridge = FakeBridge(hass)
+    await bridge.async_connect("local")
+    sensor = SENSORS[SENSOR_OPERATING_MODE]
+    bridge.sensor_cache.async_set(sensor.id, -1)
+    descriptions = {description.key: description for description in SELECT_TYPES}
+    select_mode = ComfoConnectSelect(bridge, SimpleNamespace(), descriptions["select_mode"])
+    select_mode.hass = hass
+    await select_mode.async_added_to_hass()
+
+    assert select_mode.current_option == VentilationMode.AUTO
+    assert select_mode.extra_state_attributes == {ATTR_STALE: True}
+
+    # A mode without an option of its own is manual, as the fan shows it.
+    bridge.sensor_callback(sensor, 5)
+
+    assert select_mode.current_option == VentilationMode.MANUAL
+    assert select_mode.extra_state_attributes is None
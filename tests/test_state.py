@@ -0,0 +1,75 @@
+"""Tests for the decoded state of a bridge."""
+
+from __future__ import annotations
+
+import pytest
+from aiocomfoconnect.const import VentilationMode
+from aiocomfoconnect.sensors import SENSOR_OPERATING_MODE, SENSORS
+from custom_components.comfoconnect import state
+from fake_bridge import FakeBridge
+
+
+async def test_sensor_is_decoded_once_for_all_observers(hass, monkeypatch) -> None:
+    """Test that a field starts with the cached value, is decoded once per update, and only notifies on changes."""
+    sensor = SENSORS[SENSOR_OPERATING_MODE]
+    lookup = state.SENSOR_FIELDS["mode"][1]
+    decoded = []
+
+    def decode(value):
+        decoded.append(value)
+        return lookup(value)
+
+    monkeypatch.setitem(state.SENSOR_FIELDS, "mode", (sensor.id, decode))
+
+    bridge = FakeBridge(hass)
+    bridge.sensor_cache.async_set(sensor.id, -1)
+
+    fan_modes = []
+    select_modes = []
+    stop_fan = bridge.ventilation.async_observe_sensor("mode", fan_modes.append)
+    bridge.ventilation.async_observe_sensor("mode", select_modes.append)
+    assert bridge.ventilation.state.mode == VentilationMode.AUTO
+
+    bridge.sensor_callback(sensor, 1)
+    bridge.sensor_callback(sensor, 1)
+    stop_fan()
+    bridge.sensor_callback(sensor, -1)
+
+    assert decoded == [-1, 1, 1, -1]
+    assert fan_modes == [VentilationMode.MANUAL]
+    assert select_modes == [VentilationMode.MANUAL, VentilationMode.AUTO]
+    with pytest.raises(ValueError):
+        bridge.ventilation.async_observe_sensor("balance_mode", select_modes.append)
+
+
+async def test_cached_value_is_stale_until_the_bridge_sends_it(hass) -> None:
+    """Test that a field seeded from the cache is stale, and that the same value from the bridge makes it fresh."""
+    bridge = FakeBridge(hass)
+    sensor = SENSORS[SENSOR_OPERATING_MODE]
+    bridge.sensor_cache.async_set(sensor.id, -1)
+    modes = []
+    bridge.ventilation.async_observe_sensor("mode", modes.append)
+    assert bridge.ventilation.stale == {"mode"}
+
+    bridge.sensor_callback(sensor, -1)
+    bridge.sensor_callback(sensor, -1)
+    # Any value other than auto is manual, so the field is never cleared by a value without an option.
+    bridge.sensor_callback(sensor, 5)
+
+    assert bridge.ventilation.stale == set()
+    assert modes == [VentilationMode.AUTO, VentilationMode.MANUAL]
+
+
+async def test_settings_are_set_together(hass) -> None:
+    """Test that settings that were read together notify their observers, and that unknown fields are refused."""
+    bridge = FakeBridge(hass)
+    balance_modes = []
+    bridge.ventilation.async_observe("balance_mode", balance_modes.append)
+
+    bridge.ventilation.async_update({"balance_mode": "balance", "boost_timeout": False})
+    bridge.ventilation.async_update({"balance_mode": "balance", "boost_timeout": None})
+
+    assert balance_modes == ["balance"]
+    assert bridge.ventilation.state.boost_timeout is False
+    with pytest.raises(ValueError):
+        bridge.ventilation.async_observe("speed", balance_modes.append)